@@ -1,7 +1,11 @@
 #use this to make updates
 import json
-import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, filedialog
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, scrolledtext, filedialog, simpledialog
+except ImportError:
+    # Headless use (CLI exports on CI) doesn't need the GUI toolkit
+    tk = ttk = messagebox = scrolledtext = filedialog = simpledialog = None
 import webbrowser
 import subprocess
 import socket
@@ -13,26 +17,3412 @@ import platform
 import datetime
 import re
 import shutil
+import html
+import random
+import unicodedata
+import uuid
+import concurrent.futures
+import urllib.parse
+import hashlib
+import base64
+import heapq
+import math
+import gzip
+import io
+import sqlite3
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+from collections import Counter
+from collections.abc import MutableMapping
 
 DATA_FILE = "data.json"
 TS_FILE = "data.ts"
+DB_FILE = "content.db"
+POSTS_DIR = "posts"
+UPLOADS_DIR = os.path.join("public", "uploads")
+CACHE_DIR = ".cms-cache"
+JOURNAL_FILE = os.path.join(CACHE_DIR, "journal.jsonl")
+# Image placeholders (dominant colour + tiny data URI) keyed by upload content hash
+PLACEHOLDERS_CACHE_FILE = os.path.join(CACHE_DIR, "placeholders.json")
+# sha256 of each upload, keyed by name and checked against size + mtime before reuse
+UPLOAD_HASHES_FILE = os.path.join(CACHE_DIR, "upload-hashes.json")
+# Uploads are streamed through this buffer and land under a .part name until complete
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+UPLOAD_PART_SUFFIX = ".part"
+# Held briefly by whichever editor is saving; versions.json tracks per-key edit counters
+LOCK_FILE = os.path.join(CACHE_DIR, "store.lock")
+VERSIONS_FILE = os.path.join(CACHE_DIR, "versions.json")
+LOCK_TIMEOUT_SECONDS = 10
+LOCK_STALE_SECONDS = 30
+DIST_DIR = "dist"
+PRERENDER_CACHE_FILE = os.path.join(CACHE_DIR, "prerender.json")
+FEEDS_CACHE_FILE = os.path.join(CACHE_DIR, "feeds.json")
+# Absolute URLs in feeds and the sitemap
+SITE_URL = os.environ.get("CMS_SITE_URL", "https://harryluoo.github.io")
+FEED_LIMIT = 20
+# Precomputed "related entries" for detail views, served as a static file
+RELATED_FILE = os.path.join("public", "generated", "related.json")
+RELATED_LIMIT = 4
+# Word counts, reading time and heading outlines per entry
+CONTENT_STATS_FILE = os.path.join("public", "generated", "content-stats.json")
+CONTENT_STATS_CACHE_FILE = os.path.join(CACHE_DIR, "content-stats.json")
+# Bitmap facet index (type/tag/techStack/year/venue) for client-side filtering
+FACETS_FILE = os.path.join("public", "generated", "facets.json")
+# Per-route and per-entry assets with sizes, for hover/idle prefetching
+PREFETCH_FILE = os.path.join("public", "generated", "prefetch.json")
+# Full source fonts go in fonts/; the export writes subsets plus @font-face CSS
+FONTS_DIR = "fonts"
+FONTS_OUT_DIR = os.path.join("public", "generated", "fonts")
+FONTS_CSS_FILE = os.path.join("public", "generated", "fonts.css")
+FONTS_CACHE_FILE = os.path.join(CACHE_DIR, "fonts.json")
+# Deploy size budgets (optional overrides) and the sizes recorded at the last build
+SIZE_BUDGETS_FILE = "size-budgets.json"
+SIZE_MANIFEST_FILE = os.path.join(CACHE_DIR, "size-manifest.json")
+# Fingerprint of package.json + package-lock.json at the last successful install
+NPM_INSTALL_STATE_FILE = os.path.join(CACHE_DIR, "npm-install.json")
+# `node -v` and friends, keyed by the node binary, PATH and any version-manager pins
+NODE_PROBE_CACHE_FILE = os.path.join(CACHE_DIR, "node-env.json")
+NPM_MANIFESTS = ("package.json", "package-lock.json")
+# asdf, volta, nodenv and nvm shims pick a node from these, so the binary on PATH alone says nothing
+NODE_VERSION_FILES = (".nvmrc", ".node-version", ".tool-versions")
+NODE_VERSION_ENV = ("ASDF_NODEJS_VERSION", "NODENV_VERSION", "VOLTA_HOME", "NVM_BIN")
 PREVIEW_URL = "http://localhost:8080"
 PORT = 8080
+# Idle time before a burst of keystrokes is synced to the model
+ENTRY_DEBOUNCE_MS = 250
+TEXT_DEBOUNCE_MS = 400
+PREVIEW_DEBOUNCE_MS = 60
+PREVIEW_HTML_FILE = os.path.join(CACHE_DIR, "preview.html")
+
+# ==========================
+# CONTENT MODEL
+# ==========================
+# Key orders are interned too: entries with the same fields in the same order share one tuple
+_KEY_ORDERS = {}
+
+def _key_order(keys):
+    return _KEY_ORDERS.setdefault(keys, keys)
+
+class ContentModel(MutableMapping):
+    """Slotted record that reads and writes like the dict it was loaded from.
+
+    Known fields (mirroring types.ts) live in slots and anything else goes
+    to `_extra`. `_keys` keeps which keys are present and in what order, so
+    to_dict() gives back exactly the JSON it was built from.
+    """
+    __slots__ = ("_keys", "_extra")
+    TAG_FIELDS = ()
+    DEFAULTS = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(cls.__slots__)
+
+    def __init__(self, values=None):
+        self._keys = ()
+        self._extra = None
+        for key, value in (values or {}).items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in self._fields and key in self._keys:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.TAG_FIELDS and isinstance(value, list):
+            # In place, so callers holding the list still see the stored one
+            for i, tag in enumerate(value):
+                if type(tag) is str:
+                    value[i] = sys.intern(tag)
+        if key in self._fields:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+        if key not in self._keys:
+            self._keys = _key_order(self._keys + (key,))
+
+    def __delitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        if key in self._fields:
+            delattr(self, key)
+        else:
+            del self._extra[key]
+            self._extra = self._extra or None
+        self._keys = _key_order(tuple(k for k in self._keys if k != key))
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # Worker processes get a plain rebuild rather than slot-by-slot state
+        return (type(self), (self.to_dict(),))
+
+    def copy(self):
+        return type(self)(self.to_dict())
+
+    def to_dict(self):
+        return {key: self[key] for key in self._keys}
+
+    def fill_defaults(self):
+        for key, value in self.DEFAULTS.items():
+            if key not in self:
+                self[key] = json.loads(json.dumps(value))
+        return self
+
+    @classmethod
+    def blank(cls, **values):
+        """A new entry with this type's defaults."""
+        return cls(values).fill_defaults()
+
+class Paper(ContentModel):
+    __slots__ = ("id", "title", "authors", "venue", "year", "description", "pdfLink", "codeLink",
+                 "includeBibtex", "bibtex", "tags", "content")
+    TAG_FIELDS = ("tags", "authors")
+    DEFAULTS = {"tags": [], "authors": []}
+
+class Project(ContentModel):
+    __slots__ = ("id", "title", "description", "imageUrl", "imagePlaceholder", "techStack", "link", "github", "content")
+    TAG_FIELDS = ("techStack",)
+    DEFAULTS = {"techStack": []}
+
+class BlogPost(ContentModel):
+    __slots__ = ("id", "title", "date", "excerpt", "content", "tags", "pdfAttachment")
+    TAG_FIELDS = ("tags",)
+    DEFAULTS = {"tags": []}
+
+class Hero(ContentModel):
+    __slots__ = ("headline", "subheadline", "headlineFontEng", "headlineFontCn", "headlineSize",
+                 "subheadlineFontEng", "subheadlineFontCn", "subheadlineSize")
+    DEFAULTS = {
+        "headline": "",
+        "subheadline": "",
+        "headlineFontEng": "Cinzel",
+        "headlineFontCn": "\"Noto Serif SC\"",
+        "headlineSize": "text-5xl md:text-7xl lg:text-8xl",
+        "subheadlineFontEng": "\"Palatino Linotype\"",
+        "subheadlineFontCn": "\"Noto Serif SC\"",
+        "subheadlineSize": "text-xl md:text-2xl lg:text-3xl",
+    }
+
+class HomepageConfig(ContentModel):
+    __slots__ = ("tabTitle", "projectsDescription", "recentMode", "recentAutoLimit", "recentManualEntries", "featuredEntry")
+    DEFAULTS = {
+        "tabTitle": "Harry Luo | Researcher",
+        "projectsDescription": "Fun projects that I do",
+        "recentMode": "auto",
+        "recentAutoLimit": 3,
+        "recentManualEntries": [],
+        "featuredEntry": {"type": "project", "id": "", "imageOverride": ""},
+    }
+
+    def fill_defaults(self):
+        super().fill_defaults()
+        # Older files have a featuredEntry missing some of its keys
+        for key, value in self.DEFAULTS["featuredEntry"].items():
+            self["featuredEntry"].setdefault(key, value)
+        return self
+
+ITEM_MODELS = {"research_papers": Paper, "projects": Project, "blog_posts": BlogPost}
+SECTION_MODELS = {"hero": Hero, "homepage": HomepageConfig}
+
+def model_at(path, value):
+    """Wrap a plain dict landing at `path` in the document in the model class for that spot, if any."""
+    if not isinstance(value, dict) or not path:
+        return value
+    if len(path) == 1:
+        cls = SECTION_MODELS.get(path[0])
+    elif len(path) == 2 and isinstance(path[1], int):
+        cls = ITEM_MODELS.get(path[0])
+    else:
+        cls = None
+    return cls(value) if cls else value
+
+def load_content(data):
+    """Swap a freshly loaded document's entries and config sections for models (in place)."""
+    for key, value in data.items():
+        if key == "tags" and isinstance(value, list):
+            data[key] = [sys.intern(tag) if type(tag) is str else tag for tag in value]
+        elif isinstance(value, list) and key in ITEM_MODELS:
+            data[key] = [model_at((key, i), item) for i, item in enumerate(value)]
+        else:
+            data[key] = model_at((key,), value)
+    return data
+
+def model_json(value):
+    """json.dumps `default=` hook: models serialise as the dict they stand for."""
+    if isinstance(value, ContentModel):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def measure_model_memory(text, scale=1):
+    """Bytes held by a document as plain dicts vs. models, per tracemalloc.
+
+    `scale` repeats every collection (with fresh ids) to see how a large store would fare.
+    """
+    if scale > 1:
+        data = json.loads(text)
+        for key in ITEM_MODELS:
+            items = data.get(key, [])
+            data[key] = [dict(item, id=f"{item.get('id')}-{n}") for n in range(scale) for item in items]
+        text = json.dumps(data)
+
+    def retained(build):
+        tracemalloc.start()
+        try:
+            value = build()
+            return tracemalloc.get_traced_memory()[0], value
+        finally:
+            tracemalloc.stop()
+
+    dict_bytes, plain = retained(lambda: json.loads(text))
+    entries = sum(len(plain.get(key, [])) for key in ITEM_MODELS)
+    del plain
+    model_bytes, _ = retained(lambda: load_content(json.loads(text)))
+    return {"entries": entries, "dict_bytes": dict_bytes, "model_bytes": model_bytes}
+
+
+# ==========================
+# STORAGE BACKENDS
+# ==========================
+def write_text_atomic(path, text):
+    """Write via a temp file + rename so readers never see a half-written file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def render_ts(data):
+    return f"const data = {json.dumps(data, indent=2, default=model_json)};\nexport default data;"
+
+def write_exports(data):
+    """Generate data.json (CMS source) and data.ts (React import) from a document."""
+    write_text_atomic(DATA_FILE, json.dumps(data, indent=2, default=model_json))
+    write_text_atomic(TS_FILE, render_ts(data))
+
+
+class JSONStore:
+    """Default backend: data.json is the source of truth and is rewritten on save."""
+    name = "json"
+
+    def load(self):
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            return load_content(json.load(f))
+
+    def save(self, data, changes=None):
+        # A single JSON document can only be rewritten whole
+        versions = self.versions()
+        write_exports(data)
+        bump_versions(versions, data, changes.keys() if changes is not None else set(data) | set(versions))
+        self._write_versions(versions)
+
+    def _source_stamp(self):
+        stat = os.stat(DATA_FILE)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def versions(self):
+        """Per-key {version, hash}. Re-hashes data.json only if it changed outside the CMS."""
+        state = load_json_cache(VERSIONS_FILE)
+        versions = state.get("keys", {})
+        if state.get("source") != self._source_stamp():
+            data = self.load()
+            bump_versions(versions, data, set(data) | set(versions))
+            self._write_versions(versions)
+        return versions
+
+    def _write_versions(self, versions):
+        save_json_cache(VERSIONS_FILE, {"source": self._source_stamp(), "keys": versions})
+
+    def discard_cache(self, keys):
+        pass  # every save rewrites the whole file
+
+
+def check_item_id(json_key, item, position):
+    if item.get("id") in (None, ""):
+        raise ValueError(f"{json_key} item at position {position} ({item.get('title') or 'untitled'!r}) has no id")
+
+
+class SQLiteStore:
+    """Optional backend keeping content in SQLite (WAL mode).
+
+    Collections are stored one row per item, so an edit only touches the rows
+    that changed. data.json and data.ts are generated from the database on save.
+    """
+    name = "sqlite"
+
+    # json key -> (table, kind used in tag_links, extra indexed column)
+    COLLECTIONS = {
+        "research_papers": ("papers", "paper", "year"),
+        "projects": ("projects", "project", None),
+        "blog_posts": ("posts", "blog", "date"),
+    }
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS documents (key TEXT PRIMARY KEY, body TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS papers (
+            id TEXT PRIMARY KEY, position INTEGER NOT NULL, year INTEGER, title TEXT, body TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS projects (
+            id TEXT PRIMARY KEY, position INTEGER NOT NULL, title TEXT, body TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS posts (
+            id TEXT PRIMARY KEY, position INTEGER NOT NULL, date TEXT, title TEXT, body TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS tags (position INTEGER PRIMARY KEY, name TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS tag_links (
+            tag TEXT NOT NULL, kind TEXT NOT NULL, item_id TEXT NOT NULL,
+            PRIMARY KEY (tag, kind, item_id));
+        CREATE INDEX IF NOT EXISTS idx_papers_position ON papers(position);
+        CREATE INDEX IF NOT EXISTS idx_papers_year ON papers(year);
+        CREATE INDEX IF NOT EXISTS idx_projects_position ON projects(position);
+        CREATE INDEX IF NOT EXISTS idx_posts_position ON posts(position);
+        CREATE INDEX IF NOT EXISTS idx_posts_date ON posts(date);
+        CREATE INDEX IF NOT EXISTS idx_tag_links_item ON tag_links(kind, item_id);
+    """
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate_tags()
+        self.conn.executescript(self.SCHEMA)
+        # Last body written per row, so sync() can skip unchanged rows without a read
+        self._row_cache = {}
+
+    def _migrate_tags(self):
+        """Databases from before duplicate tags were kept keyed tags by name; re-key them by position."""
+        columns = {name: pk for _, name, _, _, _, pk in self.conn.execute("PRAGMA table_info(tags)")}
+        if columns.get("name"):
+            with self.conn:
+                self.conn.execute("ALTER TABLE tags RENAME TO tags_by_name")
+                self.conn.execute("CREATE TABLE tags (position INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+                self.conn.execute("INSERT INTO tags (position, name) SELECT ROW_NUMBER() OVER (ORDER BY position) - 1, name FROM tags_by_name")
+                self.conn.execute("DROP TABLE tags_by_name")
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM meta WHERE key = 'key_order'").fetchone() is None
+
+    def discard_cache(self, keys):
+        """Forget what we last wrote for these keys: another editor has saved over those rows since."""
+        tables = {self.COLLECTIONS[key][0] for key in keys if key in self.COLLECTIONS}
+        documents = {key for key in keys if key not in self.COLLECTIONS}
+        self._row_cache = {row: body for row, body in self._row_cache.items()
+                           if row[0] not in tables and not (row[0] == "documents" and row[1] in documents)}
+
+    def load(self):
+        if self.is_empty():
+            # First run: seed the database from the existing data.json
+            self.import_data(JSONStore().load())
+        key_order = json.loads(self.conn.execute("SELECT value FROM meta WHERE key = 'key_order'").fetchone()[0])
+        documents = dict(self.conn.execute("SELECT key, body FROM documents").fetchall())
+        data = {}
+        for key in key_order:
+            if key in self.COLLECTIONS:
+                table = self.COLLECTIONS[key][0]
+                rows = self.conn.execute(f"SELECT id, body FROM {table} ORDER BY position").fetchall()
+                data[key] = [json.loads(body) for _, body in rows]
+                for item_id, body in rows:
+                    self._row_cache[(table, item_id)] = body
+            elif key == "tags":
+                data[key] = [name for (name,) in self.conn.execute("SELECT name FROM tags ORDER BY position")]
+            elif key in documents:
+                data[key] = json.loads(documents[key])
+                self._row_cache[("documents", key)] = documents[key]
+        return load_content(data)
+
+    def import_data(self, data):
+        with self.conn:
+            for table in ("documents", "papers", "projects", "posts", "tags", "tag_links"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self._row_cache.clear()
+            self._sync(data)
+
+    def save(self, data, changes=None):
+        """Persist data; `changes` (from the journal) limits the sync to touched keys/items."""
+        with self.conn:
+            versions = self.versions()
+            self._sync(data, changes)
+            bump_versions(versions, data, changes.keys() if changes is not None else set(data) | set(versions))
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('versions', ?)", (json.dumps(versions),))
+        # The database now holds exactly `data`; no need to read it back
+        write_exports(data)
+
+    def versions(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'versions'").fetchone()
+        if row is not None:
+            return json.loads(row[0])
+        # Databases from before versioning: start every key at version 1
+        data = self.load()
+        return bump_versions({}, data, data.keys())
+
+    def put_item(self, json_key, item, position):
+        """Upsert a single collection item in its own transaction."""
+        with self.conn:
+            self._put_item(json_key, item, position)
+
+    def delete_item(self, json_key, item_id):
+        with self.conn:
+            self._delete_item(json_key, item_id)
+
+    def _sync(self, data, changes=None):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('key_order', ?)", (json.dumps(list(data.keys())),))
+        for key, value in data.items():
+            if changes is not None and key not in changes:
+                continue
+            if key in self.COLLECTIONS:
+                indices = changes.get(key) if changes is not None else None
+                if indices is None:
+                    self._sync_collection(key, value)
+                else:
+                    for index in sorted(i for i in indices if i < len(value)):
+                        self._put_item(key, value[index], index)
+            elif key == "tags":
+                self.conn.execute("DELETE FROM tags")
+                self.conn.executemany("INSERT INTO tags (position, name) VALUES (?, ?)",
+                                      list(enumerate(value)))
+            else:
+                body = json.dumps(value, default=model_json)
+                if self._row_cache.get(("documents", key)) != body:
+                    self.conn.execute("INSERT OR REPLACE INTO documents (key, body) VALUES (?, ?)", (key, body))
+                    self._row_cache[("documents", key)] = body
+
+    def _sync_collection(self, json_key, items):
+        table = self.COLLECTIONS[json_key][0]
+        for position, item in enumerate(items):
+            check_item_id(json_key, item, position)
+        ids = [item["id"] for item in items]
+        duplicates = {i for i, count in Counter(ids).items() if count > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate ids in {json_key}: {', '.join(sorted(duplicates))}")
+        stored = dict(self.conn.execute(f"SELECT id, position FROM {table}").fetchall())
+        for item_id in set(stored) - set(ids):
+            self._delete_item(json_key, item_id)
+        for position, item in enumerate(items):
+            body = json.dumps(item, default=model_json)
+            if self._row_cache.get((table, item["id"])) != body:
+                self._put_item(json_key, item, position)
+            elif stored.get(item["id"]) != position:
+                self.conn.execute(f"UPDATE {table} SET position = ? WHERE id = ?", (position, item["id"]))
+
+    def _put_item(self, json_key, item, position):
+        check_item_id(json_key, item, position)
+        table, kind, extra = self.COLLECTIONS[json_key]
+        body = json.dumps(item, default=model_json)
+        columns = ["id", "position", "title", "body"]
+        values = [item["id"], position, item.get("title", ""), body]
+        if extra:
+            columns.append(extra)
+            values.append(item.get(extra))
+        placeholders = ", ".join("?" for _ in columns)
+        self.conn.execute(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", values)
+        self.conn.execute("DELETE FROM tag_links WHERE kind = ? AND item_id = ?", (kind, item["id"]))
+        # tag_links only indexes which items carry a tag; the body keeps the list exactly as written
+        self.conn.executemany("INSERT INTO tag_links (tag, kind, item_id) VALUES (?, ?, ?)",
+                              [(tag, kind, item["id"]) for tag in dict.fromkeys(item.get("tags", []))])
+        self._row_cache[(table, item["id"])] = body
+
+    def _delete_item(self, json_key, item_id):
+        table, kind, _ = self.COLLECTIONS[json_key]
+        self.conn.execute(f"DELETE FROM {table} WHERE id = ?", (item_id,))
+        self.conn.execute("DELETE FROM tag_links WHERE kind = ? AND item_id = ?", (kind, item_id))
+        self._row_cache.pop((table, item_id), None)
+
+    def items_with_tag(self, tag):
+        return self.conn.execute("SELECT kind, item_id FROM tag_links WHERE tag = ? ORDER BY kind, item_id", (tag,)).fetchall()
+
+
+def open_store(backend):
+    if backend == "sqlite":
+        return SQLiteStore()
+    return JSONStore()
+
+
+# ==========================
+# CONCURRENT EDITING (LOCK + VERSIONS)
+# ==========================
+def bump_versions(versions, data, keys):
+    """Advance the counter of every key in `keys` whose content hash changed (removed keys hash to None)."""
+    for key in keys:
+        digest = content_hash(data[key]) if key in data else None
+        entry = versions.get(key, {"version": 0, "hash": None})
+        if entry["hash"] != digest:
+            versions[key] = {"version": entry["version"] + 1, "hash": digest}
+    return versions
+
+class StoreLock:
+    """Exclusive lock file held while a save checks versions and writes.
+
+    Uses O_EXCL so it works on every platform. A lock older than
+    LOCK_STALE_SECONDS, or left by a dead process on this machine, is broken.
+    """
+    def __init__(self, path=LOCK_FILE, timeout=LOCK_TIMEOUT_SECONDS):
+        self.path = path
+        self.timeout = timeout
+
+    def holder(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def is_stale(self, info):
+        if info is None:
+            # Half-written or vanished lock: only stale once it's old
+            try:
+                return time.time() - os.path.getmtime(self.path) > LOCK_STALE_SECONDS
+            except FileNotFoundError:
+                return True
+        if time.time() - info.get("time", 0) > LOCK_STALE_SECONDS:
+            return True
+        if info.get("host") == socket.gethostname() and platform.system() != "Windows":
+            try:
+                os.kill(info["pid"], 0)
+            except ProcessLookupError:
+                return True
+            except (PermissionError, KeyError, TypeError):
+                pass
+        return False
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                info = self.holder()
+                if self.is_stale(info):
+                    try:
+                        os.remove(self.path)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                if time.monotonic() > deadline:
+                    who = f"pid {info['pid']} on {info['host']}" if info else "another editor"
+                    raise TimeoutError(f"Content is locked by {who}; try again in a moment.")
+                time.sleep(0.05)
+                continue
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"pid": os.getpid(), "host": socket.gethostname(), "time": time.time()}, f)
+            return self
+
+    def __exit__(self, *exc):
+        self.break_lock()
+        return False
+
+    def break_lock(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+def merge_and_save(store, data, base_versions, changes, resolve):
+    """Save our changed keys, first pulling in keys someone else saved since `base_versions`.
+
+    Keys only they changed are copied into `data`. Keys both sides changed
+    (to different content) are conflicts: resolve(keys) returns "mine",
+    "theirs", or None to abort. It is called outside the lock, so a slow
+    answer never blocks other editors; if they save again meanwhile we ask
+    again. Returns (new base versions, adopted keys), or None when aborted.
+    Only the small version table is read unless something changed underneath us.
+    """
+    decisions = {}  # key -> (choice, their version it applies to)
+    while True:
+        with StoreLock():
+            current = store.versions()
+            theirs = {key for key in set(current) | set(base_versions) if current.get(key) != base_versions.get(key)}
+            adopted, conflicts = [], []
+            for key in sorted(theirs):
+                if key not in changes:
+                    adopted.append(key)
+                elif (content_hash(data[key]) if key in data else None) == current.get(key, {}).get("hash"):
+                    continue  # both sides made the same edit
+                elif key in decisions and decisions[key][1] == current.get(key):
+                    if decisions[key][0] == "theirs":
+                        adopted.append(key)
+                else:
+                    conflicts.append(key)
+            if not conflicts:
+                if adopted:
+                    fresh = store.load()
+                    for key in adopted:
+                        if key in fresh:
+                            data[key] = fresh[key]
+                        else:
+                            data.pop(key, None)
+                # Where we overrode their save, write our whole version of the key: a row-level
+                # write would keep rows only they touched and leave the store a mix of both
+                overridden = {key for key in theirs if key in changes and key not in adopted}
+                store.discard_cache(overridden)
+                store.save(data, changes={key: None if key in overridden else value
+                                          for key, value in changes.items() if key not in adopted})
+                return store.versions(), adopted
+        choice = resolve(conflicts)
+        if choice is None:
+            return None
+        for key in conflicts:
+            decisions[key] = (choice, current.get(key))
+
+
+# ==========================
+# CHANGE JOURNAL (UNDO / REDO / RECOVERY)
+# ==========================
+def find_path(node, target, path=()):
+    """Locate a dict/list inside the document by identity; returns its key path or None."""
+    if node is target:
+        return list(path)
+    if isinstance(node, (dict, ContentModel)):
+        children = node.items()
+    elif isinstance(node, list):
+        children = enumerate(node)
+    else:
+        return None
+    for key, value in children:
+        if isinstance(value, (dict, list, ContentModel)):
+            found = find_path(value, target, path + (key,))
+            if found is not None:
+                return found
+    return None
+
+def resolve_path(node, path):
+    try:
+        for key in path:
+            node = node[key]
+        return node
+    except (KeyError, IndexError, TypeError):
+        return None
+
+def make_set_op(path, old, new, created=False):
+    """Build the smallest op turning old into new: a text splice for strings, a plain set otherwise."""
+    if isinstance(old, str) and isinstance(new, str):
+        start = 0
+        limit = min(len(old), len(new))
+        while start < limit and old[start] == new[start]:
+            start += 1
+        end = 0
+        while end < limit - start and old[len(old) - 1 - end] == new[len(new) - 1 - end]:
+            end += 1
+        return {"op": "patch", "path": path, "at": start,
+                "del": old[start:len(old) - end], "ins": new[start:len(new) - end]}
+    op = {"op": "set", "path": path, "old": old, "new": new}
+    if created:
+        op["created"] = True
+    return op
+
+def apply_op(data, op, reverse=False):
+    kind = op["op"]
+    if kind in ("patch", "set"):
+        container = resolve_path(data, op["path"][:-1])
+        key = op["path"][-1]
+        if kind == "patch":
+            text = container.get(key, "") if isinstance(container, (dict, ContentModel)) else container[key]
+            removed, inserted = (op["ins"], op["del"]) if reverse else (op["del"], op["ins"])
+            container[key] = text[:op["at"]] + inserted + text[op["at"] + len(removed):]
+        elif reverse and op.get("created"):
+            container.pop(key, None)
+        else:
+            container[key] = model_at(op["path"], json.loads(json.dumps(op["old"] if reverse else op["new"])))
+        return
+    target = resolve_path(data, op["path"])
+    if kind == "move":
+        src, dst = (op["to"], op["from"]) if reverse else (op["from"], op["to"])
+        target.insert(dst, target.pop(src))
+    elif kind == "insert_many":
+        if reverse:
+            del target[op["index"]:op["index"] + len(op["values"])]
+        else:
+            target[op["index"]:op["index"]] = [model_at(op["path"] + [op["index"] + i], value) for i, value in enumerate(json.loads(json.dumps(op["values"])))]
+    elif (kind == "insert") != reverse:
+        target.insert(op["index"], model_at(op["path"] + [op["index"]], json.loads(json.dumps(op["value"]))))
+    else:
+        target.pop(op["index"])
+
+def same_json(a, b):
+    return json.dumps(a, sort_keys=True, default=model_json) == json.dumps(b, sort_keys=True, default=model_json)
+
+def op_applies(data, op):
+    """Whether `op` still fits `data`: its path exists and the values it replaces are the ones it recorded.
+
+    A journal left by a session on a different data.json (restored backup,
+    other checkout) would otherwise raise or quietly edit the wrong entry.
+    """
+    kind = op.get("op")
+    path = op.get("path")
+    if not isinstance(path, list) or not path:
+        return False
+    if kind in ("patch", "set"):
+        container, key = resolve_path(data, path[:-1]), path[-1]
+        if isinstance(container, list):
+            if not (isinstance(key, int) and 0 <= key < len(container)):
+                return False
+            exists = True
+        elif isinstance(container, (dict, ContentModel)):
+            exists = key in container
+        else:
+            return False
+        if kind == "patch":
+            text = container[key] if exists else ""
+            return isinstance(text, str) and text[op["at"]:op["at"] + len(op["del"])] == op["del"]
+        if op.get("created"):
+            return not exists
+        return exists and same_json(container[key], op["old"])
+    target = resolve_path(data, path)
+    if not isinstance(target, list):
+        return False
+    if kind == "move":
+        return 0 <= op["from"] < len(target) and 0 <= op["to"] < len(target)
+    if kind in ("insert", "insert_many"):
+        return 0 <= op["index"] <= len(target)
+    if kind == "remove":
+        return 0 <= op["index"] < len(target) and same_json(target[op["index"]], op["value"])
+    return False
+
+def op_dirty_path(op):
+    # Structural ops (insert/remove/move) dirty the whole list they touch
+    return op["path"] if op["op"] in ("patch", "set") else op["path"] + [0, "id"]
+
+
+class ChangeJournal:
+    """Append-only log of document edits.
+
+    Each field change is stored as a compact op (text splice or value set) in
+    .cms-cache/journal.jsonl. Consecutive edits to the same field within a
+    short burst are coalesced into one op. The log is replayed after a crash
+    and truncated on save; undo/redo stacks stay in memory for the session.
+    """
+    BURST_SECONDS = 1.0
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.undo_stack = []
+        self.redo_stack = []
+        # top-level key -> set of changed item indices, or None when the whole key changed
+        self.dirty = {}
+        # Bumped on every logged edit and save, so derived data can be cached against it
+        self.revision = 0
+        self._burst = None
+        self._fh = None
+
+    def _append(self, entry):
+        self.revision += 1
+        if self._fh is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fh = open(self.path, 'a', encoding='utf-8')
+        self._fh.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._fh.flush()
+
+    def mark_dirty(self, path):
+        key = path[0]
+        if len(path) >= 3 and isinstance(path[1], int) and path[2] != "id" and self.dirty.get(key, set()) is not None:
+            self.dirty.setdefault(key, set()).add(path[1])
+        else:
+            self.dirty[key] = None
+
+    def changes(self):
+        return dict(self.dirty)
+
+    def _push(self, op, merge=False):
+        if merge:
+            self.undo_stack[-1] = op
+        else:
+            self.undo_stack.append(op)
+        self.redo_stack.clear()
+        self._append(dict(op, merge=True) if merge else op)
+
+    def record_set(self, path, old, new, created=False):
+        if old == new:
+            return
+        now = time.time()
+        burst = self._burst
+        if (burst and self.undo_stack and self.undo_stack[-1] is burst["op"]
+                and burst["op"]["path"] == path and now - burst["time"] < self.BURST_SECONDS):
+            op = make_set_op(path, burst["base"], new, burst["created"])
+            self._push(op, merge=True)
+            base, created = burst["base"], burst["created"]
+        else:
+            op = make_set_op(path, json.loads(json.dumps(old, default=model_json)), json.loads(json.dumps(new, default=model_json)), created)
+            self._push(op)
+            base = op.get("old", old)
+        self._burst = {"op": op, "base": base, "created": created, "time": now}
+        self.mark_dirty(path)
+
+    def record_insert(self, path, index, value):
+        self._burst = None
+        self._push({"op": "insert", "path": path, "index": index, "value": json.loads(json.dumps(value, default=model_json))})
+        self.mark_dirty(path + [index, "id"])
+
+    def record_insert_many(self, path, index, values):
+        self._burst = None
+        self._push({"op": "insert_many", "path": path, "index": index, "values": json.loads(json.dumps(values, default=model_json))})
+        self.mark_dirty(path + [index, "id"])
+
+    def record_remove(self, path, index, value):
+        self._burst = None
+        self._push({"op": "remove", "path": path, "index": index, "value": json.loads(json.dumps(value, default=model_json))})
+        self.mark_dirty(path + [index, "id"])
+
+    def record_move(self, path, src, dst):
+        self._burst = None
+        self._push({"op": "move", "path": path, "from": src, "to": dst})
+        self.mark_dirty(path + [src, "id"])
+
+    def undo(self, data):
+        if not self.undo_stack:
+            return None
+        op = self.undo_stack.pop()
+        apply_op(data, op, reverse=True)
+        self.redo_stack.append(op)
+        self._burst = None
+        self._append({"op": "undo"})
+        self.mark_dirty(op_dirty_path(op))
+        return op
+
+    def redo(self, data):
+        if not self.redo_stack:
+            return None
+        op = self.redo_stack.pop()
+        apply_op(data, op)
+        self.undo_stack.append(op)
+        self._burst = None
+        self._append({"op": "redo"})
+        self.mark_dirty(op_dirty_path(op))
+        return op
+
+    def pending_ops(self):
+        """Ops recorded since the last save, with merges/undos/redos resolved."""
+        applied, undone = [], []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn final write from a crash
+                    if entry["op"] == "undo":
+                        if applied:
+                            undone.append(applied.pop())
+                    elif entry["op"] == "redo":
+                        if undone:
+                            applied.append(undone.pop())
+                    elif entry.pop("merge", False) and applied:
+                        applied[-1] = entry
+                    else:
+                        applied.append(entry)
+                        undone.clear()
+        except FileNotFoundError:
+            pass
+        return applied
+
+    def recover(self, data):
+        """Replay the log onto `data`; returns (applied, skipped) op counts.
+
+        Ops that no longer fit the document (see op_applies) are skipped
+        rather than applied to whatever now sits at their path.
+        """
+        applied, skipped = [], 0
+        for op in self.pending_ops():
+            if not op_applies(data, op):
+                skipped += 1
+                continue
+            apply_op(data, op)
+            self.mark_dirty(op_dirty_path(op))
+            applied.append(op)
+        self.undo_stack = applied
+        return len(applied), skipped
+
+    def checkpoint(self):
+        """Position in the undo stack; edits after it can be rolled back or dropped together."""
+        self._burst = None
+        return len(self.undo_stack)
+
+    def rollback(self, data, checkpoint):
+        while len(self.undo_stack) > checkpoint:
+            self.undo(data)
+        self.redo_stack.clear()
+
+    def drop(self, ops):
+        """Take already-saved ops off the undo stack so they can't be undone on their own."""
+        dropped = {id(op) for op in ops}
+        self.undo_stack = [op for op in self.undo_stack if id(op) not in dropped]
+        self._burst = None
+
+    def forget(self, keys):
+        """Drop undo/redo history for top-level keys replaced from outside (e.g. merged from another editor)."""
+        keys = set(keys)
+        self.undo_stack = [op for op in self.undo_stack if op["path"][0] not in keys]
+        self.redo_stack = [op for op in self.redo_stack if op["path"][0] not in keys]
+        self._burst = None
+
+    def mark_saved(self):
+        """Saved state is the new replay base: truncate the log and clear dirty state."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if os.path.exists(self.path):
+            open(self.path, 'w').close()
+        self.dirty.clear()
+        self.revision += 1
+        self._burst = None
+
+    discard = mark_saved
+
+# ==========================
+# DEBOUNCED CHANGE PROPAGATION
+# ==========================
+class Debouncer:
+    """Collapse a burst of calls into one call after `delay_ms` of inactivity.
+
+    While a call is pending the debouncer registers itself in `pending`, so
+    the owner can flush everything before saving, undoing or tearing down a form.
+    """
+
+    def __init__(self, root, delay_ms, func, pending):
+        self.root = root
+        self.delay_ms = delay_ms
+        self.func = func
+        self.pending = pending
+        self._job = None
+
+    def __call__(self, *args):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+        self._job = self.root.after(self.delay_ms, self.flush)
+        self.pending.add(self)
+
+    def flush(self, *args):
+        if self._job is None:
+            return
+        self.root.after_cancel(self._job)
+        self._job = None
+        self.pending.discard(self)
+        try:
+            self.func()
+        except tk.TclError:
+            pass  # widget went away before the burst settled
+
+
+# ==========================
+# MARKDOWN RENDERING
+# ==========================
+FENCE_RE = re.compile(r'^\s*(```|~~~)')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+LIST_ITEM_RE = re.compile(r'^\s*([-*+]|\d+[.)])\s+')
+HR_RE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+INLINE_CODE_RE = re.compile(r'`([^`\n]+)`')
+INLINE_MATH_RE = re.compile(r'(?<![\\$])\$(?!\s)([^$\n]+?)(?<!\s)\$(?!\$)')
+IMAGE_RE = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)(?:\s+"[^"]*")?\)')
+LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)\s]+)(?:\s+"[^"]*")?\)')
+BOLD_RE = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')
+ITALIC_RE = re.compile(r'(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])')
+
+def split_markdown_blocks(text):
+    """Split markdown into (kind, source) top-level blocks.
+
+    Kinds: heading, code, math, list, quote, hr, paragraph. Fenced code and
+    $$ math blocks are kept whole even when they contain blank lines.
+    """
+    blocks = []
+    lines = text.split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            i += 1
+            continue
+        fence = FENCE_RE.match(line)
+        if fence:
+            j = i + 1
+            while j < len(lines) and not lines[j].strip().startswith(fence.group(1)):
+                j += 1
+            blocks.append(("code", "\n".join(lines[i:j + 1])))
+            i = j + 1
+            continue
+        if stripped.startswith("$$"):
+            j = i
+            if not (len(stripped) > 2 and stripped.endswith("$$") and len(stripped) >= 4):
+                j = i + 1
+                while j < len(lines) and "$$" not in lines[j]:
+                    j += 1
+            blocks.append(("math", "\n".join(lines[i:j + 1])))
+            i = j + 1
+            continue
+        if HEADING_RE.match(line):
+            blocks.append(("heading", line))
+            i += 1
+            continue
+        if HR_RE.match(line):
+            blocks.append(("hr", line))
+            i += 1
+            continue
+        if LIST_ITEM_RE.match(line):
+            kind, continues = "list", lambda l: LIST_ITEM_RE.match(l) or l.startswith((" ", "\t"))
+        elif stripped.startswith(">"):
+            kind, continues = "quote", lambda l: l.strip().startswith(">")
+        else:
+            kind, continues = "paragraph", lambda l: not (FENCE_RE.match(l) or HEADING_RE.match(l) or l.strip().startswith("$$"))
+        j = i + 1
+        while j < len(lines) and lines[j].strip() and continues(lines[j]):
+            j += 1
+        blocks.append((kind, "\n".join(lines[i:j])))
+        i = j
+    return blocks
+
+def render_inline(text):
+    """Render inline markdown (code, $math$, images, links, emphasis) to HTML."""
+    protected = []
+
+    def protect(fragment):
+        protected.append(fragment)
+        return f"\x00{len(protected) - 1}\x00"
+
+    text = INLINE_CODE_RE.sub(lambda m: protect(f"<code>{html.escape(m.group(1))}</code>"), text)
+    text = INLINE_MATH_RE.sub(lambda m: protect(f'<span class="math math-inline">\\({html.escape(m.group(1))}\\)</span>'), text)
+    text = html.escape(text, quote=False)
+    text = IMAGE_RE.sub(lambda m: protect(f'<img src="{html.escape(m.group(2))}" alt="{html.escape(m.group(1))}">'), text)
+    text = LINK_RE.sub(lambda m: f'<a href="{html.escape(m.group(2))}">{m.group(1)}</a>', text)
+    text = BOLD_RE.sub(r"<strong>\2</strong>", text)
+    text = ITALIC_RE.sub(r"<em>\2</em>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: protected[int(m.group(1))], text)
+
+def render_block(kind, source):
+    if kind == "heading":
+        match = HEADING_RE.match(source)
+        level = len(match.group(1))
+        return f"<h{level}>{render_inline(match.group(2))}</h{level}>"
+    if kind == "code":
+        lines = source.split("\n")
+        language = FENCE_RE.sub("", lines[0]).strip()
+        body = lines[1:-1] if len(lines) > 1 and FENCE_RE.match(lines[-1]) else lines[1:]
+        css = f' class="language-{html.escape(language)}"' if language else ""
+        return f"<pre><code{css}>{html.escape(chr(10).join(body))}</code></pre>"
+    if kind == "math":
+        return f'<div class="math math-display">\\[{html.escape(source.strip().strip("$").strip())}\\]</div>'
+    if kind == "hr":
+        return "<hr>"
+    if kind == "quote":
+        inner = "\n".join(re.sub(r"^\s*>\s?", "", l) for l in source.split("\n"))
+        return f"<blockquote>{''.join(render_block(k, s) for k, s in split_markdown_blocks(inner))}</blockquote>"
+    if kind == "list":
+        ordered = LIST_ITEM_RE.match(source).group(1)[0].isdigit()
+        items = []
+        for line in source.split("\n"):
+            if LIST_ITEM_RE.match(line):
+                items.append(LIST_ITEM_RE.sub("", line, count=1))
+            elif items:
+                items[-1] += " " + line.strip()
+        tag = "ol" if ordered else "ul"
+        return f"<{tag}>{''.join(f'<li>{render_inline(item)}</li>' for item in items)}</{tag}>"
+    return f"<p>{render_inline(source)}</p>"
+
+def render_markdown(text):
+    return "\n".join(render_block(kind, source) for kind, source in split_markdown_blocks(text))
+
+def block_display_text(kind, source):
+    """Plain-text rendition of a block for the Tk preview pane."""
+    if kind == "heading":
+        source = HEADING_RE.match(source).group(2)
+    elif kind == "quote":
+        source = "\n".join(re.sub(r"^\s*>\s?", "", l) for l in source.split("\n"))
+    elif kind == "list":
+        source = "\n".join(LIST_ITEM_RE.sub("  • ", l, count=1) for l in source.split("\n"))
+    elif kind == "hr":
+        return "─" * 40
+    if kind in ("code", "math"):
+        return source
+    source = IMAGE_RE.sub(r"[image: \1]", source)
+    source = LINK_RE.sub(r"\1", source)
+    source = BOLD_RE.sub(r"\2", source)
+    return ITALIC_RE.sub(r"\2", source)
+
+
+class IncrementalMarkdownRenderer:
+    """Markdown -> HTML renderer that only re-renders blocks whose source changed."""
+
+    def __init__(self):
+        self._cache = {}
+        # Shared by the preview thread and "Open HTML Preview" on the Tk thread
+        self._lock = threading.Lock()
+
+    def render(self, text):
+        """Returns (blocks, html_fragments, rerendered_count)."""
+        blocks = split_markdown_blocks(text)
+        with self._lock:
+            cache = {}
+            fragments = []
+            rerendered = 0
+            for block in blocks:
+                fragment = self._cache.get(block)
+                if fragment is None:
+                    fragment = render_block(*block)
+                    rerendered += 1
+                cache[block] = fragment
+                fragments.append(fragment)
+            # Keep only blocks still in the document so the cache tracks the current post
+            self._cache = cache
+        return blocks, fragments, rerendered
+
+
+class PreviewWorker(threading.Thread):
+    """Background renderer: only the most recently submitted text is rendered."""
+
+    def __init__(self, on_result):
+        super().__init__(daemon=True)
+        self.renderer = IncrementalMarkdownRenderer()
+        self.on_result = on_result
+        # (text, fragments) of the last render, reused by the HTML preview when the text still matches
+        self.last_result = (None, None)
+        self._latest = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def submit(self, text):
+        with self._lock:
+            self._latest = text
+        self._wakeup.set()
+
+    def run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                text, self._latest = self._latest, None
+            if text is None:
+                continue
+            started = time.perf_counter()
+            blocks, fragments, rerendered = self.renderer.render(text)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.last_result = (text, fragments)
+            self.on_result(blocks, fragments, rerendered, elapsed_ms)
+
+PREVIEW_HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+  <head>
+    <meta charset="utf-8" />
+    <title>{title}</title>
+    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/katex.min.css">
+    <script defer src="https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/katex.min.js"></script>
+    <script defer src="https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/contrib/auto-render.min.js"
+      onload="renderMathInElement(document.body)"></script>
+    <style>
+      body {{ max-width: 48rem; margin: 3rem auto; padding: 0 1rem; background: #f2f0e9; color: #0d0d0d;
+             font-family: "Palatino Linotype", "Book Antiqua", Palatino, serif; line-height: 1.6; }}
+      h1, h2, h3 {{ font-family: Cinzel, serif; }}
+      pre {{ background: #f5f5f4; padding: 1rem; border-left: 4px solid #be5d36; overflow-x: auto; }}
+      blockquote {{ border-left: 4px solid #0d0d0d; margin-left: 0; padding-left: 1rem; font-style: italic; }}
+      a {{ color: #be5d36; font-weight: bold; }}
+    </style>
+  </head>
+  <body>
+    <h1>{title}</h1>
+{body}
+  </body>
+</html>
+"""
+
+
+# ==========================
+# BIBTEX IMPORT
+# ==========================
+LATEX_ACCENTS = {"'": "\u0301", "`": "\u0300", "^": "\u0302", '"': "\u0308", "~": "\u0303", "=": "\u0304",
+                 ".": "\u0307", "c": "\u0327", "u": "\u0306", "v": "\u030c", "H": "\u030b"}
+LATEX_ACCENT_RE = re.compile(r"""\\([`'^"~=.]|[cuvH](?=[\s{]))\s*\{?\\?([A-Za-z])\}?""")
+BIBTEX_SKIP_TYPES = {"comment", "preamble"}
+BIBTEX_START_RE = re.compile(r"@\s*(\w+)\s*([{(])")
+BIBTEX_FIELD_RE = re.compile(r"\s*([\w:.-]+)\s*=\s*")
+BIBTEX_WORD_RE = re.compile(r"[^\s,#})]+")
+BIBTEX_CONCAT_RE = re.compile(r"\s*#\s*")
+BIBTEX_SEPARATOR_RE = re.compile(r"\s*,?")
+
+def latex_to_text(value):
+    value = LATEX_ACCENT_RE.sub(lambda m: m.group(2) + LATEX_ACCENTS[m.group(1)], value)
+    value = value.replace("\\&", "&").replace("---", "\u2014").replace("--", "\u2013").replace("~", " ")
+    value = re.sub(r"\\[a-zA-Z]+\s*", "", value)
+    value = value.replace("{", "").replace("}", "")
+    return unicodedata.normalize("NFC", " ".join(value.split()))
+
+def iter_bibtex_entries(lines):
+    """Yield (entry_type, raw_text) for each @entry, reading the input line by line.
+
+    Only the entry currently being parsed is held in memory, so very large
+    .bib files stream through without being loaded whole.
+    """
+    parts, depth, delimiters = None, 0, None
+    for line in lines:
+        pos = 0
+        while pos < len(line):
+            if parts is None:
+                match = BIBTEX_START_RE.search(line, pos)
+                if not match:
+                    break
+                parts, depth, pos = [], 1, match.end()
+                delimiters = "{}" if match.group(2) == "{" else "()"
+                entry_start, entry_type = match.start(), match.group(1).lower()
+            else:
+                entry_start = 0
+            closed = False
+            for char_match in re.finditer(re.escape(delimiters[0]) + "|" + re.escape(delimiters[1]), line[pos:]):
+                depth += 1 if char_match.group() == delimiters[0] else -1
+                if depth == 0:
+                    end = pos + char_match.end()
+                    parts.append(line[entry_start:end])
+                    yield entry_type, "".join(parts).strip()
+                    parts, pos, closed = None, end, True
+                    break
+            if not closed:
+                parts.append(line[entry_start:])
+                break
+
+def parse_bibtex_fields(text, macros=None):
+    """Parse `name = value, ...` where values are {...}, "...", numbers or @string macros joined by #."""
+    macros = macros or {}
+    fields = {}
+    pos = 0
+    while pos < len(text):
+        match = BIBTEX_FIELD_RE.match(text, pos)
+        if not match:
+            break
+        name = match.group(1).lower()
+        pos = match.end()
+        parts = []
+        while pos < len(text):
+            char = text[pos]
+            if char in '{"':
+                depth, end = 0, pos + 1
+                closing = "}" if char == "{" else '"'
+                while end < len(text) and not (text[end] == closing and depth == 0):
+                    depth += {"{": 1, "}": -1}.get(text[end], 0)
+                    end += 1
+                parts.append(text[pos + 1:end])
+                pos = end + 1
+            else:
+                word = BIBTEX_WORD_RE.match(text, pos)
+                if not word:
+                    break
+                parts.append(macros.get(word.group(0).lower(), word.group(0)))
+                pos = word.end()
+            concat = BIBTEX_CONCAT_RE.match(text, pos)
+            if not concat:
+                break
+            pos = concat.end()
+        fields[name] = "".join(parts)
+        pos = BIBTEX_SEPARATOR_RE.match(text, pos).end()
+    return fields
+
+def parse_bibtex_entry(raw, macros=None):
+    """Parse one raw @type{key, field = value, ...} entry into (key, fields)."""
+    match = BIBTEX_START_RE.match(raw)
+    if not match:
+        raise ValueError("Not a BibTeX entry")
+    key, _, rest = raw[match.end():-1].partition(",")
+    return key.strip(), parse_bibtex_fields(rest, macros)
+
+def normalize_doi(value):
+    value = (value or "").strip().lower()
+    value = re.sub(r"^(https?://(dx\.)?doi\.org/|doi:\s*)", "", value)
+    return value
+
+def title_key(title):
+    """Letters and digits only, accents folded: "Café" and "Cafe" are the same paper.
+
+    Non-Latin letters stay, so CJK titles don't all collapse to an empty key.
+    """
+    folded = unicodedata.normalize("NFKD", latex_to_text(title or "").casefold())
+    return "".join(c for c in folded if c.isalnum() and not unicodedata.combining(c))
+
+def format_bibtex_authors(value):
+    authors = []
+    for name in re.split(r"\s+and\s+", latex_to_text(value)):
+        name = name.strip()
+        if not name or name.lower() == "others":
+            continue
+        if "," in name:
+            last, first = [part.strip() for part in name.split(",", 1)]
+            name = f"{first} {last}".strip()
+        authors.append(name)
+    return authors
+
+def bibtex_to_paper(entry_type, raw, fields, item_id, known_tags=()):
+    venue = fields.get("journal") or fields.get("booktitle") or fields.get("howpublished") \
+        or fields.get("school") or fields.get("institution") or fields.get("publisher") or ""
+    if not venue and fields.get("eprint"):
+        venue = f"arXiv:{fields['eprint']}"
+    year_match = re.search(r"\d{4}", fields.get("year", ""))
+    keywords = {k.strip().lower() for k in re.split(r"[,;]", fields.get("keywords", "")) if k.strip()}
+    return {
+        "id": item_id,
+        "title": latex_to_text(fields.get("title", "")) or "Untitled",
+        "authors": format_bibtex_authors(fields.get("author", "")),
+        "venue": latex_to_text(venue),
+        "year": int(year_match.group(0)) if year_match else 0,
+        "description": latex_to_text(fields.get("abstract", "")),
+        "tags": [tag for tag in known_tags if tag.lower() in keywords],
+        "pdfLink": fields.get("url", ""),
+        "codeLink": "",
+        "includeBibtex": True,
+        "bibtex": raw,
+        "content": "",
+    }
+
+def new_item_id(taken):
+    """Random short id that isn't already used.
+
+    The CMS's usual 4 digits, widened as the store grows so at most ~1 in 10
+    draws hits a taken id even for imports of thousands of entries.
+    """
+    digits = max(4, len(str(len(taken) * 10)))
+    for _ in range(50):
+        candidate = str(random.randint(10 ** (digits - 1), 10 ** digits - 1))
+        if candidate not in taken:
+            taken.add(candidate)
+            return candidate
+    candidate = uuid.uuid4().hex[:8]
+    taken.add(candidate)
+    return candidate
+
+def paper_dedupe_keys(paper):
+    keys = set()
+    bibtex = paper.get("bibtex") or ""
+    if bibtex.strip().startswith("@"):
+        try:
+            _, fields = parse_bibtex_entry(bibtex.strip())
+        except ValueError:
+            fields = {}  # hand-edited bibtex that no longer parses: fall back to the title
+        if fields.get("doi"):
+            keys.add(("doi", normalize_doi(fields["doi"])))
+    key = title_key(paper.get("title"))
+    if key:
+        keys.add(("title", key))
+    return keys
+
+def import_bibtex(data, lines):
+    """Parse BibTeX lines into new research_papers entries, skipping duplicates.
+
+    Existing papers are indexed by DOI and normalized title; the returned
+    list holds only new papers (in file order) and is not yet added to data.
+    """
+    papers = data.get("research_papers", [])
+    seen = set()
+    for paper in papers:
+        seen |= paper_dedupe_keys(paper)
+    taken = {str(item.get("id")) for key in ("research_papers", "projects", "blog_posts") for item in data.get(key, [])}
+    known_tags = data.get("tags", [])
+    macros = {}
+    new_papers, skipped = [], 0
+    for entry_type, raw in iter_bibtex_entries(lines):
+        if entry_type in BIBTEX_SKIP_TYPES:
+            continue
+        if entry_type == "string":
+            macros.update(parse_bibtex_fields(raw[BIBTEX_START_RE.match(raw).end():-1], macros))
+            continue
+        try:
+            _, fields = parse_bibtex_entry(raw, macros)
+        except ValueError:
+            skipped += 1
+            continue
+        key = title_key(fields.get("title", ""))
+        keys = {("title", key)} if key else set()
+        if fields.get("doi"):
+            keys.add(("doi", normalize_doi(fields["doi"])))
+        if not keys or keys & seen:
+            skipped += 1
+            continue
+        seen |= keys
+        new_papers.append(bibtex_to_paper(entry_type, raw, fields, new_item_id(taken), known_tags))
+    return new_papers, skipped
+
+
+# ==========================
+# BULK POST INGESTION
+# ==========================
+FRONT_MATTER_RE = re.compile(r"\A---\s*\n(.*?)\n---\s*(?:\n|\Z)", re.DOTALL)
+
+def parse_front_matter_value(value):
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_front_matter_value(v) for v in value[1:-1].split(",") if v.strip()]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+def parse_front_matter(text):
+    """Split YAML-style front matter (key: value, [a, b] and '- item' lists) from a markdown body."""
+    match = FRONT_MATTER_RE.match(text)
+    if not match:
+        return {}, text
+    meta, list_key = {}, None
+    for line in match.group(1).split("\n"):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        item = re.match(r"^\s+-\s*(.*)$|^-\s+(.*)$", line)
+        if item and list_key:
+            meta[list_key].append(parse_front_matter_value(item.group(1) or item.group(2)))
+            continue
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+        key = key.strip()
+        if value.strip():
+            meta[key], list_key = parse_front_matter_value(value), None
+        else:
+            meta[key], list_key = [], key
+    return meta, text[match.end():]
+
+def post_filename(title, posts_dir=POSTS_DIR, taken=None):
+    """Slug filename for a post title that doesn't clash with posts/ or names in `taken`."""
+    fname = "".join(c for c in title.replace(" ", "-").replace("/", "-") if c.isalnum() or c in "-")
+    fname = fname.lower().strip("-")
+    if not fname:
+        fname = "post"
+    taken = taken if taken is not None else set()
+    full_fname = f"{fname}.md"
+    if os.path.exists(os.path.join(posts_dir, full_fname)) or full_fname in taken:
+        timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        full_fname = f"{fname}-{timestamp}.md"
+        counter = 2
+        while os.path.exists(os.path.join(posts_dir, full_fname)) or full_fname in taken:
+            full_fname = f"{fname}-{timestamp}-{counter}.md"
+            counter += 1
+    taken.add(full_fname)
+    return full_fname
+
+def derive_excerpt(body, limit=200):
+    """First paragraph of a post as plain text, cut at a word boundary."""
+    for kind, source in split_markdown_blocks(body):
+        if kind != "paragraph":
+            continue
+        text = " ".join(block_display_text(kind, source).replace("`", "").split())
+        if len(text) <= limit:
+            return text
+        return text[:limit].rsplit(" ", 1)[0].rstrip(".,;:") + "…"
+    return ""
+
+def plan_post_ingest(data, directory, posts_dir=POSTS_DIR):
+    """Read a directory of markdown files into (new_posts, bodies, skipped) without writing anything."""
+    existing_titles = {post.get("title", "").strip().lower() for post in data.get("blog_posts", [])}
+    taken_ids = {str(post.get("id")) for post in data.get("blog_posts", [])}
+    taken_names = set()
+    posts, bodies, skipped = [], {}, []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not name.lower().endswith((".md", ".markdown")) or not os.path.isfile(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            meta, body = parse_front_matter(f.read())
+        title = str(meta.get("title") or os.path.splitext(name)[0].replace("-", " ").replace("_", " ").title()).strip()
+        if title.lower() in existing_titles:
+            skipped.append(name)
+            continue
+        existing_titles.add(title.lower())
+        tags = meta.get("tags", [])
+        if isinstance(tags, str):
+            tags = [t.strip() for t in tags.split(",") if t.strip()]
+        date = meta.get("date") or datetime.date.fromtimestamp(os.path.getmtime(path)).isoformat()
+        filename = post_filename(title, posts_dir, taken_names)
+        bodies[filename] = body.lstrip("\n")
+        # A front-matter id is kept only while it's unique among posts (and this batch)
+        post_id = str(meta.get("id") or "").strip()
+        if post_id and post_id not in taken_ids:
+            taken_ids.add(post_id)
+        else:
+            post_id = new_item_id(taken_ids)
+        posts.append({
+            "id": post_id,
+            "title": title,
+            "date": str(date),
+            "excerpt": str(meta.get("excerpt") or derive_excerpt(body)),
+            "content": f"{posts_dir}/{filename}",
+            "pdfAttachment": str(meta.get("pdfAttachment") or meta.get("pdf") or ""),
+            "tags": [str(t) for t in tags],
+        })
+    return posts, bodies, skipped
+
+def staged_post_path(posts_dir, name):
+    return os.path.join(posts_dir, name + ".part")
+
+def stage_post_bodies(bodies, posts_dir=POSTS_DIR, workers=8):
+    """Write post bodies in parallel under .part names; on any failure remove what was written and re-raise.
+
+    Nothing shows up under its real name until commit_post_bodies, which runs
+    once the store has saved the entries pointing at them.
+    """
+    os.makedirs(posts_dir, exist_ok=True)
+    written = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(write_text_atomic, staged_post_path(posts_dir, name), body): name for name, body in bodies.items()}
+        errors = []
+        for future in concurrent.futures.as_completed(futures):
+            if future.exception():
+                errors.append(future.exception())
+            else:
+                written.append(futures[future])
+    if errors:
+        for name in written:
+            os.remove(staged_post_path(posts_dir, name))
+        raise errors[0]
+
+def commit_post_bodies(bodies, posts_dir=POSTS_DIR):
+    for name in bodies:
+        os.replace(staged_post_path(posts_dir, name), os.path.join(posts_dir, name))
+
+def discard_post_bodies(bodies, posts_dir=POSTS_DIR):
+    for name in bodies:
+        try:
+            os.remove(staged_post_path(posts_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+# ==========================
+# UPLOAD REFERENCES
+# ==========================
+# A /uploads/ link inside markdown or free text: stops at whitespace, quotes, brackets, ?/# suffixes
+MARKDOWN_UPLOAD_RE = re.compile(r"""/uploads/(<[^>]+>|[^\s)"'<>\]?#]+)""")
+
+def iter_strings(node, path=()):
+    """Yield (path, container, key, value) for every string in the document."""
+    children = node.items() if isinstance(node, (dict, ContentModel)) else enumerate(node) if isinstance(node, list) else ()
+    for key, value in children:
+        if isinstance(value, str):
+            yield path + (key,), node, key, value
+        elif isinstance(value, (dict, list, ContentModel)):
+            yield from iter_strings(value, path + (key,))
+
+def describe_data_path(data, path):
+    """Human-readable referrer like 'research_papers/p1/pdfLink' (ids instead of list indices)."""
+    parts, node = [], data
+    for key in path:
+        node = node[key]
+        if isinstance(key, int) and isinstance(node, (dict, ContentModel)) and node.get("id"):
+            parts.append(str(node["id"]))
+        else:
+            parts.append(str(key))
+    return "/".join(parts)
+
+def upload_names_in(text, whole_value=False):
+    """Upload filenames referenced by a string (field values may be a bare path with spaces)."""
+    stripped = text.strip()
+    if whole_value and re.match(r"^/?uploads/", stripped) and "\n" not in stripped:
+        return {urllib.parse.unquote(re.split(r"[?#]", stripped.split("uploads/", 1)[1])[0])}
+    return {urllib.parse.unquote(m.group(1).strip("<>")) for m in MARKDOWN_UPLOAD_RE.finditer(text)}
+
+def markdown_files(data):
+    """posts/*.md plus any other markdown file a content field points at."""
+    files = set()
+    if os.path.isdir(POSTS_DIR):
+        files |= {os.path.join(POSTS_DIR, f) for f in os.listdir(POSTS_DIR) if f.endswith(".md")}
+    for key in ("research_papers", "projects", "blog_posts"):
+        for item in data.get(key, []):
+            content = (item.get("content") or "").strip().lstrip("/")
+            if content.endswith(".md") and os.path.isfile(content):
+                files.add(os.path.normpath(content))
+    return sorted(files)
+
+def scan_upload_references(data, extra_texts=()):
+    """Build upload filename -> sorted referrers across data.json, all markdown and any
+    (label, text) pairs for content that isn't saved anywhere yet."""
+    index = {}
+    for path, _, _, value in iter_strings(data):
+        if "uploads/" in value:
+            for name in upload_names_in(value, whole_value=True):
+                index.setdefault(name, set()).add(describe_data_path(data, path))
+    for md_path in markdown_files(data):
+        with open(md_path, 'r', encoding='utf-8') as f:
+            for name in upload_names_in(f.read()):
+                index.setdefault(name, set()).add(md_path.replace(os.sep, "/"))
+    for label, text in extra_texts:
+        for name in upload_names_in(text):
+            index.setdefault(name, set()).add(label)
+    return {name: sorted(referrers) for name, referrers in index.items()}
+
+def list_uploads():
+    if not os.path.isdir(UPLOADS_DIR):
+        return []
+    return sorted(f for f in os.listdir(UPLOADS_DIR)
+                  if os.path.isfile(os.path.join(UPLOADS_DIR, f)) and not f.endswith(UPLOAD_PART_SUFFIX))
+
+def upload_report(data, extra_texts=()):
+    """Returns (references, orphans, missing): unused files and links to files that don't exist."""
+    references = scan_upload_references(data, extra_texts)
+    files = list_uploads()
+    orphans = [f for f in files if f not in references]
+    missing = sorted(name for name in references if name not in set(files))
+    return references, orphans, missing
+
+def remove_orphan_uploads(data, extra_texts=()):
+    _, orphans, _ = upload_report(data, extra_texts)
+    for name in orphans:
+        os.remove(os.path.join(UPLOADS_DIR, name))
+    return orphans
+
+def upload_link_pattern(name):
+    # Plain or percent-encoded form, not followed by more filename characters
+    forms = sorted({re.escape(name), re.escape(urllib.parse.quote(name))}, key=len, reverse=True)
+    return re.compile(r"/uploads/(<)?(" + "|".join(forms) + r")(?=>|$|[\s)\"'\]?#])")
+
+def rewrite_upload_links(text, old, new, whole_value=False):
+    pattern = upload_link_pattern(old)
+    if whole_value and text.strip() in (f"/uploads/{old}", f"uploads/{old}"):
+        return text.replace(f"uploads/{old}", f"uploads/{new}")
+
+    def replace(match):
+        encoded = match.group(2) != old
+        return f"/uploads/{match.group(1) or ''}{urllib.parse.quote(new) if encoded else new}"
+    return pattern.sub(replace, text)
+
+def upload_links_rewriter(mapping):
+    """rewrite_upload_links for a whole {old: new} mapping in one regex pass per text."""
+    forms = {}
+    for old, new in mapping.items():
+        forms[urllib.parse.quote(old)] = urllib.parse.quote(new)
+        forms[old] = new  # plain form wins when both spellings are the same
+    if not forms:
+        return lambda text: text
+    pattern = re.compile(r"/uploads/(<)?(" + "|".join(re.escape(form) for form in sorted(forms, key=len, reverse=True))
+                         + r")(?=>|$|[\s)\"'\]?#])")
+    return lambda text: pattern.sub(lambda m: f"/uploads/{m.group(1) or ''}{forms[m.group(2)]}", text)
+
+def plan_upload_rename(data, old, new):
+    """Collect the edits renaming an upload needs: [(container, key, value)] for data, {md_path: text}."""
+    data_edits, md_edits = [], {}
+    for _, container, key, value in iter_strings(data):
+        if "uploads/" in value:
+            updated = rewrite_upload_links(value, old, new, whole_value=True)
+            if updated != value:
+                data_edits.append((container, key, updated))
+    for md_path in markdown_files(data):
+        with open(md_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        updated = rewrite_upload_links(text, old, new)
+        if updated != text:
+            md_edits[md_path] = updated
+    return data_edits, md_edits
+
+def check_upload_rename(old, new):
+    if "/" in new or "\\" in new or not new.strip():
+        raise ValueError(f"Invalid file name: {new!r}")
+    if not os.path.isfile(os.path.join(UPLOADS_DIR, old)):
+        raise FileNotFoundError(f"{old} is not in {UPLOADS_DIR}")
+    if os.path.exists(os.path.join(UPLOADS_DIR, new)):
+        raise FileExistsError(f"{new} already exists in {UPLOADS_DIR}")
+
+def move_upload(old, new, md_edits):
+    """The on-disk half of a rename: the file, its recorded hash and the markdown that links it."""
+    os.rename(os.path.join(UPLOADS_DIR, old), os.path.join(UPLOADS_DIR, new))
+    hashes = load_json_cache(UPLOAD_HASHES_FILE)
+    if old in hashes:
+        hashes[new] = hashes.pop(old)
+        save_json_cache(UPLOAD_HASHES_FILE, hashes)
+    for md_path, text in md_edits.items():
+        write_text_atomic(md_path, text)
+
+def apply_upload_edits(data_edits, set_field=None):
+    for container, key, value in data_edits:
+        if set_field:
+            set_field(container, key, value)
+        else:
+            container[key] = value
+
+def rename_upload(data, old, new, set_field=None):
+    """Rename public/uploads/<old> to <new> and rewrite every reference in one pass.
+
+    The caller saves the data edits; the GUI does that before the file moves
+    (see WebsiteCMS.rename_upload_file) so the two can't drift apart.
+    """
+    check_upload_rename(old, new)
+    data_edits, md_edits = plan_upload_rename(data, old, new)
+    move_upload(old, new, md_edits)
+    apply_upload_edits(data_edits, set_field)
+    return len(data_edits), len(md_edits)
+
+
+# ==========================
+# STREAMING UPLOAD COPY
+# ==========================
+class UploadCancelled(Exception):
+    pass
+
+def stream_copy(src, dst, progress=None, cancelled=None, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Copy src to dst in one pass, hashing as it goes; returns the sha256 hex digest.
+
+    Writes to dst + '.part' and renames over dst only once every byte is on disk,
+    so a cancelled or failed copy never leaves a half-written upload behind.
+    progress(copied, total) is called after each chunk; cancelled() is polled
+    between chunks and aborts the copy with UploadCancelled.
+    """
+    tmp_path = dst + UPLOAD_PART_SUFFIX
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    try:
+        with open(src, 'rb') as fin, open(tmp_path, 'wb') as fout:
+            total = os.fstat(fin.fileno()).st_size
+            copied = 0
+            while True:
+                if cancelled and cancelled():
+                    raise UploadCancelled(os.path.basename(src))
+                n = fin.readinto(buffer)
+                if not n:
+                    break
+                digest.update(view[:n])
+                fout.write(view[:n])
+                copied += n
+                if progress:
+                    progress(copied, total)
+            if copied != total:
+                raise IOError(f"{os.path.basename(src)} changed while copying ({copied} of {total} bytes)")
+            fout.flush()
+            os.fsync(fout.fileno())
+        shutil.copystat(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest.hexdigest()
+
+def record_upload_hash(name, digest):
+    path = os.path.join(UPLOADS_DIR, name)
+    st = os.stat(path)
+    hashes = load_json_cache(UPLOAD_HASHES_FILE)
+    hashes[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    save_json_cache(UPLOAD_HASHES_FILE, hashes)
+
+def upload_sha256(name):
+    """sha256 of public/uploads/<name>, reusing the recorded hash while the file is unchanged."""
+    path = os.path.join(UPLOADS_DIR, name)
+    st = os.stat(path)
+    cached = load_json_cache(UPLOAD_HASHES_FILE).get(name)
+    if cached and cached.get("size") == st.st_size and cached.get("mtime_ns") == st.st_mtime_ns:
+        return cached["sha256"]
+    digest = file_sha256(path)
+    record_upload_hash(name, digest)
+    return digest
+
+def import_upload(file_path, progress=None, cancelled=None):
+    """Stream a file into public/uploads/; returns (name, sha256)."""
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    name = os.path.basename(file_path)
+    digest = stream_copy(file_path, os.path.join(UPLOADS_DIR, name), progress, cancelled)
+    record_upload_hash(name, digest)
+    return name, digest
+
+def format_rate(copied, total, elapsed):
+    mb = 1024 * 1024
+    rate = copied / mb / elapsed if elapsed > 0 else 0
+    return f"{copied / mb:.1f} / {total / mb:.1f} MB ({rate:.1f} MB/s)"
+
+
+# ==========================
+# IMAGE PLACEHOLDERS
+# ==========================
+try:
+    from PIL import Image  # optional: pip install pillow
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+PLACEHOLDER_SIZE = 12
+# Image field -> the field next to it that holds its placeholder
+PLACEHOLDER_FIELDS = {"imageUrl": "imagePlaceholder", "imageOverride": "imageOverridePlaceholder"}
+
+def compute_placeholder(path):
+    """{color, lqip, width, height}: dominant colour and a ~12px PNG data URI, or None if Pillow can't read it."""
+    if Image is None:
+        return None
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            image = image.convert("RGBA")
+            # Transparent areas read as white, like the page behind them
+            image = Image.alpha_composite(Image.new("RGBA", image.size, (255, 255, 255, 255)), image).convert("RGB")
+            quantized = image.resize((32, 32)).quantize(colors=4)
+            _, index = max(quantized.getcolors())
+            r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+            image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+            buffer = io.BytesIO()
+            image.save(buffer, "PNG", optimize=True)
+    except (OSError, ValueError):
+        return None
+    lqip = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+    return {"color": f"#{r:02x}{g:02x}{b:02x}", "lqip": lqip, "width": width, "height": height}
+
+def upload_placeholder(name, digest=None):
+    """Placeholder for public/uploads/<name>, cached by content hash so renames and re-uploads are free."""
+    path = os.path.join(UPLOADS_DIR, name)
+    if not name.lower().endswith(IMAGE_EXTENSIONS) or not os.path.isfile(path):
+        return None
+    digest = digest or upload_sha256(name)
+    cache = load_json_cache(PLACEHOLDERS_CACHE_FILE)
+    if digest not in cache:
+        placeholder = compute_placeholder(path)
+        if placeholder is None:
+            return None
+        cache[digest] = placeholder
+        save_json_cache(PLACEHOLDERS_CACHE_FILE, cache)
+    return cache[digest]
+
+def upload_name_from_url(url):
+    """'/uploads/a%20b.png' -> 'a b.png'; None for anything that isn't an upload."""
+    if not isinstance(url, str) or not url.strip().startswith("/uploads/"):
+        return None
+    return urllib.parse.unquote(url.strip()[len("/uploads/"):].split("?", 1)[0].split("#", 1)[0])
+
+def iter_image_fields(data):
+    """(container, key) for every image field that carries a placeholder."""
+    for item in data.get("projects", []):
+        yield item, "imageUrl"
+    homepage = data.get("homepage", {})
+    if isinstance(homepage.get("featuredEntry"), dict):
+        yield homepage["featuredEntry"], "imageOverride"
+    for entry in homepage.get("recentManualEntries", []):
+        yield entry, "imageUrl"
+
+def update_placeholder(container, key, set_field=None):
+    """Point container's placeholder field at its current image; returns True if it changed."""
+    field = PLACEHOLDER_FIELDS[key]
+    name = upload_name_from_url(container.get(key))
+    placeholder = upload_placeholder(name) if name else None
+    if container.get(field) == placeholder or (placeholder is None and field not in container):
+        return False
+    if set_field:
+        set_field(container, field, placeholder)
+    else:
+        container[field] = placeholder
+    return True
+
+def refresh_placeholders(data, set_field=None):
+    """Backfill/refresh every image field's placeholder; returns how many changed."""
+    return sum(update_placeholder(container, key, set_field) for container, key in iter_image_fields(data))
+
+
+# ==========================
+# STATIC ROUTE PRERENDERING
+# ==========================
+# Collection key -> (SPA route, detail kind)
+ROUTE_SECTIONS = {"research_papers": ("research", "paper"), "projects": ("projects", "project"), "blog_posts": ("garden", "post")}
+SECTION_TITLES = {"research": "Research", "projects": "Projects", "garden": "Garden"}
+PRERENDER_BLOCK_RE = re.compile(r"<!--prerender-->.*?<!--/prerender-->", re.DOTALL)
+ROOT_DIV = '<div id="root"></div>'
+
+def content_hash(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False, default=model_json).encode('utf-8')).hexdigest()
+
+def read_item_markdown(item):
+    """Markdown body of an entry: the referenced .md file, or inline text."""
+    content = (item.get("content") or "").strip()
+    if content.endswith(".md") or content.startswith("/"):
+        path = content.lstrip("/")
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        return ""
+    return content
+
+def route_slug(item_id):
+    return re.sub(r"[^A-Za-z0-9_-]", "-", str(item_id))
+
+def item_summary(kind, item):
+    return item.get("excerpt" if kind == "post" else "description", "")
+
+def item_meta_line(kind, item):
+    if kind == "paper":
+        return " | ".join(str(part) for part in (", ".join(item.get("authors", [])), item.get("venue", ""), item.get("year", "")) if part)
+    if kind == "project":
+        return ", ".join(item.get("techStack", []))
+    return " | ".join(part for part in (item.get("date", ""), ", ".join(item.get("tags", []))) if part)
+
+def collect_routes(data):
+    """Every prerenderable route as {route, path, spa, title, description, kind, payload}.
+
+    `payload` is everything the route's HTML depends on; it is both the
+    input to render_route_fragment and the cache key.
+    """
+    site_title = data.get("homepage", {}).get("tabTitle") or data.get("profile", {}).get("name", "")
+    hero = data.get("hero", {})
+    routes = [{
+        "route": "/", "path": "index.html", "spa": "/", "title": site_title,
+        "description": hero.get("subheadline", "") or data.get("profile", {}).get("bio", ""), "kind": "home",
+        "payload": {"hero": hero, "profile": data.get("profile", {})},
+    }]
+    for key, (section, kind) in ROUTE_SECTIONS.items():
+        items = data.get(key, [])
+        intro = data.get("researchPage", {}).get("description", "") if section == "research" else ""
+        routes.append({
+            "route": f"/{section}", "path": f"{section}/index.html", "spa": f"/{section}",
+            "title": f"{SECTION_TITLES[section]} | {site_title}", "description": intro, "kind": "list",
+            "payload": {"section": section, "intro": intro, "kind": kind, "items": [
+                {"id": item.get("id"), "title": item.get("title", ""), "meta": item_meta_line(kind, item),
+                 "summary": item_summary(kind, item)} for item in items]},
+        })
+        for item in items:
+            if not item.get("id"):
+                continue
+            slug = route_slug(item["id"])
+            routes.append({
+                "route": f"/{section}/{slug}", "path": f"{section}/{slug}/index.html",
+                "spa": f"/{section}?id={urllib.parse.quote(str(item['id']))}",
+                "title": f"{item.get('title', 'Untitled')} | {site_title}", "description": item_summary(kind, item),
+                "kind": kind, "payload": {"section": section, "item": item, "body": read_item_markdown(item)},
+            })
+    return routes
+
+def render_route_fragment(kind, payload):
+    """HTML placed inside #root for first paint; React replaces it when the bundle mounts."""
+    esc = html.escape
+    if kind == "home":
+        hero, profile = payload["hero"], payload["profile"]
+        return (f'<div class="min-h-screen p-8 md:p-16 lg:p-24 max-w-5xl mx-auto">'
+                f'<h1 class="font-serif text-5xl md:text-7xl font-bold mb-6 text-academic-black">{esc(hero.get("headline", ""))}</h1>'
+                f'<p class="font-sans text-stone-600 mt-6 max-w-2xl text-lg">{esc(hero.get("subheadline", ""))}</p>'
+                f'<p class="font-sans text-stone-600 mt-6">{esc(profile.get("name", ""))} | {esc(profile.get("affiliation", ""))}</p></div>')
+    if kind == "list":
+        section = payload["section"]
+        entries = "".join(
+            f'<div class="mb-12"><a href="/{section}/{route_slug(entry["id"])}/" class="font-serif text-2xl font-bold text-academic-black">'
+            f'{esc(entry["title"])}</a><div class="font-mono text-stone-400 text-sm">{esc(entry["meta"])}</div>'
+            f'<p class="font-sans text-stone-800 leading-relaxed">{esc(entry["summary"])}</p></div>'
+            for entry in payload["items"] if entry["id"])
+        intro = f'<p class="font-sans text-stone-600 mt-6 max-w-2xl text-lg">{esc(payload["intro"])}</p>' if payload["intro"] else ""
+        return (f'<div class="min-h-screen p-8 md:p-16 lg:p-24 max-w-5xl mx-auto"><header class="mb-16">'
+                f'<h1 class="font-serif text-5xl md:text-6xl font-bold mb-6 text-academic-black">{SECTION_TITLES[section]}</h1>'
+                f'<div class="w-20 h-1 bg-academic-orange"></div>{intro}</header>{entries}</div>')
+    item = payload["item"]
+    body = render_markdown(payload["body"]) if payload["body"].strip() else f"<p>{esc(item_summary(kind, item))}</p>"
+    return (f'<div class="min-h-screen p-8 md:p-16 lg:p-24 max-w-4xl mx-auto bg-white shadow-sm my-8 md:my-16 border border-stone-100"><article>'
+            f'<h1 class="font-serif text-4xl md:text-5xl font-bold mb-4 text-academic-black">{esc(item.get("title", ""))}</h1>'
+            f'<div class="font-mono text-sm text-stone-400 mb-8 pb-8 border-b border-stone-200">{esc(item_meta_line(kind, item))}</div>'
+            f'<div class="prose prose-stone prose-lg max-w-none font-serif">{body}</div></article></div>')
+
+def build_route_shell(template, route, fragment):
+    """Inject title/meta, the prerendered fragment and a hash-route redirect into dist/index.html."""
+    page = PRERENDER_BLOCK_RE.sub("", template)
+    title, description = html.escape(route["title"]), html.escape(route["description"])
+    head = (f'<!--prerender--><meta name="description" content="{description}">'
+            f'<meta property="og:title" content="{title}"><meta property="og:description" content="{description}">')
+    if route["route"] != "/":
+        # HashRouter only reads location.hash: point it at this entry before the bundle boots
+        head += f"<script>if (!location.hash) history.replaceState(null, '', '/#{route['spa']}');</script>"
+    head += "<!--/prerender-->"
+    page = re.sub(r"<title>.*?</title>", lambda m: f"<title>{title}</title>{head}", page, count=1, flags=re.DOTALL)
+    return page.replace(ROOT_DIV, f'<div id="root"><!--prerender-->{fragment}<!--/prerender--></div>', 1)
+
+def load_json_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_json_cache(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_text_atomic(path, json.dumps(value, ensure_ascii=False, default=model_json))
+
+def plan_prerender(data, dist_dir=DIST_DIR):
+    """Work out which route fragments need rendering; cached ones are reused as-is.
+
+    Returns (state, tasks) where tasks are (kind, payload) pairs for
+    render_route_fragment and state is what finish_prerender needs.
+    """
+    template_path = os.path.join(dist_dir, "index.html")
+    with open(template_path, 'r', encoding='utf-8') as f:
+        template = PRERENDER_BLOCK_RE.sub("", f.read())
+    # A cleaned template without <!--prerender--> blocks still has an empty #root
+    template = re.sub(r'<div id="root">\s*</div>', ROOT_DIV, template)
+    cache = load_json_cache(PRERENDER_CACHE_FILE)
+    fragments = cache.get("fragments", {})
+    routes, tasks = [], []
+    for route in collect_routes(data):
+        key = content_hash(route["kind"], route["payload"])
+        cached = fragments.get(route["route"])
+        if cached and cached["hash"] == key:
+            routes.append((route, key, cached["html"]))
+        else:
+            routes.append((route, key, None))
+            tasks.append((route["kind"], route["payload"]))
+    state = {"dist": dist_dir, "template": template, "routes": routes, "old_paths": cache.get("paths", [])}
+    return state, tasks
+
+def finish_prerender(state, rendered):
+    """Write the shells, given fragments for plan_prerender's tasks in order."""
+    rendered = iter(rendered)
+    dist_dir = state["dist"]
+    stats = {"rendered": 0, "reused": 0, "written": 0, "unchanged": 0, "removed": 0}
+    new_fragments, written_paths = {}, []
+    for route, key, fragment in state["routes"]:
+        if fragment is None:
+            fragment = next(rendered)
+            stats["rendered"] += 1
+        else:
+            stats["reused"] += 1
+        new_fragments[route["route"]] = {"hash": key, "html": fragment}
+        if write_if_changed(os.path.join(dist_dir, route["path"]), build_route_shell(state["template"], route, fragment)):
+            stats["written"] += 1
+        else:
+            stats["unchanged"] += 1
+        written_paths.append(route["path"])
+    # Routes for entries that no longer exist
+    for stale in set(state["old_paths"]) - set(written_paths):
+        stale_path = os.path.join(dist_dir, stale)
+        if os.path.isfile(stale_path):
+            os.remove(stale_path)
+            stats["removed"] += 1
+    save_json_cache(PRERENDER_CACHE_FILE, {"fragments": new_fragments, "paths": written_paths})
+    return stats
+
+def prerender_site(data, dist_dir=DIST_DIR):
+    """Write a static HTML shell per route into a built dist/.
+
+    Fragments are cached by a hash of their inputs and files are only
+    rewritten when their bytes change, so re-running after a small edit
+    only regenerates the affected routes.
+    """
+    state, tasks = plan_prerender(data, dist_dir)
+    return finish_prerender(state, [render_route_fragment(*task) for task in tasks])
+
+def write_if_changed(path, text):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    write_text_atomic(path, text)
+    return True
+
+
+# ==========================
+# FEEDS & SITEMAP
+# ==========================
+POST_DATE_FORMATS = ("%Y-%m-%d", "%b %d, %Y", "%B %d, %Y", "%b %Y", "%B %Y", "%Y")
+
+def parse_post_date(value):
+    """Best-effort datetime for the date strings the CMS stores ("Apr 15, 2025", "2025-04-15", ...)."""
+    value = str(value or "").strip()
+    for fmt in POST_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).replace(tzinfo=datetime.timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+def tag_slug(tag):
+    return re.sub(r"[^a-z0-9]+", "-", tag.lower()).strip("-")
+
+def tag_slugs(tags):
+    """Unique feed directory per tag.
+
+    "C" and "C++" both slug to "c", and CJK tags slug to nothing, so the
+    tag that spells its slug exactly (else the first one) keeps the plain
+    slug and the rest get a short hash of the tag. The hash doesn't depend
+    on the other tags, so a feed URL only moves when a new tag collides.
+    """
+    groups = {}
+    for tag in sorted(tags):
+        groups.setdefault(tag_slug(tag), []).append(tag)
+    slugs = {}
+    for slug, group in groups.items():
+        keeper = next((tag for tag in group if tag.lower() == slug), group[0]) if slug else None
+        for tag in group:
+            suffix = hashlib.sha256(tag.encode('utf-8')).hexdigest()[:8]
+            slugs[tag] = slug if tag == keeper else f"{slug or 'tag'}-{suffix}"
+    return slugs
+
+def post_index(data):
+    """Garden posts newest first, as (timestamp, post); undated posts sink to the bottom."""
+    epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    dated = [(parse_post_date(post.get("date")) or epoch, post) for post in data.get("blog_posts", []) if post.get("id")]
+    return sorted(dated, key=lambda pair: (pair[0], str(pair[1]["id"])), reverse=True)
+
+def render_feed_entry(post, body, timestamp, site_url):
+    """Atom <entry> and JSON Feed item for one post (the expensive part, so it is cached)."""
+    url = f"{site_url}/garden/{route_slug(post['id'])}/"
+    content_html = render_markdown(body) if body else f"<p>{html.escape(post.get('excerpt', ''))}</p>"
+    stamp = timestamp.isoformat().replace("+00:00", "Z")
+    esc = lambda value: html.escape(str(value), quote=True)
+    atom = "\n".join([
+        "  <entry>",
+        f"    <title>{esc(post.get('title', 'Untitled'))}</title>",
+        f'    <link href="{esc(url)}"/>',
+        f"    <id>{esc(url)}</id>",
+        f"    <updated>{stamp}</updated>",
+        f"    <summary>{esc(post.get('excerpt', ''))}</summary>",
+        *(f'    <category term="{esc(tag)}"/>' for tag in post.get("tags", [])),
+        f'    <content type="html">{esc(content_html)}</content>',
+        "  </entry>",
+    ])
+    item = {"id": url, "url": url, "title": post.get("title", "Untitled"), "summary": post.get("excerpt", ""),
+            "content_html": content_html, "date_published": stamp, "tags": post.get("tags", [])}
+    return {"atom": atom, "json": item}
+
+def build_atom_feed(title, feed_url, site_url, entries, updated, author):
+    # RFC 4287 wants an author on the feed or on every entry; the feed-level one covers all entries
+    return "\n".join([
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{html.escape(title)}</title>",
+        f'  <link href="{html.escape(feed_url)}" rel="self"/>',
+        f'  <link href="{html.escape(site_url)}/garden/"/>',
+        f"  <id>{html.escape(feed_url)}</id>",
+        f"  <updated>{updated}</updated>",
+        f"  <author><name>{html.escape(author)}</name></author>",
+        *(entry["atom"] for entry in entries),
+        "</feed>",
+        "",
+    ])
+
+def build_json_feed(title, feed_url, site_url, entries, author):
+    feed = {"version": "https://jsonfeed.org/version/1.1", "title": title, "home_page_url": f"{site_url}/garden/",
+            "feed_url": feed_url, "authors": [{"name": author}], "items": [entry["json"] for entry in entries]}
+    return json.dumps(feed, indent=2, ensure_ascii=False) + "\n"
+
+def build_sitemap(routes, lastmods, site_url):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for route in routes:
+        loc = site_url + (route["route"].rstrip("/") + "/" if route["route"] != "/" else "/")
+        lastmod = lastmods.get(route["route"])
+        lines.append(f"  <url><loc>{html.escape(loc)}</loc>" + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</url>")
+    lines += ["</urlset>", ""]
+    return "\n".join(lines)
+
+def plan_feeds(data, dist_dir=DIST_DIR, site_url=None):
+    """Split feed generation into cached entries and (post, body, timestamp, site_url) render tasks."""
+    site_url = (site_url or SITE_URL).rstrip("/")
+    cache = load_json_cache(FEEDS_CACHE_FILE)
+    cached_entries = cache.get("entries", {})
+    index, tasks = [], []
+    for timestamp, post in post_index(data):
+        body = read_item_markdown(post)
+        key = content_hash(post, body, timestamp.isoformat(), site_url)
+        cached = cached_entries.get(str(post["id"]))
+        if cached and cached["hash"] == key:
+            index.append((timestamp, post, key, cached["entry"]))
+        else:
+            index.append((timestamp, post, key, None))
+            tasks.append((post, body, timestamp, site_url))
+    state = {"data": data, "dist": dist_dir, "site_url": site_url, "index": index, "old_paths": cache.get("paths", [])}
+    return state, tasks
+
+def finish_feeds(state, rendered):
+    """Assemble site and per-tag feeds plus sitemap.xml; only files whose bytes change are rewritten."""
+    rendered = iter(rendered)
+    dist_dir, site_url = state["dist"], state["site_url"]
+    site_title = state["data"].get("homepage", {}).get("tabTitle") or state["data"].get("profile", {}).get("name", "")
+    author = state["data"].get("profile", {}).get("name") or site_title or urllib.parse.urlsplit(site_url).hostname or "Author"
+    stats = {"rendered": 0, "reused": 0, "written": 0, "unchanged": 0, "removed": 0}
+    entries, by_tag, cache_entries, lastmods = [], {}, {}, {}
+    for timestamp, post, key, entry in state["index"]:
+        if entry is None:
+            entry = next(rendered)
+            stats["rendered"] += 1
+        else:
+            stats["reused"] += 1
+        cache_entries[str(post["id"])] = {"hash": key, "entry": entry}
+        entries.append(entry)
+        for tag in post.get("tags", []):
+            by_tag.setdefault(tag, []).append((timestamp, entry))
+        if timestamp.year > 1970:
+            lastmods[f"/garden/{route_slug(post['id'])}"] = timestamp.date().isoformat()
+
+    def updated(stamps):
+        return (max(stamps) if stamps else datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)).isoformat().replace("+00:00", "Z")
+
+    outputs = {}
+    stamps = [timestamp for timestamp, *_ in state["index"]]
+    outputs["feed.xml"] = build_atom_feed(f"{site_title} | Garden", f"{site_url}/feed.xml", site_url, entries[:FEED_LIMIT], updated(stamps), author)
+    outputs["feed.json"] = build_json_feed(f"{site_title} | Garden", f"{site_url}/feed.json", site_url, entries[:FEED_LIMIT], author)
+    slugs = tag_slugs(by_tag)
+    for tag, tagged in sorted(by_tag.items()):
+        base = f"tags/{slugs[tag]}"
+        tag_entries = [entry for _, entry in tagged[:FEED_LIMIT]]
+        title = f"{site_title} | Garden: {tag}"
+        outputs[f"{base}/feed.xml"] = build_atom_feed(title, f"{site_url}/{base}/feed.xml", site_url, tag_entries, updated([t for t, _ in tagged]), author)
+        outputs[f"{base}/feed.json"] = build_json_feed(title, f"{site_url}/{base}/feed.json", site_url, tag_entries, author)
+    outputs["sitemap.xml"] = build_sitemap(collect_routes(state["data"]), lastmods, site_url)
+    # Leave a hand-written public/robots.txt alone
+    if "robots.txt" in state["old_paths"] or not os.path.exists(os.path.join(dist_dir, "robots.txt")):
+        outputs["robots.txt"] = f"User-agent: *\nAllow: /\nSitemap: {site_url}/sitemap.xml\n"
+
+    for rel_path, text in outputs.items():
+        if write_if_changed(os.path.join(dist_dir, rel_path), text):
+            stats["written"] += 1
+        else:
+            stats["unchanged"] += 1
+    # Feeds for tags no post uses anymore
+    for stale in set(state["old_paths"]) - set(outputs):
+        stale_path = os.path.join(dist_dir, stale)
+        if os.path.isfile(stale_path):
+            os.remove(stale_path)
+            stats["removed"] += 1
+    save_json_cache(FEEDS_CACHE_FILE, {"entries": cache_entries, "paths": sorted(outputs)})
+    return stats
+
+def generate_feeds(data, dist_dir=DIST_DIR, site_url=None):
+    state, tasks = plan_feeds(data, dist_dir, site_url)
+    return finish_feeds(state, [render_feed_entry(*task) for task in tasks])
+
+
+# ==========================
+# RELATED CONTENT
+# ==========================
+RELATED_STOPWORDS = frozenset("""
+a about above after again all also an and any are as at be because been before being between both but by can
+could did do does doing down during each few for from further had has have having here how if in into is it its
+itself just more most no nor not now of off on once only or other our out over own same should so some such than
+that the their them then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your using use used via one two new
+""".split())
+TOKEN_RE = re.compile(r"[a-z][a-z0-9]{2,}")
+# Keep the heaviest terms per entry, query with only the very heaviest, and cap
+# each posting list. Together they bound the work per entry, which is what keeps
+# this tractable at tens of thousands of items.
+RELATED_TERMS_PER_DOC = 32
+RELATED_QUERY_TERMS = 12
+RELATED_POSTINGS_PER_TERM = 64
+RELATED_TAG_WEIGHT = 0.5
+
+def related_key(section, item_id):
+    return f"{section}/{item_id}"
+
+def related_documents(data):
+    """(key, tags, text) for every paper, project and post with an id."""
+    docs = []
+    for collection, (section, kind) in ROUTE_SECTIONS.items():
+        for item in data.get(collection, []):
+            if not item.get("id"):
+                continue
+            tags = item.get("techStack", []) if kind == "project" else item.get("tags", [])
+            text = " ".join([item.get("title", ""), item.get("title", ""), item_summary(kind, item), read_item_markdown(item)])
+            docs.append((related_key(section, item["id"]), tuple(sorted({t.strip().lower() for t in tags if t.strip()})), text))
+    return docs
+
+def term_counts(text):
+    counts = {}
+    for token in TOKEN_RE.findall(text.lower()):
+        if token not in RELATED_STOPWORDS:
+            counts[token] = counts.get(token, 0) + 1
+    return counts
+
+def compute_related(keys, tag_sets, counts, limit=RELATED_LIMIT):
+    """Top `limit` neighbours per document by tag Jaccard + TF-IDF cosine.
+
+    Vectors are sparse dicts and similarity is accumulated through
+    inverted indexes (term -> postings, tag -> docs), so each document
+    only touches the documents it shares something with.
+    """
+    n = len(keys)
+    df = {}
+    for doc_counts in counts:
+        for term in doc_counts:
+            df[term] = df.get(term, 0) + 1
+    # Terms seen in a single entry can't link it to anything
+    idf = {term: math.log((1 + n) / (1 + freq)) for term, freq in df.items() if freq > 1}
+    vectors = []
+    for doc_counts in counts:
+        weights = {term: (1 + math.log(count)) * idf[term] for term, count in doc_counts.items() if term in idf}
+        top = heapq.nlargest(RELATED_TERMS_PER_DOC, weights.items(), key=lambda kv: (kv[1], kv[0]))
+        norm = math.sqrt(sum(w * w for _, w in top)) or 1.0
+        vectors.append([(term, w / norm) for term, w in top])  # heaviest first
+    postings, tag_index = {}, {}
+    for doc, vector in enumerate(vectors):
+        for term, weight in vector:
+            postings.setdefault(term, []).append((doc, weight))
+    for term, entries in postings.items():
+        if len(entries) > RELATED_POSTINGS_PER_TERM:
+            postings[term] = heapq.nlargest(RELATED_POSTINGS_PER_TERM, entries, key=lambda entry: (entry[1], -entry[0]))
+    for doc, tags in enumerate(tag_sets):
+        for tag in tags:
+            tag_index.setdefault(tag, []).append(doc)
+    for tag, docs in tag_index.items():
+        # Entries with fewer tags can reach a higher Jaccard score, so they win the cut
+        docs.sort(key=lambda other: (len(tag_sets[other]), other))
+        del docs[RELATED_POSTINGS_PER_TERM:]
+
+    related = {}
+    for doc in range(n):
+        text_scores = {}
+        for term, weight in vectors[doc][:RELATED_QUERY_TERMS]:
+            for other, other_weight in postings[term]:
+                if other != doc:
+                    text_scores[other] = text_scores.get(other, 0.0) + weight * other_weight
+        shared_tags = {}
+        for tag in tag_sets[doc]:
+            for other in tag_index[tag]:
+                if other != doc:
+                    shared_tags[other] = shared_tags.get(other, 0) + 1
+        own_tags = len(tag_sets[doc])
+        ranked = []
+        for other in text_scores.keys() | shared_tags.keys():
+            shared = shared_tags.get(other, 0)
+            jaccard = shared / (own_tags + len(tag_sets[other]) - shared) if shared else 0.0
+            score = RELATED_TAG_WEIGHT * jaccard + (1 - RELATED_TAG_WEIGHT) * text_scores.get(other, 0.0)
+            if score > 0:
+                # Ties go to the alphabetically first key so output is stable
+                ranked.append((-round(score, 9), keys[other]))
+        if ranked:
+            related[keys[doc]] = [key for _, key in heapq.nsmallest(limit, ranked)]
+    return related
+
+def write_related(related, path=RELATED_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return write_if_changed(path, json.dumps(related, separators=(",", ":"), sort_keys=True, ensure_ascii=False))
+
+
+# ==========================
+# CONTENT ANALYSIS
+# ==========================
+WORDS_PER_MINUTE = 200
+WORD_RE = re.compile(r"[\w'’-]+")
+ANALYSIS_VERSION = 2
+# Inline markup that shouldn't count as words or show up in heading text
+MARKUP_RE = re.compile(r"[*_`~]|<[^>]+>")
+
+def heading_id(text, number, used):
+    """Anchor id for the number-th heading (1-based); MarkdownRenderer.tsx derives the same ids.
+
+    Letters and digits of any script are kept, so CJK headings get real slugs;
+    a heading with none falls back to "section-<number>", and repeats get -2, -3...
+    """
+    base = "".join(c if c.isalnum() else "-" for c in text.lower())
+    base = re.sub(r"-+", "-", base).strip("-") or f"section-{number}"
+    slug, n = base, 1
+    while slug in used:
+        n += 1
+        slug = f"{base}-{n}"
+    used.add(slug)
+    return slug
+
+def plain_inline(text):
+    text = IMAGE_RE.sub(r"\1", text)
+    text = LINK_RE.sub(r"\1", text)
+    return MARKUP_RE.sub("", text).strip()
+
+def analyze_markdown(lines):
+    """Word count, reading time, heading outline and math/code block counts, one line at a time.
+
+    Only the current line is held in memory, so arbitrarily long files are
+    fine. Words inside fenced code and display math are not counted.
+    """
+    words = math_blocks = inline_math = code_blocks = 0
+    headings = []
+    heading_ids = set()
+    fence = None
+    in_math = in_front_matter = False
+    for number, line in enumerate(lines):
+        line = line.rstrip("\n")
+        stripped = line.strip()
+        if number == 0 and stripped == "---":
+            in_front_matter = True
+            continue
+        if in_front_matter:
+            in_front_matter = stripped != "---"
+            continue
+        if fence:
+            if stripped.startswith(fence):
+                fence = None
+            continue
+        if in_math:
+            in_math = "$$" not in stripped
+            continue
+        match = FENCE_RE.match(line)
+        if match:
+            fence = match.group(1)
+            code_blocks += 1
+            continue
+        if stripped.startswith("$$"):
+            math_blocks += 1
+            # $$ ... $$ on one line closes itself
+            in_math = not (len(stripped) >= 4 and stripped.endswith("$$"))
+            continue
+        inline_math += len(INLINE_MATH_RE.findall(line))
+        text = plain_inline(INLINE_MATH_RE.sub(" ", line))
+        heading = HEADING_RE.match(line)
+        if heading:
+            title = plain_inline(heading.group(2))
+            headings.append({"level": len(heading.group(1)), "text": title,
+                             "id": heading_id(title, len(headings) + 1, heading_ids)})
+        words += len(WORD_RE.findall(text))
+    return {
+        "words": words,
+        "readingMinutes": max(1, round(words / WORDS_PER_MINUTE)) if words else 0,
+        "headings": headings,
+        "mathBlocks": math_blocks,
+        "inlineMath": inline_math,
+        "codeBlocks": code_blocks,
+    }
+
+def markdown_source(item):
+    """(path, None) for file-backed entries, (None, text) for inline ones; see read_item_markdown."""
+    content = (item.get("content") or "").strip()
+    if content.endswith(".md") or content.startswith("/"):
+        path = content.lstrip("/")
+        return (path, None) if os.path.isfile(path) else (None, "")
+    return None, content
+
+def analyze_item_markdown(path, text):
+    if path is None:
+        return analyze_markdown(text.split("\n"))
+    with open(path, 'r', encoding='utf-8') as f:
+        return analyze_markdown(f)
+
+def plan_content_stats(data):
+    """Reuse cached stats for unchanged markdown; returns (state, [(path, text)] tasks)."""
+    cache = load_json_cache(CONTENT_STATS_CACHE_FILE)
+    entries, tasks = [], []
+    for collection, (section, _) in ROUTE_SECTIONS.items():
+        for item in data.get(collection, []):
+            if not item.get("id"):
+                continue
+            path, text = markdown_source(item)
+            # Bump ANALYSIS_VERSION when analyze_markdown's output changes, so old stats aren't reused
+            key = content_hash(ANALYSIS_VERSION, file_sha256(path) if path else text)
+            cached = cache.get(key)
+            entries.append((related_key(section, item["id"]), key, cached))
+            if cached is None:
+                tasks.append((path, text))
+    return entries, tasks
+
+def finish_content_stats(entries, analyzed):
+    analyzed = iter(analyzed)
+    stats, cache = {}, {}
+    for key, digest, cached in entries:
+        result = cached if cached is not None else next(analyzed)
+        cache[digest] = result
+        if result["words"]:
+            stats[key] = result
+    save_json_cache(CONTENT_STATS_CACHE_FILE, cache)
+    os.makedirs(os.path.dirname(CONTENT_STATS_FILE), exist_ok=True)
+    write_if_changed(CONTENT_STATS_FILE, json.dumps(stats, separators=(",", ":"), sort_keys=True, ensure_ascii=False))
+    return stats
+
+
+# ==========================
+# FACET INDEX
+# ==========================
+def facet_values(kind, item):
+    """(facet, value) pairs an entry can be filtered by."""
+    yield "type", kind
+    for tag in item.get("tags", []) if kind != "project" else ():
+        yield "tag", tag
+    for tech in item.get("techStack", []) if kind == "project" else ():
+        yield "techStack", tech
+    if kind == "paper":
+        if item.get("year"):
+            yield "year", str(item["year"])
+        if item.get("venue"):
+            yield "venue", item["venue"]
+    elif kind == "post":
+        date = parse_post_date(item.get("date"))
+        if date:
+            yield "year", str(date.year)
+
+def build_facets(data):
+    """Entry keys in a fixed order plus {facet: {value: bitset}}, with Python ints as the bitsets."""
+    keys, facets = [], {}
+    for collection, (section, kind) in ROUTE_SECTIONS.items():
+        for item in data.get(collection, []):
+            if not item.get("id"):
+                continue
+            bit = 1 << len(keys)
+            keys.append(related_key(section, item["id"]))
+            for facet, value in facet_values(kind, item):
+                values = facets.setdefault(facet, {})
+                values[value] = values.get(value, 0) | bit
+    return keys, facets
+
+def encode_bitmap(bits, size):
+    """Roaring-style container choice: sorted positions when sparse, base64 packed words when dense."""
+    words = (size + 31) // 32
+    if bits.bit_count() < words:
+        positions = []
+        while bits:
+            low = bits & -bits
+            positions.append(low.bit_length() - 1)
+            bits ^= low
+        return positions
+    return base64.b64encode(bits.to_bytes(words * 4, "little")).decode("ascii")
+
+def facet_counts(data, facet="tag"):
+    """value -> number of entries, straight from the bitsets (used for live counts in the tag picker)."""
+    _, facets = build_facets(data)
+    return {value: bits.bit_count() for value, bits in facets.get(facet, {}).items()}
+
+def write_facet_index(data, path=FACETS_FILE):
+    keys, facets = build_facets(data)
+    index = {"size": len(keys), "keys": keys, "facets": {
+        facet: {value: encode_bitmap(bits, len(keys)) for value, bits in sorted(values.items())}
+        for facet, values in sorted(facets.items())}}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_if_changed(path, json.dumps(index, separators=(",", ":"), ensure_ascii=False))
+    return {facet: len(values) for facet, values in facets.items()}
+
+
+# ==========================
+# PREFETCH MANIFEST
+# ==========================
+# Entry fields that point at files a detail view loads or links to
+PREFETCH_ITEM_FIELDS = ("content", "imageUrl", "pdfAttachment", "pdfLink")
+
+def local_asset_size(url):
+    """Size of the file a site URL is served from (public/ or the repo root), or None if it isn't local."""
+    if not isinstance(url, str) or not url.strip() or "://" in url or url.startswith(("mailto:", "#")):
+        return None
+    path = urllib.parse.unquote(url.strip().split("?", 1)[0].split("#", 1)[0]).lstrip("/")
+    for candidate in (os.path.join("public", path), path):
+        if path and os.path.isfile(candidate):
+            return os.path.getsize(candidate)
+    return None
+
+def prefetch_assets(urls):
+    """[{url, size}] for the local ones, in order, without duplicates. URLs stay as the pages write them."""
+    assets, seen = [], set()
+    for url in urls:
+        size = local_asset_size(url)
+        if size is not None and url not in seen:
+            seen.add(url)
+            assets.append({"url": url, "size": size})
+    return assets
+
+def generated_url(path):
+    return "/generated/" + os.path.basename(path)
+
+def build_prefetch_manifest(data):
+    """{"routes": {nav path: assets}, "items": {"section/id": assets}}."""
+    items, section_assets = {}, {}
+    detail_data = [generated_url(RELATED_FILE), generated_url(CONTENT_STATS_FILE)]
+    for collection, (section, _) in ROUTE_SECTIONS.items():
+        list_urls = [generated_url(FACETS_FILE), generated_url(CONTENT_STATS_FILE)]
+        for item in data.get(collection, []):
+            if not item.get("id"):
+                continue
+            items[related_key(section, item["id"])] = prefetch_assets([item.get(f) for f in PREFETCH_ITEM_FIELDS] + detail_data)
+            list_urls.append(item.get("imageUrl"))  # project cards show their image
+        section_assets["/" + section] = prefetch_assets(list_urls)
+
+    homepage = data.get("homepage", {})
+    featured = homepage.get("featuredEntry", {})
+    featured_section = {"paper": "research", "project": "projects", "blog": "garden"}.get(featured.get("type"))
+    featured_item = next((item for collection, (section, _) in ROUTE_SECTIONS.items() if section == featured_section
+                          for item in data.get(collection, []) if item.get("id") == featured.get("id")), {})
+    home_urls = [featured.get("imageOverride") or featured_item.get("imageUrl")]
+    home_urls += [entry.get("imageUrl") for entry in homepage.get("recentManualEntries", [])]
+
+    routes = {}
+    for link in data.get("navigation", []):
+        path = link.get("path", "")
+        if path == "/":
+            routes[path] = prefetch_assets(home_urls)
+        elif path in section_assets:
+            routes[path] = section_assets[path]
+        elif link.get("isExternal"):
+            routes[path] = prefetch_assets([path])
+    return {"routes": routes, "items": items}
+
+def write_prefetch_manifest(data, path=PREFETCH_FILE):
+    manifest = build_prefetch_manifest(data)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_if_changed(path, json.dumps(manifest, separators=(",", ":"), ensure_ascii=False))
+    return {"routes": len(manifest["routes"]), "items": len(manifest["items"])}
+
+# ==========================
+# FONT SUBSETTING
+# ==========================
+try:
+    from fontTools import subset as font_subset  # optional: pip install fonttools brotli
+except ImportError:
+    font_subset = None
+
+# Tailwind's font-serif (titles, headings, navigation) is Cinzel on every page
+SITEWIDE_FONTS = ("Cinzel",)
+# Kept in every subset so labels hard-coded in the components still render
+BASE_CHARSET = "".join(chr(c) for c in range(0x20, 0x7f)) + "‘’“”–—…·•|"
+GENERIC_FONT_FAMILIES = {"serif", "sans-serif", "monospace", "cursive", "fantasy", "system-ui"}
+FONT_SOURCE_RE = re.compile(r"^(?P<family>[^-\[.]+).*\.(ttf|otf|woff2?)$", re.IGNORECASE)
+GOOGLE_FONTS_LINK_RE = re.compile(r'<link href="https://fonts\.googleapis\.com/css2\?([^"]*)" rel="stylesheet">')
+
+def font_key(name):
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+def css_font_families(value):
+    families = [part.strip().strip('"\'') for part in (value or "").split(",")]
+    return [family for family in families if family and family.lower() not in GENERIC_FONT_FAMILIES]
+
+def font_charsets(data):
+    """family -> set of characters it actually renders, from the content itself."""
+    site_text = "".join(value for *_, value in iter_strings(data))
+    for path in markdown_files(data):
+        with open(path, 'r', encoding='utf-8') as f:
+            site_text += f.read()
+    charsets = {family: set(BASE_CHARSET) | set(site_text) for family in SITEWIDE_FONTS}
+    hero = data.get("hero", {})
+    for prefix in ("headline", "subheadline"):
+        for suffix in ("FontEng", "FontCn"):
+            for family in css_font_families(hero.get(prefix + suffix)):
+                charsets.setdefault(family, set(BASE_CHARSET)).update(hero.get(prefix, ""))
+    return charsets
+
+def font_sources(fonts_dir=FONTS_DIR):
+    """Full source fonts by family key: fonts/NotoSerifSC[wght].ttf or fonts/Cinzel-700.ttf -> "notoserifsc", "cinzel"."""
+    sources = {}
+    if os.path.isdir(fonts_dir):
+        for name in sorted(os.listdir(fonts_dir)):
+            match = FONT_SOURCE_RE.match(name)
+            if match:
+                sources.setdefault(font_key(match.group("family")), []).append(os.path.join(fonts_dir, name))
+    return sources
+
+def subset_font(source, text, out_path):
+    """Write a WOFF2 subset of `source` holding only `text`'s glyphs; returns its @font-face weight/style."""
+    options = font_subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    font = font_subset.load_font(source, options)
+    if "fvar" in font:
+        axis = next((a for a in font["fvar"].axes if a.axisTag == "wght"), None)
+        weight = f"{axis.minValue:g} {axis.maxValue:g}" if axis else "400"
+    else:
+        weight = str(font["OS/2"].usWeightClass)
+    style = "italic" if font["OS/2"].fsSelection & 1 else "normal"
+    subsetter = font_subset.Subsetter(options=options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    font_subset.save_font(font, out_path, options)
+    return {"weight": weight, "style": style}
+
+def plan_fonts(data):
+    """Subsets whose source file or character set changed; the rest are reused from the cache."""
+    if font_subset is None:
+        return None, []
+    cache = load_json_cache(FONTS_CACHE_FILE)
+    sources = font_sources()
+    faces, tasks = [], []
+    for family, chars in sorted(font_charsets(data).items()):
+        for source in sources.get(font_key(family), []):
+            text = "".join(sorted(chars))
+            key = content_hash(file_sha256(source), text)
+            stem = os.path.splitext(os.path.basename(source))[0]
+            out_path = os.path.join(FONTS_OUT_DIR, f"{re.sub(r'[^A-Za-z0-9-]', '', stem)}.{key[:10]}.woff2")
+            cached = cache.get(source)
+            if cached and cached["key"] == key and os.path.exists(out_path):
+                faces.append((family, source, key, out_path, cached["meta"]))
+            else:
+                faces.append((family, source, key, out_path, None))
+                tasks.append((source, text, out_path))
+    return faces, tasks
+
+def finish_fonts(faces, results):
+    """Write fonts.css and drop subsets no face uses anymore."""
+    if faces is None:
+        return {"skipped (fontTools not installed)": 1}
+    results = iter(results)
+    stats = {"subset": 0, "reused": 0}
+    cache, rules = {}, []
+    for family, source, key, out_path, meta in faces:
+        if meta is None:
+            meta = next(results)
+            stats["subset"] += 1
+        else:
+            stats["reused"] += 1
+        cache[source] = {"key": key, "meta": meta}
+        url = "/" + os.path.relpath(out_path, "public").replace(os.sep, "/")
+        rules.append("@font-face {\n"
+                     f'  font-family: "{family}";\n'
+                     f"  font-style: {meta['style']};\n"
+                     f"  font-weight: {meta['weight']};\n"
+                     "  font-display: swap;\n"
+                     f'  src: url("{url}") format("woff2");\n'
+                     "}\n")
+    keep = {os.path.basename(face[3]) for face in faces}
+    if os.path.isdir(FONTS_OUT_DIR):
+        for name in os.listdir(FONTS_OUT_DIR):
+            if name.endswith(".woff2") and name not in keep:
+                os.remove(os.path.join(FONTS_OUT_DIR, name))
+    if rules:
+        os.makedirs(os.path.dirname(FONTS_CSS_FILE), exist_ok=True)
+        write_if_changed(FONTS_CSS_FILE, "/* Generated by `python cms.py export` from fonts/ */\n" + "\n".join(rules))
+    elif os.path.exists(FONTS_CSS_FILE):
+        os.remove(FONTS_CSS_FILE)
+    save_json_cache(FONTS_CACHE_FILE, cache)
+    return stats
+
+def link_local_fonts(dist_dir=DIST_DIR):
+    """Point dist/index.html at the subset fonts, keeping Google Fonts only for families we don't serve."""
+    css_path = os.path.join(dist_dir, "generated", "fonts.css")
+    index_path = os.path.join(dist_dir, "index.html")
+    if not os.path.exists(css_path):
+        return []
+    with open(css_path, 'r', encoding='utf-8') as f:
+        local = {font_key(name) for name in re.findall(r'font-family: "([^"]+)"', f.read())}
+    with open(index_path, 'r', encoding='utf-8') as f:
+        page = f.read()
+
+    def replace(match):
+        params = match.group(1).split("&")
+        remaining = [p for p in params if not (p.startswith("family=") and
+                     font_key(urllib.parse.unquote_plus(p[len("family="):].split(":")[0])) in local)]
+        link = '<link href="/generated/fonts.css" rel="stylesheet">'
+        if any(p.startswith("family=") for p in remaining):
+            link += f'\n    <link href="https://fonts.googleapis.com/css2?{"&".join(remaining)}" rel="stylesheet">'
+        return link
+
+    updated = GOOGLE_FONTS_LINK_RE.sub(replace, page, count=1)
+    if "/generated/fonts.css" not in updated:
+        updated = updated.replace("</head>", '  <link href="/generated/fonts.css" rel="stylesheet">\n  </head>', 1)
+    write_if_changed(index_path, updated)
+    return sorted(local)
+
+
+# ==========================
+# DEPLOY SIZE REPORT
+# ==========================
+# Bytes; any of these can be overridden in size-budgets.json
+DEFAULT_SIZE_BUDGETS = {
+    "data.ts": 250_000,         # bundled into the JS
+    "collection": 150_000,      # one top-level key's share of data.ts
+    "item": 20_000,             # one paper/project/post's share of data.ts
+    "markdown": 100_000,        # one markdown body
+    "upload": 5_000_000,        # one file in public/uploads
+    "uploads": 25_000_000,      # all uploads together
+    "dist": 50_000_000,         # everything in dist/ (without .gz/.br siblings)
+    "dist-js-gzip": 350_000,    # gzipped JS a first visit downloads
+}
+# Growth smaller than this (or than 10%) isn't worth flagging
+REGRESSION_MIN_BYTES = 1024
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def load_size_budgets(path=SIZE_BUDGETS_FILE):
+    budgets = dict(DEFAULT_SIZE_BUDGETS)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            budgets.update(json.load(f))
+    return budgets
+
+def gzip_size(path):
+    if os.path.exists(path + ".gz"):
+        return os.path.getsize(path + ".gz")
+    with open(path, 'rb') as f:
+        return len(gzip.compress(f.read(), compresslevel=9, mtime=0))
+
+def measure_payload(data, dist_dir=None):
+    """Flat {name: bytes} for everything that ships. Names are "<group>/<what>" or a total's name."""
+    sizes = {"data.ts": len(render_ts(data).encode('utf-8'))}
+    for key, value in data.items():
+        sizes[f"collection/{key}"] = len(json.dumps(value, indent=2, default=model_json).encode('utf-8'))
+        if key in ROUTE_SECTIONS:
+            for item in value:
+                sizes[f"item/{key}/{item.get('id', '?')}"] = len(json.dumps(item, indent=2, default=model_json).encode('utf-8'))
+    for path in markdown_files(data):
+        sizes[f"markdown/{path.replace(os.sep, '/')}"] = os.path.getsize(path)
+    uploads = {name: os.path.getsize(os.path.join(UPLOADS_DIR, name)) for name in list_uploads()}
+    for name, size in uploads.items():
+        sizes[f"upload/{name}"] = size
+    sizes["uploads"] = sum(uploads.values())
+    if dist_dir and os.path.isdir(dist_dir):
+        total = js_gzip = 0
+        for folder, _, files in os.walk(dist_dir):
+            for name in files:
+                if name.endswith((".gz", ".br")):
+                    continue
+                path = os.path.join(folder, name)
+                total += os.path.getsize(path)
+                if name.endswith(".js"):
+                    js_gzip += gzip_size(path)
+        sizes["dist"] = total
+        sizes["dist-js-gzip"] = js_gzip
+    return sizes
+
+def budget_key(name):
+    return name if name in DEFAULT_SIZE_BUDGETS else name.split("/", 1)[0]
+
+def over_budget(sizes, budgets):
+    return sorted(((name, size, budgets[budget_key(name)]) for name, size in sizes.items()
+                   if budget_key(name) in budgets and size > budgets[budget_key(name)]), key=lambda row: -row[1])
+
+def size_regressions(sizes, previous, limit=10):
+    """Largest growths since the saved manifest, as (name, old, new); new entries count from zero."""
+    if not previous:
+        return []  # first run: nothing to compare against
+    grown = []
+    for name, size in sizes.items():
+        old = previous.get(name, 0)
+        if size - old >= REGRESSION_MIN_BYTES and (old == 0 or size >= old * 1.1):
+            grown.append((name, old, size))
+    return sorted(grown, key=lambda row: (row[1] - row[2], row[0]))[:limit]
+
+def size_report(data, dist_dir=None, budgets=None):
+    sizes = measure_payload(data, dist_dir)
+    manifest = load_json_cache(SIZE_MANIFEST_FILE)
+    return {
+        "sizes": sizes,
+        "over": over_budget(sizes, budgets or load_size_budgets()),
+        "regressions": size_regressions(sizes, manifest.get("sizes", {})),
+        "since": manifest.get("time"),
+    }
+
+def save_size_manifest(sizes):
+    save_json_cache(SIZE_MANIFEST_FILE, {"time": datetime.datetime.now().isoformat(timespec="seconds"), "sizes": sizes})
+
+def format_size_report(report, top=10):
+    sizes = report["sizes"]
+    lines = ["Deploy payload", "=============="]
+    for total in ("data.ts", "uploads", "dist", "dist-js-gzip"):
+        if total in sizes:
+            lines.append(f"{total:<14}{format_bytes(sizes[total]):>10}")
+    for group, title in (("collection", "By collection (share of data.ts)"), ("item", "Largest entries"),
+                         ("markdown", "Largest markdown bodies"), ("upload", "Largest uploads")):
+        rows = sorted(((name, size) for name, size in sizes.items() if name.startswith(group + "/")), key=lambda row: -row[1])
+        if rows:
+            lines += ["", title]
+            lines += [f"  {format_bytes(size):>10}  {name.split('/', 1)[1]}" for name, size in rows[:top]]
+    lines += ["", "Over budget"]
+    lines += [f"  {name}: {format_bytes(size)} (budget {format_bytes(limit)})" for name, size, limit in report["over"]] or ["  nothing"]
+    lines += ["", f"Biggest growth since {report['since'] or 'last build (none recorded yet)'}"]
+    lines += [f"  {name}: {format_bytes(old)} -> {format_bytes(new)} (+{format_bytes(new - old)})"
+              for name, old, new in report["regressions"]] or ["  nothing"]
+    return "\n".join(lines)
+
+
+# ==========================
+# BUILD OUTPUT: FINGERPRINTING & PRECOMPRESSION
+# ==========================
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# GitHub Pages compresses on the fly and never serves .gz/.br siblings, so they only
+# make the artifact bigger there; opt in (CMS_PRECOMPRESS=1) when hosting somewhere that does
+PRECOMPRESS = os.environ.get("CMS_PRECOMPRESS") == "1"
+COMPRESSIBLE_EXTENSIONS = (".html", ".js", ".css", ".json", ".xml", ".svg", ".txt", ".md", ".webmanifest")
+# Text outputs that may reference uploads or hashed bundles
+REWRITABLE_EXTENSIONS = (".html", ".js", ".css", ".json", ".xml", ".webmanifest", ".md")
+FINGERPRINTED_RE = re.compile(r"\.[0-9a-f]{10}\.\w+$")
+VITE_ASSET_RE = re.compile(r"^(?P<stem>.+)-(?P<hash>[A-Za-z0-9_-]{8})(?P<ext>\.\w+)$")
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fingerprinted_name(name, digest, length=10):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest[:length]}{ext}"
+
+def iter_dist_files(dist_dir, extensions):
+    for folder, _, files in os.walk(dist_dir):
+        for name in sorted(files):
+            if name.endswith(extensions):
+                yield os.path.join(folder, name)
+
+UPLOAD_REDIRECT_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta http-equiv="refresh" content="0; url={url}"><link rel="canonical" href="{url}"></head>
+<body><a href="{url}">{name}</a></body></html>
+"""
+
+def write_upload_redirect(uploads_dir, name, hashed):
+    """dist/uploads/<name>/index.html pointing at the hashed file.
+
+    GitHub Pages answers /uploads/<name> with a redirect to the directory, so
+    old external links still land on the file without shipping it twice.
+    """
+    folder = os.path.join(uploads_dir, name)
+    os.makedirs(folder, exist_ok=True)
+    url = "/uploads/" + urllib.parse.quote(hashed)
+    write_if_changed(os.path.join(folder, "index.html"),
+                     UPLOAD_REDIRECT_TEMPLATE.format(url=html.escape(url), name=html.escape(name)))
+
+def dist_upload_sha256(path, name):
+    """Hash of a built upload, reusing public/uploads' recorded hash when the build copied it unchanged."""
+    source = os.path.join(UPLOADS_DIR, name)
+    try:
+        src, dst = os.stat(source), os.stat(path)
+    except FileNotFoundError:
+        return file_sha256(path)
+    # The copy was made after the source's last change, so it has the same bytes
+    if src.st_size == dst.st_size and src.st_mtime_ns <= dst.st_mtime_ns:
+        return upload_sha256(name)
+    return file_sha256(path)
+
+def fingerprint_uploads(dist_dir=DIST_DIR):
+    """Rename dist/uploads/<name> to <stem>.<hash><ext> and point generated files at the new names.
+
+    The site references the content-hashed names, which can be cached forever;
+    each original name is left as a tiny redirect page so existing external
+    links keep working. Returns the {old_url: new_url} mapping (including
+    uploads renamed by an earlier run over the same dist/).
+    """
+    uploads_dir = os.path.join(dist_dir, "uploads")
+    if not os.path.isdir(uploads_dir):
+        return {}
+    previous = load_json_cache(os.path.join(dist_dir, "asset-manifest.json"))
+    mapping = {old[len("/uploads/"):]: new[len("/uploads/"):] for old, new in previous.items()
+               if os.path.isfile(os.path.join(uploads_dir, new[len("/uploads/"):]))}
+    for name in sorted(os.listdir(uploads_dir)):
+        path = os.path.join(uploads_dir, name)
+        if not os.path.isfile(path) or FINGERPRINTED_RE.search(name) or name.endswith((".gz", ".br")):
+            continue
+        hashed = fingerprinted_name(name, dist_upload_sha256(path, name))
+        os.replace(path, os.path.join(uploads_dir, hashed))
+        mapping[name] = hashed
+    rewritten = set()
+    rewrite = upload_links_rewriter(mapping)
+    for path in iter_dist_files(dist_dir, REWRITABLE_EXTENSIONS):
+        if os.path.basename(path) == "asset-manifest.json":
+            continue  # lists the original names on purpose
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        updated = rewrite(text) if "/uploads/" in text else text
+        if updated != text:
+            write_text_atomic(path, updated)
+            rewritten.add(os.path.relpath(path, dist_dir).replace(os.sep, "/"))
+    for name, hashed in mapping.items():
+        write_upload_redirect(uploads_dir, name, hashed)
+    rehash_vite_assets(dist_dir, rewritten)
+    return {f"/uploads/{old}": f"/uploads/{new}" for old, new in mapping.items()}
+
+def rehash_vite_assets(dist_dir, changed):
+    """Rename hashed Vite bundles whose content we changed, so their names match their bytes again.
+
+    Renaming a chunk changes every chunk that imports it, so the renames are
+    propagated up the importer graph round by round until no name is stale.
+    """
+    renames = {}
+    # Import cycles can never settle (each rename changes the other side); every
+    # round still leaves references consistent, so stop after one pass per file
+    rounds = len(changed) + sum(1 for _ in iter_dist_files(os.path.join(dist_dir, "assets"), REWRITABLE_EXTENSIONS)) + 1
+    while changed and rounds:
+        rounds -= 1
+        round_renames = {}
+        for rel_path in sorted(changed):
+            folder, name = os.path.split(rel_path)
+            match = VITE_ASSET_RE.match(name)
+            if not folder.endswith("assets") or not match or not os.path.isfile(os.path.join(dist_dir, rel_path)):
+                continue
+            digest = file_sha256(os.path.join(dist_dir, rel_path))[:8]
+            new_name = f"{match.group('stem')}-{digest}{match.group('ext')}"
+            if new_name != name:
+                os.replace(os.path.join(dist_dir, rel_path), os.path.join(dist_dir, folder, new_name))
+                round_renames[name] = new_name
+        if not round_renames:
+            break
+        # Keep renames keyed by the name Vite emitted, whatever round renamed it last
+        originals = {current: original for original, current in renames.items()}
+        for name, new_name in round_renames.items():
+            renames[originals.get(name, name)] = new_name
+        # Whatever references a renamed chunk is the next round's candidate
+        pattern = re.compile("|".join(re.escape(name) for name in sorted(round_renames, key=len, reverse=True)))
+        changed = set()
+        for path in iter_dist_files(dist_dir, REWRITABLE_EXTENSIONS):
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            updated = pattern.sub(lambda m: round_renames[m.group(0)], text)
+            if updated != text:
+                write_text_atomic(path, updated)
+                changed.add(os.path.relpath(path, dist_dir).replace(os.sep, "/"))
+    if renames:
+        write_text_atomic(os.path.join(dist_dir, "asset-renames.json"), json.dumps(renames, indent=2))
+
+def compress_file(path):
+    """Write .gz (and .br when brotli is installed) next to a file; skips up-to-date or non-shrinking output."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    written = []
+    encoders = [(".gz", lambda b: gzip.compress(b, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append((".br", lambda b: brotli.compress(b, quality=11)))
+    for suffix, encode in encoders:
+        target = path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+            continue
+        encoded = encode(raw)
+        if len(encoded) < len(raw):
+            with open(target, 'wb') as f:
+                f.write(encoded)
+            written.append(target)
+    return written
+
+# ==========================
+# OFFLINE PRECACHE (SERVICE WORKER)
+# ==========================
+# public/sw.js reads this manifest; its version line gets stamped so each deploy reinstalls it
+PRECACHE_MANIFEST_NAME = "precache-manifest.json"
+PRECACHE_MAX_UPLOAD_BYTES = 512 * 1024
+SW_VERSION_RE = re.compile(r"^const PRECACHE_VERSION = '[^']*';", re.MULTILINE)
+
+def publish_markdown(data, dist_dir=DIST_DIR):
+    """Copy file-backed markdown bodies into dist/ at the path the pages fetch them from."""
+    copied = []
+    for collection in ROUTE_SECTIONS:
+        for item in data.get(collection, []):
+            path, _ = markdown_source(item)
+            if path is None:
+                continue
+            target = os.path.join(dist_dir, path)
+            source_stat = os.stat(path)
+            try:
+                target_stat = os.stat(target)
+                if (target_stat.st_size, target_stat.st_mtime_ns) == (source_stat.st_size, source_stat.st_mtime_ns):
+                    continue
+            except FileNotFoundError:
+                pass
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(path, target)
+            copied.append(path)
+    return copied
+
+def precache_candidates(dist_dir):
+    """dist/-relative paths worth keeping offline: app shell, generated data, markdown, small uploads."""
+    for path in iter_dist_files(dist_dir, ""):
+        rel_path = os.path.relpath(path, dist_dir).replace(os.sep, "/")
+        top = rel_path.split("/", 1)[0]
+        if rel_path.endswith((".gz", ".br", ".map")):
+            continue
+        if rel_path == "index.html" or top in ("assets", "generated"):
+            yield rel_path
+        elif rel_path.endswith(".md") and top != "uploads":
+            yield rel_path
+        elif top == "uploads" and FINGERPRINTED_RE.search(rel_path) and os.path.getsize(path) <= PRECACHE_MAX_UPLOAD_BYTES:
+            # Only the hashed copies; the site links to those after fingerprinting
+            yield rel_path
+
+def write_precache_manifest(dist_dir=DIST_DIR):
+    """Write dist/precache-manifest.json ({url, hash, size} per file) and stamp its version into dist/sw.js."""
+    manifest_path = os.path.join(dist_dir, PRECACHE_MANIFEST_NAME)
+    previous = {entry["url"]: entry["hash"] for entry in load_json_cache(manifest_path).get("entries", [])}
+    entries = []
+    for rel_path in sorted(precache_candidates(dist_dir)):
+        path = os.path.join(dist_dir, rel_path)
+        entries.append({"url": "/" + urllib.parse.quote(rel_path), "hash": file_sha256(path)[:16], "size": os.path.getsize(path)})
+    version = content_hash([[entry["url"], entry["hash"]] for entry in entries])[:12]
+    write_if_changed(manifest_path, json.dumps({"version": version, "entries": entries}, indent=2, ensure_ascii=False))
+
+    sw_path = os.path.join(dist_dir, "sw.js")
+    if os.path.exists(sw_path):
+        with open(sw_path, 'r', encoding='utf-8') as f:
+            script = f.read()
+        write_if_changed(sw_path, SW_VERSION_RE.sub(f"const PRECACHE_VERSION = '{version}';", script, count=1))
+    changed = sum(1 for entry in entries if previous.get(entry["url"]) != entry["hash"])
+    return {"precached": len(entries), "changed": changed}
+
+# ==========================
+# EXPORT ENGINE
+# ==========================
+def default_workers():
+    try:
+        return max(1, int(os.environ.get("CMS_WORKERS", "")))
+    except ValueError:
+        return os.cpu_count() or 1
+
+def run_task_batch(func, batch):
+    # Module-level so the pool can pickle it
+    return [func(*args) for args in batch]
+
+class ExportStage:
+    """One node of the export graph.
+
+    plan(ctx) runs in this process and returns a list of argument tuples;
+    each is handed to task() on the worker pool. finish(ctx, results) then
+    gets the results in plan order, so output never depends on scheduling.
+    Stages without a task just return their result from plan().
+    """
+    def __init__(self, name, plan, task=None, finish=None, after=()):
+        self.name = name
+        self.plan = plan
+        self.task = task
+        self.finish = finish
+        self.after = tuple(after)
+
+class ExportEngine:
+    def __init__(self, stages, workers=None, log=print):
+        self.stages = {stage.name: stage for stage in stages}
+        self.workers = workers or default_workers()
+        self.log = log
+
+    def run(self, ctx):
+        """Run every stage once its dependencies are done; returns {stage name: result}."""
+        ctx.setdefault("results", {})
+        waiting = dict(self.stages)
+        running = {}  # name -> (futures, batch sizes)
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            while waiting or running:
+                # Dependencies outside this engine's stage set are treated as satisfied
+                ready = [name for name, stage in waiting.items()
+                         if not any(dep in waiting or dep in running for dep in stage.after if dep in self.stages)]
+                if not ready and not running:
+                    raise ValueError(f"Export stages have a dependency cycle: {', '.join(waiting)}")
+                for name in ready:
+                    stage = waiting.pop(name)
+                    started = time.perf_counter()
+                    planned = stage.plan(ctx)
+                    if stage.task is None:
+                        self.complete(ctx, stage, planned, started)
+                    elif pool is None or len(planned) < 2:
+                        self.complete(ctx, stage, stage.finish(ctx, run_task_batch(stage.task, planned)), started)
+                    else:
+                        size = max(1, len(planned) // (self.workers * 4))
+                        batches = [planned[i:i + size] for i in range(0, len(planned), size)]
+                        futures = [pool.submit(run_task_batch, stage.task, batch) for batch in batches]
+                        running[name] = (futures, started)
+                if not running:
+                    continue
+                pending = [future for futures, _ in running.values() for future in futures]
+                concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for name, (futures, started) in list(running.items()):
+                    if all(future.done() for future in futures):
+                        del running[name]
+                        results = [item for future in futures for item in future.result()]
+                        stage = self.stages[name]
+                        self.complete(ctx, stage, stage.finish(ctx, results), started)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        return ctx["results"]
+
+    def complete(self, ctx, stage, result, started):
+        ctx["results"][stage.name] = result
+        self.log(f"[{stage.name}] {describe_stage_result(result)} ({time.perf_counter() - started:.2f}s)")
+
+def describe_stage_result(result):
+    if isinstance(result, dict) and result and all(isinstance(v, int) for v in result.values()):
+        return ", ".join(f"{value} {key}" for key, value in result.items())
+    if isinstance(result, (list, dict)):
+        return f"{len(result)} item(s)"
+    return "done"
+
+def stage_data(ctx):
+    write_exports(ctx["data"])
+    return [DATA_FILE, TS_FILE]
+
+def plan_prerender_stage(ctx):
+    ctx["prerender"], tasks = plan_prerender(ctx["data"], ctx["dist"])
+    return tasks
+
+def plan_related_stage(ctx):
+    docs = related_documents(ctx["data"])
+    ctx["related"] = docs
+    return [(text,) for _, _, text in docs]
+
+def finish_related_stage(ctx, counts):
+    docs = ctx["related"]
+    related = compute_related([key for key, _, _ in docs], [tags for _, tags, _ in docs], counts)
+    write_related(related)
+    return related
+
+def plan_analyze_stage(ctx):
+    ctx["analyze"], tasks = plan_content_stats(ctx["data"])
+    return tasks
+
+def plan_fonts_stage(ctx):
+    ctx["fonts"], tasks = plan_fonts(ctx["data"])
+    return tasks
+
+def plan_feeds_stage(ctx):
+    ctx["feeds"], tasks = plan_feeds(ctx["data"], ctx["dist"])
+    return tasks
+
+def stage_fingerprint(ctx):
+    mapping = fingerprint_uploads(ctx["dist"])
+    write_if_changed(os.path.join(ctx["dist"], "asset-manifest.json"), json.dumps(mapping, indent=2, ensure_ascii=False))
+    return mapping
+
+def plan_compress_stage(ctx):
+    if not PRECOMPRESS:
+        return []
+    return [(path,) for path in iter_dist_files(ctx["dist"], COMPRESSIBLE_EXTENSIONS)]
+
+def stage_budget(ctx):
+    """Check the finished build against the budgets and record its sizes for the next comparison."""
+    report = size_report(ctx["data"], ctx["dist"])
+    for name, size, limit in report["over"]:
+        ctx.get("log", print)(f"Over budget: {name} is {format_bytes(size)} (budget {format_bytes(limit)})")
+    for name, old, new in report["regressions"][:5]:
+        ctx.get("log", print)(f"Grew: {name} {format_bytes(old)} -> {format_bytes(new)}")
+    save_size_manifest(report["sizes"])
+    return {"over budget": len(report["over"]), "regressions": len(report["regressions"])}
+
+def export_stages():
+    """The full pipeline. Order of this list doesn't matter; `after` does."""
+    return [
+        ExportStage("data", stage_data),
+        ExportStage("related", plan_related_stage, term_counts, finish_related_stage),
+        ExportStage("analyze", plan_analyze_stage, analyze_item_markdown,
+                    lambda ctx, analyzed: finish_content_stats(ctx["analyze"], analyzed)),
+        ExportStage("facets", lambda ctx: write_facet_index(ctx["data"])),
+        ExportStage("prefetch", lambda ctx: write_prefetch_manifest(ctx["data"]), after=("related", "analyze", "facets")),
+        ExportStage("fonts", plan_fonts_stage, subset_font, lambda ctx, faces: finish_fonts(ctx["fonts"], faces)),
+        ExportStage("font-links", lambda ctx: link_local_fonts(ctx["dist"]), after=("fonts",)),
+        ExportStage("prerender", plan_prerender_stage, render_route_fragment,
+                    lambda ctx, fragments: finish_prerender(ctx["prerender"], fragments), after=("data", "font-links")),
+        ExportStage("feeds", plan_feeds_stage, render_feed_entry,
+                    lambda ctx, entries: finish_feeds(ctx["feeds"], entries), after=("data",)),
+        ExportStage("markdown", lambda ctx: publish_markdown(ctx["data"], ctx["dist"])),
+        ExportStage("fingerprint", stage_fingerprint, after=("prerender", "feeds", "markdown")),
+        ExportStage("precache", lambda ctx: write_precache_manifest(ctx["dist"]), after=("fingerprint", "markdown")),
+        ExportStage("compress", plan_compress_stage, compress_file,
+                    lambda ctx, written: [path for paths in written for path in paths], after=("precache",)),
+        ExportStage("budget", stage_budget, after=("compress",)),
+    ]
+
+# Stages that feed into `npm run build`
+PREBUILD_STAGES = ("data", "related", "analyze", "facets", "prefetch", "fonts")
+# The generated indexes the dev server serves from public/generated/ (data.ts is written by the store)
+INDEX_STAGES = ("related", "analyze", "facets", "prefetch", "fonts")
+# Stages that read dist/, i.e. need `npm run build` first
+DIST_STAGES = ("font-links", "prerender", "feeds", "markdown", "fingerprint", "precache", "compress", "budget")
+
+def run_export(data, stages=None, dist_dir=DIST_DIR, workers=None, log=print):
+    selected = [stage for stage in export_stages() if stages is None or stage.name in stages]
+    return ExportEngine(selected, workers, log).run({"data": data, "dist": dist_dir, "log": log})
+
+def postbuild(data, dist_dir=DIST_DIR, workers=None, log=print):
+    """Everything that runs on dist/ after `npm run build`."""
+    results = run_export(data, DIST_STAGES, dist_dir, workers, log)
+    if PRECOMPRESS and brotli is None:
+        log(f"Wrote {len(results['compress'])} precompressed file(s) (gzip only; install brotli for .br).")
+    return results
+
+
+# ==========================
+# NODE & NPM DEPENDENCIES
+# ==========================
+def node_probe_key(node_path):
+    """Everything that can change which node actually runs, without spawning it."""
+    real_path = os.path.realpath(node_path)
+    st = os.stat(real_path)
+    parts = [real_path, str(st.st_size), str(st.st_mtime_ns), os.environ.get("PATH", "")]
+    parts += [os.environ.get(name, "") for name in NODE_VERSION_ENV]
+    for name in NODE_VERSION_FILES:
+        parts.append(file_sha256(name) if os.path.isfile(name) else "")
+    return content_hash(*parts)
+
+def probe_node_environment(refresh=False):
+    """Node version (and on Windows, every node/npm on PATH); None if node isn't installed.
+
+    Spawning node costs a noticeable fraction of a second on every launch, so the
+    result is cached until the node binary, PATH or a version-manager pin changes.
+    `refresh` skips the cache.
+    """
+    node_path = shutil.which("node")
+    if not node_path:
+        return None
+    key = node_probe_key(node_path)
+    cached = load_json_cache(NODE_PROBE_CACHE_FILE)
+    if not refresh and cached.get("key") == key:
+        return cached
+    probe = {"key": key, "version": subprocess.check_output([node_path, "-v"], text=True).strip()}
+    if platform.system() == "Windows":
+        probe["node_paths"] = subprocess.check_output(["where", "node"], text=True).strip().split('\n')
+        probe["npm_paths"] = subprocess.check_output(["where", "npm"], text=True).strip().split('\n')
+    save_json_cache(NODE_PROBE_CACHE_FILE, probe)
+    return probe
+
+def dependency_fingerprint(refresh=False):
+    """Hash of the npm manifests plus the node version; changes whenever node_modules could be stale."""
+    digest = hashlib.sha256()
+    for name in NPM_MANIFESTS:
+        digest.update(name.encode('utf-8') + b"\0")
+        if os.path.isfile(name):
+            digest.update(file_sha256(name).encode('ascii'))
+        digest.update(b"\0")
+    # Native modules are built against one node, so switching versions needs a reinstall too
+    probe = probe_node_environment(refresh)
+    digest.update((probe or {}).get("version", "").encode('utf-8'))
+    return digest.hexdigest()
+
+def npm_install_plan():
+    """(npm args, reason) if node_modules needs (re)installing, else (None, None)."""
+    fingerprint = dependency_fingerprint()
+    installed = load_json_cache(NPM_INSTALL_STATE_FILE).get("fingerprint")
+    if installed != fingerprint:
+        # Ask node itself before reinstalling, in case the cached version was stale
+        fingerprint = dependency_fingerprint(refresh=True)
+    if not os.path.isdir("node_modules"):
+        reason = "node_modules is missing"
+    elif installed != fingerprint:
+        reason = "package.json, package-lock.json or the node version changed since the last install"
+    else:
+        return None, None
+    # npm ci installs exactly what the lockfile says, from scratch
+    args = ["ci"] if os.path.isfile("package-lock.json") else ["install"]
+    return args, reason
+
+def record_npm_install():
+    save_json_cache(NPM_INSTALL_STATE_FILE, {"fingerprint": dependency_fingerprint(refresh=True),
+                                             "installed": datetime.datetime.now().isoformat(timespec="seconds")})
+
 
 class WebsiteCMS:
-    def __init__(self, root):
+    def __init__(self, root, store=None):
         self.root = root
         self.root.title("Portfolio Website CMS")
         self.root.geometry("1100x850")
+        self.store = store or JSONStore()
         
         # Load Data
         self.data = self.load_data()
+        self.journal = ChangeJournal()
+        self._path_cache = {}
+        self._pending_syncs = set()
+        self._index_lock = threading.Lock()
+        self._facet_counts = {}
+        self.list_refreshers = {}
+        pending = len(self.journal.pending_ops())
+        if pending and messagebox.askyesno("Recover Changes", f"Found {pending} unsaved change(s) from a previous session.\nRestore them?"):
+            restored, skipped = self.journal.recover(self.data)
+            if skipped:
+                messagebox.showwarning("Recover Changes", f"Restored {restored} change(s).\n"
+                                       f"Skipped {skipped} that no longer match the saved data (it was changed or replaced since).")
+        else:
+            self.journal.discard()
+        loaded = {key: json.dumps(value, default=model_json) for key, value in self.data.items()}
         
         # UI Setup
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(expand=True, fill='both', padx=10, pady=10)
+        self.build_tabs()
+
+        # Tabs fill in missing defaults; make sure those reach the next save
+        for key, value in self.data.items():
+            if loaded.get(key) != json.dumps(value, default=model_json):
+                self.journal.mark_dirty([key])
         
-        # Tabs
+        # Bottom Action Bar
+        self.create_bottom_bar()
+        self.root.bind_all("<Control-z>", lambda e: self.undo())
+        self.root.bind_all("<Control-y>", lambda e: self.redo())
+
+        # Check Environment on Startup
+        self.check_environment()
+
+    def build_tabs(self):
         self.create_home_tab()
         self.create_homepage_tab()
         self.create_profile_tab()
@@ -42,18 +3432,34 @@ class WebsiteCMS:
         self.create_file_manager_tab()
         self.create_tag_manager_tab()
         self.create_post_editor_tab()
-        
-        # Bottom Action Bar
-        self.create_bottom_bar()
 
-        # Check Environment on Startup
-        self.check_environment()
+    def debounce(self, func, delay_ms=ENTRY_DEBOUNCE_MS):
+        return Debouncer(self.root, delay_ms, func, self._pending_syncs)
+
+    def flush_pending_changes(self):
+        """Push any debounced widget edits into self.data right now."""
+        for debouncer in list(self._pending_syncs):
+            debouncer.flush()
+
+    def rebuild_tabs(self):
+        """Recreate all tabs so widgets reflect self.data after an undo/redo."""
+        self.flush_pending_changes()
+        current = self.notebook.index(self.notebook.select()) if self.notebook.tabs() else 0
+        self.root.unbind_all("<KeyRelease>")
+        for tab in self.notebook.tabs():
+            self.notebook.nametowidget(tab).destroy()
+        self.build_tabs()
+        self.notebook.select(min(current, len(self.notebook.tabs()) - 1))
 
     def check_environment(self):
         """Diagnose Node/NPM environment issues."""
         try:
+            probe = probe_node_environment()
+            if probe is None:
+                print("Environment check failed: node was not found in your PATH.")
+                return
             # 1. Check Node Version
-            node_output = subprocess.check_output(["node", "-v"], text=True).strip()
+            node_output = probe["version"]
             # output looks like "v18.16.0"
             match = re.search(r'v(\d+)\.', node_output)
             if match:
@@ -67,9 +3473,8 @@ class WebsiteCMS:
             
             # 2. Check NPM path to detect 'Zombie Node' issues
             if platform.system() == "Windows":
-                npm_where = subprocess.check_output(["where", "npm"], text=True).strip().split('\n')
-                node_where = subprocess.check_output(["where", "node"], text=True).strip().split('\n')
-                
+                node_where = probe["node_paths"]
+
                 # If 'where node' returns a path different from NVM but NVM is installed, warn user
                 if len(node_where) > 1 or ("nvm" in node_where[0].lower() and major > 22):
                      print(f"Debug: Node paths found: {node_where}")
@@ -86,10 +3491,22 @@ class WebsiteCMS:
         self.status_label = ttk.Label(btn_frame, text="Ready", font=("Arial", 9, "italic"))
         self.status_label.pack(side='bottom', anchor='w', padx=5, pady=(5,0))
 
+        # Shown only while an upload is streaming in the background
+        self.upload_cancel = None
+        self.cancel_upload_btn = ttk.Button(btn_frame, text="Cancel Upload", command=lambda: self.upload_cancel and self.upload_cancel.set())
+
+        # Undo / Redo
+        ttk.Button(btn_frame, text="Undo", command=self.undo).pack(side='left', padx=(0, 5))
+        ttk.Button(btn_frame, text="Redo", command=self.redo).pack(side='left', padx=(0, 5))
+
         # Open Preview Button
         self.preview_btn = ttk.Button(btn_frame, text="OPEN PREVIEW (Launch Server)", command=self.handle_preview)
         self.preview_btn.pack(side='left', fill='x', expand=True, padx=(0, 5))
 
+        # Build Button
+        self.build_btn = ttk.Button(btn_frame, text="BUILD SITE", command=self.handle_build)
+        self.build_btn.pack(side='left', fill='x', expand=True, padx=(0, 5))
+
         # Save Button
         save_btn = ttk.Button(btn_frame, text="SAVE ALL CHANGES", command=self.save_data)
         save_btn.pack(side='right', fill='x', expand=True, padx=(5, 0))
@@ -104,11 +3521,8 @@ class WebsiteCMS:
 
     def run_preview_workflow(self):
         try:
-            cwd = os.getcwd()
-            node_modules_path = os.path.join(cwd, "node_modules")
-            if not os.path.isdir(node_modules_path):
-                self.update_status("Installing dependencies (npm install)...")
-                self.run_npm_command(["install"])
+            self.ensure_dependencies()
+            self.regenerate_indexes()
             self.update_status("Starting development server (npm start)...")
             self.run_npm_command(["start"], background=True)
             time.sleep(2)
@@ -124,6 +3538,49 @@ class WebsiteCMS:
             self.update_status("Ready")
             self.root.after(0, self.reset_preview_btn)
 
+    def handle_build(self):
+        self.flush_pending_changes()
+        # npm bundles data.ts from disk, so every stage has to see the saved content too
+        if self.journal.changes():
+            answer = messagebox.askyesnocancel(
+                "Unsaved Changes",
+                "The build uses saved content only.\n\n"
+                "Yes: save your changes, then build\n"
+                "No: build without them\n"
+                "Cancel: don't build")
+            if answer is None or (answer and not self.save_data()):
+                return
+        self.build_btn.config(state="disabled")
+        self.update_status("Building site (npm run build)...")
+        threading.Thread(target=self.run_build_workflow, daemon=True).start()
+
+    def run_build_workflow(self):
+        try:
+            data = self.store.load()
+            with self._index_lock:
+                run_export(data, INDEX_STAGES, log=self.update_status)
+            self.ensure_dependencies()
+            self.update_status("Building site (npm run build)...")
+            self.run_npm_command(["run", "build"])
+            postbuild(data, log=self.update_status)
+        except subprocess.CalledProcessError as e:
+            self.root.after(0, lambda e=e: messagebox.showerror("Error", f"Build failed: {e}"))
+        except FileNotFoundError as e:
+            self.root.after(0, lambda e=e: messagebox.showerror("Error", f"Build failed: {e}"))
+        except Exception as e:
+            self.root.after(0, lambda e=e: messagebox.showerror("Error", f"Post-build step failed: {e}"))
+        finally:
+            self.root.after(0, lambda: self.build_btn.config(state="normal"))
+
+    def ensure_dependencies(self):
+        """Run npm ci/install only when the manifests changed since the last successful install."""
+        args, reason = npm_install_plan()
+        if args is None:
+            return
+        self.update_status(f"Installing dependencies (npm {' '.join(args)}): {reason}...")
+        self.run_npm_command(args)
+        record_npm_install()
+
     def run_npm_command(self, args, background=False):
         cwd = os.getcwd()
         system = platform.system()
@@ -148,33 +3605,138 @@ class WebsiteCMS:
     # DATA HANDLING
     # ==========================
     def load_data(self):
+        lock = StoreLock()
         try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            while True:
+                try:
+                    # Versions seen at load time are what save_data checks other editors' saves against
+                    with lock:
+                        data = self.store.load()
+                        self.base_versions = self.store.versions()
+                    return data
+                except TimeoutError as e:
+                    if not messagebox.askyesno(
+                            "Content Locked",
+                            f"{e}\n\nIf no other editor is really saving (e.g. it crashed), break the lock and continue?\n"
+                            "No quits without opening the CMS."):
+                        raise SystemExit(1)
+                    lock.break_lock()
         except FileNotFoundError:
             messagebox.showerror("Error", f"Could not find {DATA_FILE}")
+            self.base_versions = {}
             return {}
 
     def save_data(self):
-        # 1. Save to JSON
-        try:
-            with open(DATA_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save JSON: {e}")
-            return
+        """Save every journaled change; returns True once the store has them."""
+        self.flush_pending_changes()
+        changes = self.journal.changes()
+        if not changes:
+            self.status_label.config(text="No changes since last save.")
+            return True
 
-        # 2. Save to TS
+        # Store writes its source (data.json or content.db), then regenerates data.json + data.ts.
+        # Sections another editor saved in the meantime are merged in first.
         try:
-            ts_content = f"const data = {json.dumps(self.data, indent=2)};\nexport default data;"
-            with open(TS_FILE, 'w', encoding='utf-8') as f:
-                f.write(ts_content)
-            
-            self.status_label.config(text="Changes saved successfully.")
-            messagebox.showinfo("Success", "Website updated successfully!")
-                
+            result = merge_and_save(self.store, self.data, self.base_versions, changes, self.resolve_conflicts)
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save TS: {e}")
+            messagebox.showerror("Error", f"Failed to save ({self.store.name}): {e}")
+            return False
+        if result is None:
+            self.status_label.config(text="Save cancelled; nothing was written.")
+            return False
+
+        self.base_versions, adopted = result
+        self.journal.mark_saved()
+        # Keep public/generated/ in step with data.ts so a running `npm start` sees the new entries
+        threading.Thread(target=self.regenerate_indexes, daemon=True).start()
+        if adopted:
+            self.journal.forget(adopted)
+            self.rebuild_tabs()
+            self.status_label.config(text=f"Changes saved; merged newer {', '.join(adopted)} from another editor.")
+            messagebox.showinfo("Success", f"Website updated successfully!\n\nAlso picked up changes another editor saved to: {', '.join(adopted)}")
+            return True
+        self.status_label.config(text="Changes saved successfully.")
+        messagebox.showinfo("Success", "Website updated successfully!")
+        return True
+
+    def regenerate_indexes(self):
+        """Rebuild the generated indexes (related, stats, facets, prefetch) from what's saved."""
+        with self._index_lock:
+            try:
+                run_export(self.store.load(), INDEX_STAGES, log=lambda message: None)
+            except Exception as e:
+                self.update_status(f"Couldn't refresh generated indexes: {e}")
+
+    def resolve_conflicts(self, keys):
+        answer = messagebox.askyesnocancel(
+            "Conflicting Edits",
+            f"Someone else saved changes to {', '.join(keys)} while you were editing.\n\n"
+            "Yes: keep your version (overwrites theirs)\n"
+            "No: take their version (drops your edits there)\n"
+            "Cancel: don't save yet")
+        if answer is None:
+            return None
+        return "mine" if answer else "theirs"
+
+    # ==========================
+    # JOURNALED EDITS
+    # ==========================
+    def locate(self, obj):
+        """Key path of a dict/list inside self.data (None for local, unsaved dicts)."""
+        path = self._path_cache.get(id(obj))
+        if path is not None and resolve_path(self.data, path) is obj:
+            return path
+        path = find_path(self.data, obj)
+        if path is not None:
+            self._path_cache[id(obj)] = path
+        return path
+
+    def set_field(self, data_dict, key, value):
+        path = self.locate(data_dict)
+        if path is not None:
+            self.journal.record_set(path + [key], data_dict.get(key), value, created=key not in data_dict)
+        data_dict[key] = value
+
+    def insert_item(self, items, index, value):
+        path = self.locate(items)
+        value = model_at(path + [index], value) if path is not None else value
+        items.insert(index, value)
+        if path is not None:
+            self.journal.record_insert(path, index, value)
+
+    def insert_items(self, items, index, values):
+        """Bulk insert recorded as one journal op, so a whole import undoes in one step."""
+        path = self.locate(items)
+        if path is not None:
+            values = [model_at(path + [index + i], value) for i, value in enumerate(values)]
+        items[index:index] = values
+        if path is not None:
+            self.journal.record_insert_many(path, index, values)
+
+    def remove_item_at(self, items, index):
+        path = self.locate(items)
+        value = items.pop(index)
+        if path is not None:
+            self.journal.record_remove(path, index, value)
+        return value
+
+    def move_item(self, items, src, dst):
+        path = self.locate(items)
+        items.insert(dst, items.pop(src))
+        if path is not None:
+            self.journal.record_move(path, src, dst)
+
+    def undo(self):
+        self.flush_pending_changes()
+        if self.journal.undo(self.data):
+            self.rebuild_tabs()
+            self.update_status("Undid last change.")
+
+    def redo(self):
+        self.flush_pending_changes()
+        if self.journal.redo(self.data):
+            self.rebuild_tabs()
+            self.update_status("Redid change.")
 
     # ==========================
     # HELPER: SCROLLABLE FRAME
@@ -206,20 +3768,7 @@ class WebsiteCMS:
         
         frame = self.create_scrollable_frame(tab)
         
-        if "hero" not in self.data:
-            self.data["hero"] = {"headline": "", "subheadline": ""}
-        
-        hero_data = self.data["hero"]
-        hero_defaults = {
-            "headlineFontEng": "Cinzel",
-            "headlineFontCn": "\"Noto Serif SC\"",
-            "headlineSize": "text-5xl md:text-7xl lg:text-8xl",
-            "subheadlineFontEng": "\"Palatino Linotype\"",
-            "subheadlineFontCn": "\"Noto Serif SC\"",
-            "subheadlineSize": "text-xl md:text-2xl lg:text-3xl"
-        }
-        for key, value in hero_defaults.items():
-            hero_data.setdefault(key, value)
+        hero_data = self.data.setdefault("hero", Hero()).fill_defaults()
         
         ttk.Label(frame, text="Homepage Hero Section", font=("Arial", 14, "bold")).pack(pady=10, anchor='w')
         
@@ -310,32 +3859,14 @@ class WebsiteCMS:
                 selected = label_to_entry.get(label)
                 if selected:
                     featured_entry = homepage_data.setdefault("featuredEntry", {})
-                    featured_entry["type"] = selected["type"]
-                    featured_entry["id"] = selected["id"]
+                    self.set_field(featured_entry, "type", selected["type"])
+                    self.set_field(featured_entry, "id", selected["id"])
             featured_var.trace_add("write", on_featured_change)
 
-            self.add_entry(featured_section, "Featured Image Override (Optional)", homepage_data["featuredEntry"], "imageOverride")
+            self.add_image_selector(featured_section, "Featured Image Override (Optional)", homepage_data["featuredEntry"], "imageOverride")
     
     def ensure_homepage_data(self):
-        if "homepage" not in self.data:
-            self.data["homepage"] = {}
-        homepage = self.data["homepage"]
-        default_featured = self.get_default_featured_entry()
-        homepage.setdefault("tabTitle", "Harry Luo | Researcher")
-        homepage.setdefault("projectsDescription", "Fun projects that I do")
-        homepage.setdefault("recentMode", "auto")
-        homepage.setdefault("recentAutoLimit", 3)
-        recent_entries = homepage.setdefault("recentManualEntries", [])
-        # Migrate old entries...
-        if "featuredEntry" not in homepage:
-            homepage["featuredEntry"] = default_featured
-        else:
-            featured = homepage["featuredEntry"]
-            featured.setdefault("type", default_featured.get("type", "project"))
-            featured.setdefault("id", default_featured.get("id", ""))
-            featured.setdefault("imageOverride", "")
-            homepage["featuredEntry"] = featured
-        return homepage
+        return self.data.setdefault("homepage", HomepageConfig()).fill_defaults()
 
     def refresh_manual_list(self):
         self.manual_listbox.delete(0, tk.END)
@@ -344,22 +3875,26 @@ class WebsiteCMS:
             self.manual_listbox.insert(tk.END, display)
 
     def add_manual_entry(self):
+        self.flush_pending_changes()
         new_item = {"title": "New Entry", "dateLabel": "", "description": "", "link": "", "ctaLabel": "", "imageUrl": ""}
-        self.homepage_data["recentManualEntries"].append(new_item)
+        entries = self.homepage_data["recentManualEntries"]
+        self.insert_item(entries, len(entries), new_item)
         self.refresh_manual_list()
         last_index = len(self.homepage_data["recentManualEntries"]) - 1
         self.manual_listbox.select_set(last_index)
         self.on_manual_select()
 
     def remove_manual_entry(self):
+        self.flush_pending_changes()
         selection = self.manual_listbox.curselection()
         if not selection:
             return
-        del self.homepage_data["recentManualEntries"][selection[0]]
+        self.remove_item_at(self.homepage_data["recentManualEntries"], selection[0])
         self.refresh_manual_list()
         self.on_manual_select()
 
     def move_manual_entry(self, direction):
+        self.flush_pending_changes()
         selection = self.manual_listbox.curselection()
         if not selection:
             return
@@ -367,12 +3902,13 @@ class WebsiteCMS:
         new_idx = idx + direction
         entries = self.homepage_data["recentManualEntries"]
         if 0 <= new_idx < len(entries):
-            entries[idx], entries[new_idx] = entries[new_idx], entries[idx]
+            self.move_item(entries, idx, new_idx)
             self.refresh_manual_list()
             self.manual_listbox.select_set(new_idx)
             self.on_manual_select()
 
-    def on_manual_select(self):
+    def on_manual_select(self, event=None):
+        self.flush_pending_changes()
         for widget in self.manual_form_frame.winfo_children():
             widget.destroy()
 
@@ -400,10 +3936,7 @@ class WebsiteCMS:
         self.add_entry(parent, "Date Label (Optional)", entry, "dateLabel", on_change_func=update_func)
         self.add_entry(parent, "Link URL", entry, "link", on_change_func=update_func)
         self.add_entry(parent, "Call to Action Label", entry, "ctaLabel", on_change_func=update_func)
-        self.add_entry(parent, "Image URL (Optional)", entry, "imageUrl", on_change_func=update_func)
-
-    def get_default_featured_entry(self):
-        return {"type": "project", "id": "", "imageOverride": ""}
+        self.add_image_selector(parent, "Image URL (Optional)", entry, "imageUrl", on_change_func=update_func)
 
     def build_homepage_source_entries(self):
         entries = []
@@ -466,12 +3999,12 @@ class WebsiteCMS:
             found = False
             for item in n_items:
                 if item.get("name") == "CV":
-                    item["path"] = new_path
+                    self.set_field(item, "path", new_path)
                     found = True
                     break
             if not found and new_path:
-                n_items.append({"name": "CV", "path": new_path, "isExternal": True})
                 self.data["navigation"] = n_items
+                self.insert_item(n_items, len(n_items), {"name": "CV", "path": new_path, "isExternal": True})
         
         # We attach a trace to update the main data structure whenever the local helper changes
         # Note: add_pdf_selector will bind to cv_data["path"]
@@ -529,6 +4062,8 @@ class WebsiteCMS:
         
         self.add_text_area(settings_frame, "Page Description", self.data["researchPage"], "description", height=3)
 
+        ttk.Button(settings_frame, text="Import BibTeX File(s)...", command=self.import_bibtex_files).pack(anchor='w', pady=(5, 0))
+
         # Bottom: List Editor
         # We reuse create_list_editor logic but pass the container as parent
         self.create_list_editor(
@@ -539,6 +4074,28 @@ class WebsiteCMS:
             parent_widget=container
         )
 
+    def import_bibtex_files(self):
+        paths = filedialog.askopenfilenames(filetypes=[("BibTeX", "*.bib"), ("All files", "*.*")])
+        if not paths:
+            return
+        self.flush_pending_changes()
+        new_papers, skipped = [], 0
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    # Dedupe against papers picked up from earlier files in this batch too
+                    batch, batch_skipped = import_bibtex({**self.data, "research_papers": self.data.get("research_papers", []) + new_papers}, f)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to read {path}: {e}")
+                return
+            new_papers += batch
+            skipped += batch_skipped
+        if new_papers:
+            self.insert_items(self.data.setdefault("research_papers", []), 0, new_papers)
+            self.list_refreshers["research_papers"]()
+            self.save_data()
+        self.update_status(f"Imported {len(new_papers)} paper(s) from BibTeX, skipped {skipped} duplicate/invalid entries.")
+
     def get_paper_display(self, item):
         return f"{item.get('year', '')} - {item.get('title', 'Untitled')}"
 
@@ -572,7 +4129,7 @@ class WebsiteCMS:
     def create_project_form(self, parent, item):
         self.add_entry(parent, "Project Title", item, "title")
         self.add_text_area(parent, "Description", item, "description")
-        self.add_entry(parent, "Cover Image URL (Optional)", item, "imageUrl")
+        self.add_image_selector(parent, "Cover Image URL (Optional)", item, "imageUrl")
         self.add_file_selector(parent, "Detailed Content", item, "content")
         self.add_entry(parent, "Tech Stack (comma separated)", item, "techStack", is_list=True)
         
@@ -601,7 +4158,11 @@ class WebsiteCMS:
         ttk.Label(frame, text="Upload PDF files or images to be used in posts/papers.", font=("Arial", 10)).pack(anchor='w')
         
         # Button to upload new file
-        ttk.Button(frame, text="Upload New File", command=lambda: self.upload_file_manager(frame)).pack(pady=10, anchor='w')
+        actions = ttk.Frame(frame)
+        actions.pack(fill='x', pady=10)
+        ttk.Button(actions, text="Upload New File", command=lambda: self.upload_file_manager(frame)).pack(side='left')
+        ttk.Button(actions, text="Remove Unused Files...", command=self.remove_unused_uploads).pack(side='left', padx=5)
+        ttk.Button(actions, text="Deploy Size Report", command=self.show_size_report).pack(side='left', padx=5)
         
         # List of existing files
         self.file_list_frame = ttk.LabelFrame(frame, text="Existing Files in public/uploads")
@@ -617,37 +4178,158 @@ class WebsiteCMS:
         if not os.path.exists(uploads_dir):
             os.makedirs(uploads_dir, exist_ok=True)
             
-        files = os.listdir(uploads_dir)
+        files = list_uploads()
         if not files:
             ttk.Label(self.file_list_frame, text="No files found.").pack(padx=5, pady=5)
             return
-            
+
+        self.flush_pending_changes()
+        references, _, missing = upload_report(self.data, self.unsaved_upload_texts())
         for f in files:
             row = ttk.Frame(self.file_list_frame)
             row.pack(fill='x', pady=2, padx=5)
             ttk.Label(row, text=f).pack(side='left')
+            referrers = references.get(f, [])
+            usage = f"used by {len(referrers)}" if referrers else "unused"
+            usage_label = ttk.Label(row, text=f"({usage})", font=("Arial", 9, "italic"))
+            usage_label.pack(side='left', padx=5)
             # Copy path button
             path = f"/uploads/{f}"
             ttk.Button(row, text="Copy Path", command=lambda p=path: self.root.clipboard_clear() or self.root.clipboard_append(p)).pack(side='right', padx=2)
+            ttk.Button(row, text="Rename...", command=lambda name=f: self.rename_upload_file(name)).pack(side='right', padx=2)
+            if referrers:
+                ttk.Button(row, text="Where?", command=lambda name=f, r=referrers: messagebox.showinfo(name, "\n".join(r))).pack(side='right', padx=2)
+        for name in missing:
+            ttk.Label(self.file_list_frame, text=f"Missing: /uploads/{name} is linked but not uploaded ({', '.join(references[name])})",
+                      foreground="#b91c1c").pack(anchor='w', padx=5)
+
+    def unsaved_upload_texts(self):
+        """The post editor's draft isn't in self.data until Save Post; its links still count."""
+        draft = getattr(self, "post_editor_data", None) or {}
+        return [("post editor (unsaved draft)", value) for value in draft.values() if isinstance(value, str) and "uploads/" in value]
+
+    def remove_unused_uploads(self):
+        self.flush_pending_changes()
+        _, orphans, _ = upload_report(self.data, self.unsaved_upload_texts())
+        if not orphans:
+            messagebox.showinfo("Uploads", "Every uploaded file is referenced.")
+            return
+        if not messagebox.askyesno("Remove Unused Files", "Delete these unreferenced uploads?\n\n" + "\n".join(orphans)):
+            return
+        removed = remove_orphan_uploads(self.data, self.unsaved_upload_texts())
+        self.refresh_file_list()
+        self.update_status(f"Removed {len(removed)} unused upload(s).")
+
+    def show_size_report(self):
+        self.flush_pending_changes()
+        report = format_size_report(size_report(self.data, DIST_DIR))
+        popup = tk.Toplevel(self.root)
+        popup.title("Deploy Size Report")
+        popup.geometry("700x600")
+        text = scrolledtext.ScrolledText(popup, font=("Courier", 10), wrap='none')
+        text.pack(fill='both', expand=True, padx=10, pady=10)
+        text.insert('1.0', report)
+        text.config(state='disabled')
+
+    def rename_upload_file(self, name):
+        new_name = simpledialog.askstring("Rename Upload", f"New name for {name}:", initialvalue=name, parent=self.root)
+        if not new_name or new_name == name:
+            return
+        new_name = new_name.strip()
+        self.flush_pending_changes()
+        try:
+            check_upload_rename(name, new_name)
+            data_edits, md_edits = plan_upload_rename(self.data, name, new_name)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to rename: {e}")
+            return
+        # The field edits are saved before the file moves, and then taken off the undo stack:
+        # undoing them (or quitting without saving) would leave links to a file that's gone
+        checkpoint = self.journal.checkpoint()
+        apply_upload_edits(data_edits, self.set_field)
+        rename_ops = self.journal.undo_stack[checkpoint:]
+        if data_edits and not self.save_data():
+            self.journal.rollback(self.data, checkpoint)
+            self.rebuild_tabs()
+            self.update_status(f"Rename of {name} cancelled; nothing was changed.")
+            return
+        # Sections merged in from another editor during the save may still link the old name
+        late_edits, _ = plan_upload_rename(self.data, name, new_name)
+        if late_edits:
+            apply_upload_edits(late_edits, self.set_field)
+            rename_ops += self.journal.undo_stack[len(self.journal.undo_stack) - len(late_edits):]
+            self.save_data()
+        self.journal.drop(rename_ops)
+        try:
+            move_upload(name, new_name, md_edits)
+        except Exception as e:
+            messagebox.showerror("Error", f"Saved the new links but failed to rename the file: {e}\n\n"
+                                          f"Rename {name} to {new_name} in {UPLOADS_DIR} by hand.")
+            return
+        # Field widgets still show the old links
+        self.rebuild_tabs()
+        self.update_status(f"Renamed {name} -> {new_name}; updated and saved {len(data_edits)} field(s), {len(md_edits)} markdown file(s).")
             
     def upload_file_manager(self, parent_frame):
         file_path = filedialog.askopenfilename()
         if not file_path:
             return
             
-        uploads_dir = os.path.join("public", "uploads")
-        if not os.path.exists(uploads_dir):
-            os.makedirs(uploads_dir, exist_ok=True)
-            
-        filename = os.path.basename(file_path)
-        dest_path = os.path.join(uploads_dir, filename)
-        
-        try:
-            shutil.copy2(file_path, dest_path)
+        def on_done(filename):
             messagebox.showinfo("Success", f"Uploaded {filename}")
             self.refresh_file_list()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to upload: {e}")
+        self.copy_upload(file_path, on_done)
+
+    def copy_upload(self, file_path, on_done=None):
+        """Stream a file into public/uploads/ in the background (the one upload path every button uses).
+
+        Progress and throughput go to the status bar; on_done(name) runs on the
+        Tk thread once the file is in place.
+        """
+        if self.upload_cancel is not None:
+            messagebox.showwarning("Upload in progress", "Wait for the current upload to finish, or cancel it first.")
+            return
+        cancel = threading.Event()
+        self.upload_cancel = cancel
+        self.cancel_upload_btn.pack(side='left', padx=(0, 5))
+        label = os.path.basename(file_path)
+        started = time.monotonic()
+        last_report = [0.0]
+
+        def progress(copied, total):
+            now = time.monotonic()
+            # A status update per chunk would flood the Tk event queue on fast disks
+            if now - last_report[0] >= 0.2 or copied == total:
+                last_report[0] = now
+                self.update_status(f"Uploading {label}: {format_rate(copied, total, now - started)}")
+
+        def work():
+            try:
+                filename, digest = import_upload(file_path, progress, cancel.is_set)
+                # Images get their placeholder now, so picking them later is instant
+                upload_placeholder(filename, digest)
+            except UploadCancelled:
+                self.update_status(f"Upload of {label} cancelled.")
+                self.root.after(0, self.finish_upload)
+                return
+            except Exception as e:
+                error = str(e)
+                self.update_status("Ready")
+                self.root.after(0, lambda: (self.finish_upload(), messagebox.showerror("Error", f"Failed to upload: {error}")))
+                return
+            size = os.path.getsize(os.path.join(UPLOADS_DIR, filename))
+            self.update_status(f"Uploaded {filename}: {format_rate(size, size, time.monotonic() - started)}, sha256 {digest[:12]}")
+
+            def done():
+                self.finish_upload()
+                if on_done:
+                    on_done(filename)
+            self.root.after(0, done)
+        threading.Thread(target=work, daemon=True).start()
+
+    def finish_upload(self):
+        self.upload_cancel = None
+        self.cancel_upload_btn.pack_forget()
 
     # ==========================
     # TAB: TAG MANAGER
@@ -694,8 +4376,7 @@ class WebsiteCMS:
         def add_tag():
             new_tag = entry_var.get().strip()
             if new_tag and new_tag not in self.data["tags"]:
-                self.data["tags"].append(new_tag)
-                self.data["tags"].sort(key=lambda s: s.lower())
+                self.set_field(self.data, "tags", sorted(self.data["tags"] + [new_tag], key=lambda s: s.lower()))
                 refresh_tags()
                 entry_var.set("")
             elif new_tag in self.data["tags"]:
@@ -706,7 +4387,7 @@ class WebsiteCMS:
             if not sel: return
             tag = self.tags_listbox.get(sel)
             if messagebox.askyesno("Confirm", f"Delete tag '{tag}'?"):
-                self.data["tags"].remove(tag)
+                self.set_field(self.data, "tags", [t for t in self.data["tags"] if t != tag])
                 refresh_tags()
 
         ttk.Button(controls_frame, text="Add Tag", command=add_tag).pack(fill='x', pady=2)
@@ -725,8 +4406,9 @@ class WebsiteCMS:
 
         frame = self.create_scrollable_frame(tab)
 
-        # Local data for this tab, not persisted until save
-        self.post_editor_data = {"title": "", "date": str(datetime.date.today()), "excerpt": "", "tags": [], "content_md": "", "pdfAttachment": "", "filename": ""}
+        # Local data for this tab, not persisted until save (kept across tab rebuilds)
+        if not hasattr(self, "post_editor_data"):
+            self.post_editor_data = {"title": "", "date": str(datetime.date.today()), "excerpt": "", "tags": [], "content_md": "", "pdfAttachment": "", "filename": ""}
 
         ttk.Label(frame, text="Create New Blog Post", font=("Arial", 14, "bold")).pack(pady=10, anchor='w')
 
@@ -742,12 +4424,42 @@ class WebsiteCMS:
         # Re-implement add_text_area manually for this component to capture widget
         frame_md = ttk.Frame(frame)
         frame_md.pack(fill='x', pady=5, padx=5)
-        ttk.Label(frame_md, text="Markdown Content", anchor='w').pack(fill='x')
-        self.post_content_widget = scrolledtext.ScrolledText(frame_md, height=10, font=("Arial", 10))
-        self.post_content_widget.pack(fill='x', pady=2)
-        def on_change_md(e):
+        md_header = ttk.Frame(frame_md)
+        md_header.pack(fill='x')
+        ttk.Label(md_header, text="Markdown Content", anchor='w').pack(side='left')
+        self.preview_stats_label = ttk.Label(md_header, text="", font=("Arial", 8, "italic"))
+        self.preview_stats_label.pack(side='left', padx=10)
+        ttk.Button(md_header, text="Open HTML Preview", command=self.open_html_preview).pack(side='right')
+
+        # Split pane: editor on the left, live preview on the right
+        md_paned = ttk.PanedWindow(frame_md, orient='horizontal')
+        md_paned.pack(fill='x', pady=2)
+        self.post_content_widget = scrolledtext.ScrolledText(md_paned, height=16, width=50, font=("Arial", 10))
+        md_paned.add(self.post_content_widget, weight=1)
+        self.post_preview_widget = scrolledtext.ScrolledText(md_paned, height=16, width=50, font=("Palatino Linotype", 10),
+                                                             wrap='word', state='disabled', background="#f2f0e9")
+        md_paned.add(self.post_preview_widget, weight=1)
+        self.post_preview_widget.tag_configure("heading", font=("Palatino Linotype", 14, "bold"), spacing1=6, spacing3=4)
+        self.post_preview_widget.tag_configure("code", font=("Courier", 9), background="#e7e5e4", lmargin1=10, lmargin2=10)
+        self.post_preview_widget.tag_configure("math", font=("Courier", 9), foreground="#be5d36", justify='center')
+        self.post_preview_widget.tag_configure("quote", font=("Palatino Linotype", 10, "italic"), lmargin1=15, lmargin2=15)
+        self.post_preview_widget.tag_configure("list", lmargin1=10, lmargin2=22)
+
+        self._preview_blocks = (None, [], [])
+        self._preview_mark_seq = 0
+        if not hasattr(self, "preview_worker"):
+            self.preview_worker = PreviewWorker(lambda *result: self.root.after(0, lambda: self.show_post_preview(*result)))
+            self.preview_worker.start()
+
+        self.post_content_widget.insert("1.0", self.post_editor_data["content_md"])
+        def sync_md():
             self.post_editor_data["content_md"] = self.post_content_widget.get("1.0", "end-1c")
+        on_change_md = self.debounce(sync_md, TEXT_DEBOUNCE_MS)
         self.post_content_widget.bind("<KeyRelease>", on_change_md)
+        self.post_content_widget.bind("<FocusOut>", on_change_md.flush)
+        # Preview uses its own short debounce; it isn't model state so it never needs flushing
+        self.post_content_widget.bind("<KeyRelease>", Debouncer(self.root, PREVIEW_DEBOUNCE_MS, self.request_post_preview, set()), add="+")
+        self.request_post_preview()
         
         # Attachment Button
         ttk.Button(frame, text="Upload & Link Local File", command=self.upload_and_link_file).pack(pady=5, padx=5, anchor='w')
@@ -755,26 +4467,116 @@ class WebsiteCMS:
         gen_frame = ttk.Frame(frame)
         gen_frame.pack(fill='x', pady=5, padx=5)
         ttk.Button(gen_frame, text="Generate Filename", command=self.generate_filename).pack(side='left')
-        self.filename_label = ttk.Label(gen_frame, text="[click Generate]")
+        self.filename_label = ttk.Label(gen_frame, text=self.post_editor_data["filename"] or "[click Generate]")
         self.filename_label.pack(side='left', padx=10)
 
         ttk.Button(frame, text="Save Post", command=self.save_post).pack(pady=20)
 
+        ttk.Separator(frame).pack(fill='x', pady=10)
+        ttk.Label(frame, text="Bulk Import", font=("Arial", 12, "bold")).pack(anchor='w', padx=5)
+        ttk.Label(frame, text="Import every .md file in a folder. Front matter (title, date, tags, excerpt) is used when present.",
+                  font=("Arial", 9, "italic")).pack(anchor='w', padx=5)
+        ttk.Button(frame, text="Import Markdown Folder...", command=self.ingest_post_folder).pack(pady=5, padx=5, anchor='w')
+
+    def ingest_post_folder(self):
+        directory = filedialog.askdirectory()
+        if not directory:
+            return
+        self.flush_pending_changes()
+        try:
+            posts, bodies, skipped = plan_post_ingest(self.data, directory)
+            stage_post_bodies(bodies)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to import posts: {e}")
+            return
+        if posts:
+            checkpoint = self.journal.checkpoint()
+            new_tags = sorted({t for post in posts for t in post["tags"]} - set(self.data.get("tags", [])))
+            if new_tags:
+                self.set_field(self.data, "tags", sorted(self.data.get("tags", []) + new_tags, key=lambda s: s.lower()))
+            self.insert_items(self.data.setdefault("blog_posts", []), 0, posts)
+            # Bodies only take their real names once the entries pointing at them are saved
+            if not self.save_data():
+                discard_post_bodies(bodies)
+                self.journal.rollback(self.data, checkpoint)
+                self.rebuild_tabs()
+                self.update_status("Import cancelled; no posts were added.")
+                return
+            commit_post_bodies(bodies)
+            self.list_refreshers["blog_posts"]()
+            if hasattr(self, "refresh_tags_listbox"):
+                self.refresh_tags_listbox()
+        self.update_status(f"Imported {len(posts)} post(s); skipped {len(skipped)} already in the Garden.")
+
+    def request_post_preview(self):
+        self.preview_worker.submit(self.post_content_widget.get("1.0", "end-1c"))
+
+    def show_post_preview(self, blocks, fragments, rerendered, elapsed_ms):
+        """Patch only the blocks between the unchanged head and tail of the preview.
+
+        Each displayed block starts at a text mark, so the changed range can be
+        found without re-measuring the widget; marks shift with edits before them.
+        """
+        widget = self.post_preview_widget
+        shown_widget, shown, marks = self._preview_blocks
+        if shown_widget is not widget:
+            shown, marks = [], []
+        shown, marks = list(shown), list(marks)
+        head = 0
+        while head < min(len(shown), len(blocks)) and shown[head] == blocks[head]:
+            head += 1
+        tail = 0
+        while tail < min(len(shown), len(blocks)) - head and shown[-1 - tail] == blocks[-1 - tail]:
+            tail += 1
+        try:
+            widget.config(state='normal')
+            stop = marks[len(shown) - tail] if tail else "end-1c"
+            if head < len(shown) - tail:
+                widget.delete(marks[head], stop)
+                for mark in marks[head:len(shown) - tail]:
+                    widget.mark_unset(mark)
+            new_marks = []
+            for kind, source in blocks[head:len(blocks) - tail]:
+                self._preview_mark_seq += 1
+                mark = f"block{self._preview_mark_seq}"
+                at = widget.index(stop)
+                # Left gravity while this block's text goes in after it, right gravity afterwards
+                # so later insertions in front of it push it along
+                widget.mark_set(mark, at)
+                widget.mark_gravity(mark, 'left')
+                tag = kind if kind in ("heading", "code", "math", "quote", "list") else ()
+                widget.insert(at, block_display_text(kind, source) + "\n\n", tag)
+                widget.mark_gravity(mark, 'right')
+                new_marks.append(mark)
+            widget.config(state='disabled')
+            self._preview_blocks = (widget, blocks, marks[:head] + new_marks + marks[len(shown) - tail:])
+            self.preview_stats_label.config(
+                text=f"{rerendered}/{len(blocks)} blocks re-rendered, {len(new_marks)} redrawn in {elapsed_ms:.1f} ms")
+        except tk.TclError:
+            pass  # editor tab was rebuilt while rendering
+
+    def open_html_preview(self):
+        """Write the rendered post (with KaTeX) to a standalone page and open it."""
+        self.flush_pending_changes()
+        text = self.post_editor_data["content_md"]
+        rendered_text, fragments = self.preview_worker.last_result
+        if rendered_text != text:
+            _, fragments, _ = self.preview_worker.renderer.render(text)
+        page = PREVIEW_HTML_TEMPLATE.format(title=html.escape(self.post_editor_data.get("title") or "Untitled"),
+                                            body="\n".join(fragments))
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        write_text_atomic(PREVIEW_HTML_FILE, page)
+        webbrowser.open("file://" + os.path.abspath(PREVIEW_HTML_FILE))
+
     def upload_and_link_file(self):
         file_path = filedialog.askopenfilename()
         if not file_path:
             return
             
-        uploads_dir = os.path.join("public", "uploads")
-        if not os.path.exists(uploads_dir):
-            os.makedirs(uploads_dir, exist_ok=True)
-            
-        filename = os.path.basename(file_path)
-        dest_path = os.path.join(uploads_dir, filename)
-        
+        self.copy_upload(file_path, self.link_uploaded_file)
+
+    def link_uploaded_file(self, filename):
         try:
-            shutil.copy2(file_path, dest_path)
-            
             # Insert markdown link
             # Check if it's an image for image syntax vs link syntax
             is_image = filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp'))
@@ -785,6 +4587,7 @@ class WebsiteCMS:
                 
             self.post_content_widget.insert(tk.INSERT, f"\n{link_text}")
             self.post_editor_data["content_md"] = self.post_content_widget.get("1.0", "end-1c")
+            self.request_post_preview()
             
             messagebox.showinfo("Success", f"Uploaded {filename} and added link.")
             # Also refresh the file manager tab list if it exists
@@ -792,25 +4595,18 @@ class WebsiteCMS:
                  self.refresh_file_list()
                  
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to upload file: {e}")
+            messagebox.showerror("Error", f"Failed to link file: {e}")
 
     def generate_filename(self):
+        self.flush_pending_changes()
         title = self.post_editor_data.get("title", "untitled").strip()
-        fname = "".join(c for c in title.replace(" ", "-").replace("/", "-") if c.isalnum() or c in "-")
-        fname = fname.lower().strip("-")
-        if not fname:
-            fname = "post"
-        full_fname = f"{fname}.md"
-        # Check if exists
-        posts_dir = "posts"
-        os.makedirs(posts_dir, exist_ok=True)
-        if os.path.exists(os.path.join(posts_dir, full_fname)):
-            timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
-            full_fname = f"{fname}-{timestamp}.md"
+        os.makedirs(POSTS_DIR, exist_ok=True)
+        full_fname = post_filename(title)
         self.post_editor_data["filename"] = full_fname
         self.filename_label.config(text=full_fname)
 
     def save_post(self):
+        self.flush_pending_changes()
         title = self.post_editor_data.get("title", "").strip()
         if not title:
             messagebox.showerror("Error", "Title is required.")
@@ -834,8 +4630,7 @@ class WebsiteCMS:
             return
 
         # Generate id
-        import random
-        new_id = str(random.randint(1000, 9999))
+        new_id = new_item_id({str(post.get("id")) for post in self.data.get("blog_posts", [])})
         new_post = {
             "id": new_id,
             "title": title,
@@ -845,7 +4640,7 @@ class WebsiteCMS:
             "pdfAttachment": self.post_editor_data.get("pdfAttachment", ""),
             "tags": self.post_editor_data.get("tags", [])
         }
-        self.data.setdefault("blog_posts", []).insert(0, new_post)
+        self.insert_item(self.data.setdefault("blog_posts", []), 0, new_post)
 
         messagebox.showinfo("Success", f"Post '{title}' saved and added to Garden.")
         # Reset
@@ -892,14 +4687,16 @@ class WebsiteCMS:
         right_frame = ttk.Frame(paned)
         paned.add(right_frame, weight=3)
         
-        current_list = self.data.get(json_key, [])
+        current_list = self.data.setdefault(json_key, [])
         
         def refresh_list():
             listbox.delete(0, tk.END)
             for item in current_list:
                 listbox.insert(tk.END, display_func(item))
+        self.list_refreshers[json_key] = refresh_list
         
         def on_select(event):
+            self.flush_pending_changes()
             for widget in right_frame.winfo_children():
                 widget.destroy()
                 
@@ -928,29 +4725,30 @@ class WebsiteCMS:
             ttk.Label(form_area, text=f"Editing: {display_func(item)}", font=("Arial", 12, "bold")).pack(pady=10, anchor='w')
             form_func(form_area, item)
             
-            def update_list_label(e):
+            def update_list_label():
                 listbox.delete(index)
                 listbox.insert(index, display_func(item))
                 listbox.select_set(index)
             
-            form_area.bind_all("<KeyRelease>", update_list_label)
+            form_area.bind_all("<KeyRelease>", self.debounce(update_list_label, TEXT_DEBOUNCE_MS))
 
         listbox.bind('<<ListboxSelect>>', on_select)
         
         def add_item():
-            import random
-            new_id = str(random.randint(1000, 9999))
-            new_item = {"id": new_id, "title": "New Item", "tags": [], "authors": [], "techStack": []}
-            current_list.insert(0, new_item)
+            self.flush_pending_changes()
+            new_id = new_item_id({str(item.get("id")) for item in current_list})
+            new_item = ITEM_MODELS[json_key].blank(id=new_id, title="New Item")
+            self.insert_item(current_list, 0, new_item)
             refresh_list()
             listbox.select_set(0)
             on_select(None)
             
         def remove_item():
+            self.flush_pending_changes()
             selection = listbox.curselection()
             if not selection: return
             if messagebox.askyesno("Confirm", "Delete this item?"):
-                current_list.pop(selection[0])
+                self.remove_item_at(current_list, selection[0])
                 refresh_list()
                 for widget in right_frame.winfo_children():
                     widget.destroy()
@@ -963,6 +4761,13 @@ class WebsiteCMS:
     # ==========================
     # FORM WIDGET HELPERS
     # ==========================
+    def cached_facet_counts(self, facet):
+        """facet_counts for the whole store, rebuilt only after an edit."""
+        cached = self._facet_counts.get(facet)
+        if cached is None or cached[0] != self.journal.revision:
+            cached = self._facet_counts[facet] = (self.journal.revision, facet_counts(self.data, facet))
+        return cached[1]
+
     def add_tag_selector(self, parent, label, data_dict, key):
         frame = ttk.Frame(parent)
         frame.pack(fill='x', pady=5, padx=5)
@@ -1010,14 +4815,27 @@ class WebsiteCMS:
             available_tags.sort(key=lambda s: s.lower())
             
             tag_vars = {}
+            # Entries using each tag besides this one, plus this one while it's ticked
+            counts = self.cached_facet_counts("techStack" if key == "techStack" else "tag")
+            path = self.locate(data_dict)
+            if path is not None and path[0] in ROUTE_SECTIONS:
+                # Counts include this entry's saved tags; the checkbox state adds it back
+                counts = dict(counts)
+                for t in set(data_dict.get(key) or []):
+                    counts[t] = max(counts.get(t, 0) - 1, 0)
             for t in available_tags:
                 var = tk.BooleanVar(value=(t in current_tags))
                 tag_vars[t] = var
-                ttk.Checkbutton(list_frame, text=t, variable=var).pack(anchor='w')
+                others = counts.get(t, 0)
+                check = ttk.Checkbutton(list_frame, variable=var)
+                label = lambda t=t, var=var, others=others, check=check: check.config(text=f"{t} ({others + var.get()})")
+                check.config(command=label)
+                label()
+                check.pack(anchor='w')
                 
             def save_selection():
                 new_tags = [t for t, var in tag_vars.items() if var.get()]
-                data_dict[key] = new_tags
+                self.set_field(data_dict, key, new_tags)
                 tags_var.set(", ".join(new_tags))
                 dialog.destroy()
                 
@@ -1052,9 +4870,40 @@ class WebsiteCMS:
         combo.configure(postcommand=postcommand)
 
         def on_change(*args):
-             data_dict[key] = var.get()
+             self.set_field(data_dict, key, var.get())
         var.trace_add("write", on_change)
 
+    def add_image_selector(self, parent, label, data_dict, key, on_change_func=None):
+        """Image URL field with a picker for uploaded images; keeps the placeholder field next to it current."""
+        frame = ttk.Frame(parent)
+        frame.pack(fill='x', pady=5, padx=5)
+
+        ttk.Label(frame, text=label, width=30, anchor='w').pack(side='left')
+
+        var = tk.StringVar(value=str(data_dict.get(key, "")))
+
+        def get_image_files():
+            return [f"/uploads/{f}" for f in list_uploads() if f.lower().endswith(IMAGE_EXTENSIONS)]
+
+        combo = ttk.Combobox(frame, textvariable=var, values=get_image_files())
+        combo.pack(side='left', fill='x', expand=True)
+        combo.configure(postcommand=lambda: combo.configure(values=get_image_files()))
+
+        def upload():
+            file_path = filedialog.askopenfilename(filetypes=[("Images", " ".join(f"*{ext}" for ext in IMAGE_EXTENSIONS)), ("All files", "*")])
+            if not file_path:
+                return
+            self.copy_upload(file_path, lambda filename: var.set(f"/uploads/{filename}"))
+        ttk.Button(frame, text="Upload...", command=upload).pack(side='right')
+
+        def on_change(*args):
+            self.set_field(data_dict, key, var.get())
+            update_placeholder(data_dict, key, self.set_field)
+            if on_change_func:
+                on_change_func()
+        var.trace_add("write", self.debounce(on_change))
+        combo.bind("<FocusOut>", lambda e: self.flush_pending_changes())
+
     def add_pdf_selector(self, parent, label, data_dict, key):
         frame = ttk.Frame(parent)
         frame.pack(fill='x', pady=5, padx=5)
@@ -1083,7 +4932,7 @@ class WebsiteCMS:
         combo.configure(postcommand=postcommand)
 
         def on_change(*args):
-             data_dict[key] = var.get()
+             self.set_field(data_dict, key, var.get())
         var.trace_add("write", on_change)
 
     def add_dual_font_controls(self, parent, data_dict, label_prefix, key_prefix):
@@ -1111,7 +4960,7 @@ class WebsiteCMS:
         eng_combo.pack(fill='x')
         
         def on_eng_change(*args):
-            data_dict[f"{key_prefix}FontEng"] = eng_options.get(eng_var.get(), "Cinzel")
+            self.set_field(data_dict, f"{key_prefix}FontEng", eng_options.get(eng_var.get(), "Cinzel"))
         eng_var.trace_add("write", on_eng_change)
 
         # Chinese Font Selection
@@ -1131,7 +4980,7 @@ class WebsiteCMS:
         cn_combo.pack(fill='x')
         
         def on_cn_change(*args):
-            data_dict[f"{key_prefix}FontCn"] = cn_options.get(cn_var.get(), "\"Noto Serif SC\"")
+            self.set_field(data_dict, f"{key_prefix}FontCn", cn_options.get(cn_var.get(), "\"Noto Serif SC\""))
         cn_var.trace_add("write", on_cn_change)
 
         # Font Size Entry
@@ -1144,7 +4993,7 @@ class WebsiteCMS:
         size_entry.pack(fill='x')
         
         def on_size_change(*args):
-            data_dict[f"{key_prefix}Size"] = size_var.get()
+            self.set_field(data_dict, f"{key_prefix}Size", size_var.get())
         size_var.trace_add("write", on_size_change)
 
     def add_checkbox(self, parent, label, data_dict, key):
@@ -1154,7 +5003,7 @@ class WebsiteCMS:
         var = tk.BooleanVar(value=data_dict.get(key, False))
         
         chk = ttk.Checkbutton(frame, text=label, variable=var, 
-            command=lambda: data_dict.__setitem__(key, var.get()))
+            command=lambda: self.set_field(data_dict, key, var.get()))
         chk.pack(anchor='w')
 
     def add_entry(self, parent, label, data_dict, key, is_list=False, is_int=False, on_change_func=None):
@@ -1177,19 +5026,20 @@ class WebsiteCMS:
         def on_change(*args):
             new_val = var.get()
             if is_list:
-                data_dict[key] = [x.strip() for x in new_val.split(",") if x.strip()]
+                self.set_field(data_dict, key, [x.strip() for x in new_val.split(",") if x.strip()])
             elif is_int:
                 try:
-                    data_dict[key] = int(new_val)
+                    self.set_field(data_dict, key, int(new_val))
                 except ValueError:
-                    data_dict[key] = 0
+                    self.set_field(data_dict, key, 0)
             else:
-                data_dict[key] = new_val
+                self.set_field(data_dict, key, new_val)
 
             if on_change_func:
                 on_change_func()
 
-        var.trace_add("write", on_change)
+        var.trace_add("write", self.debounce(on_change))
+        entry.bind("<FocusOut>", lambda e: self.flush_pending_changes())
 
     def add_text_area(self, parent, label, data_dict, key, height=5, on_change_func=None):
         frame = ttk.Frame(parent)
@@ -1203,12 +5053,15 @@ class WebsiteCMS:
         val = data_dict.get(key, "")
         txt.insert("1.0", str(val))
 
-        def on_change(e):
-            data_dict[key] = txt.get("1.0", "end-1c")
+        def on_change():
+            self.set_field(data_dict, key, txt.get("1.0", "end-1c"))
             if on_change_func:
                 on_change_func()
 
-        txt.bind("<KeyRelease>", on_change)
+        # Large fields (abstracts, BibTeX) are only re-read once typing pauses
+        sync = self.debounce(on_change, TEXT_DEBOUNCE_MS)
+        txt.bind("<KeyRelease>", sync)
+        txt.bind("<FocusOut>", sync.flush)
 
     def choose_file(self, item, content_var):
         try:
@@ -1234,7 +5087,413 @@ class WebsiteCMS:
         ttk.Button(popup, text="OK", command=select).pack(side='left')
         ttk.Button(popup, text="Cancel", command=popup.destroy).pack(side='right')
 
-if __name__ == "__main__":
+# ==========================
+# INCREMENTAL EXPORT CHECK
+# ==========================
+# Harness for `cms.py verify-incremental`: random edits to a synthetic store, each saved and
+# exported incrementally, then compared byte for byte with a from-scratch export of the same content.
+HARNESS_WORDS = ("quantum", "lattice", "control", "kernel", "gradient", "sparse", "spectral", "manifold",
+                 "entropy", "stochastic", "tensor", "photon", "robust", "signal", "mesh", "solver")
+HARNESS_TAGS = ("Python", "Math", "Quantum", "Simulation", "Optimization", "FEA", "CNN", "Control Theory")
+HARNESS_INDEX_HTML = ('<!doctype html>\n<html lang="en">\n<head>\n<meta charset="UTF-8" />\n<title>Portfolio</title>\n'
+                      '<script type="module" src="/assets/{bundle}"></script>\n</head>\n<body>\n'
+                      '<div id="root"></div>\n</body>\n</html>\n')
+# What a build produces, relative to the site root
+HARNESS_OUTPUTS = (DATA_FILE, TS_FILE, "public", DIST_DIR)
+
+@contextlib.contextmanager
+def working_directory(path):
+    """All paths in this module are relative to the site root; run a block inside another one."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+class HeadlessEditor(WebsiteCMS):
+    """WebsiteCMS's journaled edit and save paths, without any windows."""
+    def __init__(self, store):
+        self.store = store
+        with StoreLock():
+            self.data = store.load()
+            self.base_versions = store.versions()
+        self.journal = ChangeJournal()
+        self._path_cache = {}
+        self._pending_syncs = set()
+
+    def save(self):
+        """save_data() minus the dialogs: any conflict keeps our version."""
+        changes = self.journal.changes()
+        if changes:
+            self.base_versions, _ = merge_and_save(self.store, self.data, self.base_versions, changes, lambda keys: "mine")
+            self.journal.mark_saved()
+        return changes
+
+    def save_post(self, title, body, tags):
+        """Same steps as the Garden post editor's Save Post."""
+        filename = post_filename(title)
+        with open(os.path.join(POSTS_DIR, filename), 'w', encoding='utf-8') as f:
+            f.write(body)
+        new_id = new_item_id({str(post.get("id")) for post in self.data.get("blog_posts", [])})
+        self.insert_item(self.data.setdefault("blog_posts", []), 0, {
+            "id": new_id, "title": title, "date": str(datetime.date(2024, 1, 1)), "excerpt": "",
+            "content": f"posts/{filename}", "pdfAttachment": "", "tags": tags,
+        })
+
+def harness_text(rng, words):
+    return " ".join(rng.choice(HARNESS_WORDS) for _ in range(words)).capitalize()
+
+def harness_markdown(rng, uploads):
+    parts = []
+    for section in range(rng.randint(1, 4)):
+        parts.append(f"## {harness_text(rng, 3)} {section}")
+        parts.append(harness_text(rng, rng.randint(20, 80)) + ".")
+        if rng.random() < 0.3:
+            parts.append("```python\nprint('hello')\n```")
+        if uploads and rng.random() < 0.3:
+            parts.append(f"[Attachment](/uploads/{rng.choice(uploads)})")
+    return "\n\n".join(parts) + "\n"
+
+def write_harness_upload(rng, name):
+    with open(os.path.join(UPLOADS_DIR, name), 'wb') as f:
+        f.write(rng.randbytes(rng.randint(200, 4000)))
+
+def seed_harness_site(rng, entries):
+    """Synthetic data.json, posts/ and uploads/ in the current directory."""
+    os.makedirs(POSTS_DIR, exist_ok=True)
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    uploads = [f"file-{n}.pdf" for n in range(max(2, entries // 5))]
+    for name in uploads:
+        write_harness_upload(rng, name)
+    data = {
+        "hero": {"headline": "Harness", "subheadline": "Synthetic site"},
+        "homepage": {},
+        "researchPage": {"description": harness_text(rng, 12)},
+        "tags": sorted(HARNESS_TAGS, key=lambda t: t.lower()),
+        "profile": {"name": "Test Person", "role": "Researcher", "affiliation": "Somewhere", "bio": "", "email": "", "socials": {}},
+        "navigation": [{"name": "HOME", "path": "/"}, {"name": "RESEARCH", "path": "/research"},
+                       {"name": "PROJECTS", "path": "/projects"}, {"name": "GARDEN", "path": "/garden"}],
+        "research_papers": [], "projects": [], "blog_posts": [],
+    }
+    for n in range(entries):
+        data["research_papers"].append({
+            "id": f"p{n}", "title": harness_text(rng, 5), "authors": ["Test Person"], "venue": rng.choice(["PRL", "Nature", "arXiv"]),
+            "year": rng.randint(2018, 2025), "description": harness_text(rng, 30), "tags": rng.sample(HARNESS_TAGS, 2),
+            "pdfLink": f"/uploads/{rng.choice(uploads)}", "content": ""})
+        data["projects"].append({
+            "id": f"proj{n}", "title": harness_text(rng, 3), "description": harness_text(rng, 25),
+            "techStack": rng.sample(HARNESS_TAGS, 3), "imageUrl": "", "github": "", "content": ""})
+        name = f"post-{n}.md"
+        with open(os.path.join(POSTS_DIR, name), 'w', encoding='utf-8') as f:
+            f.write(harness_markdown(rng, uploads))
+        data["blog_posts"].append({
+            "id": f"b{n}", "title": harness_text(rng, 4), "date": f"{rng.randint(2020, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "excerpt": harness_text(rng, 15), "content": f"posts/{name}", "pdfAttachment": "", "tags": rng.sample(HARNESS_TAGS, 2)})
+    write_exports(data)
+    if os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), "public", "sw.js")):
+        shutil.copy2(os.path.join(os.path.dirname(os.path.abspath(__file__)), "public", "sw.js"), os.path.join("public", "sw.js"))
+
+def random_edit(editor, rng):
+    """Apply one random edit through the editor's journaled helpers; returns a short description."""
+    data = editor.data
+    uploads = list_uploads()
+    key = rng.choice(list(ITEM_MODELS))
+    items = data[key]
+    kind = rng.choice(("add", "remove", "field", "tags", "post", "markdown", "upload", "upload-bytes"))
+    if kind == "add" or not items:
+        item = ITEM_MODELS[key].blank(id=new_item_id({str(i.get("id")) for i in items}), title="New Item")
+        editor.insert_item(items, 0, item)
+        editor.set_field(item, "title", harness_text(rng, 4))
+        return f"add {key}"
+    item = rng.choice(items)
+    if kind == "remove":
+        editor.remove_item_at(items, items.index(item))
+        return f"remove {key}/{item.get('id')}"
+    if kind == "field":
+        field = {"research_papers": "description", "projects": "description", "blog_posts": "excerpt"}[key]
+        editor.set_field(item, rng.choice(["title", field]), harness_text(rng, rng.randint(3, 20)))
+        return f"edit {key}/{item.get('id')}"
+    if kind == "tags":
+        tag_key = "techStack" if key == "projects" else "tags"
+        tags = rng.sample(HARNESS_TAGS, rng.randint(0, 3))
+        if rng.random() < 0.3:
+            new_tag = harness_text(rng, 1) + str(rng.randint(0, 99))
+            if new_tag not in data["tags"]:
+                editor.insert_item(data["tags"], len(data["tags"]), new_tag)
+            tags.append(new_tag)
+        editor.set_field(item, tag_key, tags)
+        return f"tag {key}/{item.get('id')}"
+    if kind == "post":
+        editor.save_post(harness_text(rng, 3), harness_markdown(rng, uploads), rng.sample(HARNESS_TAGS, 2))
+        return "save post"
+    if kind == "markdown":
+        posts = [post for post in data["blog_posts"] if markdown_source(post)[0]]
+        if posts:
+            with open(markdown_source(rng.choice(posts))[0], 'w', encoding='utf-8') as f:
+                f.write(harness_markdown(rng, uploads))
+        return "rewrite markdown"
+    if kind == "upload":
+        name = f"file-{uuid.UUID(int=rng.getrandbits(128)).hex[:8]}.pdf"
+        write_harness_upload(rng, name)
+        field = {"research_papers": "pdfLink", "projects": "imageUrl", "blog_posts": "pdfAttachment"}[key]
+        editor.set_field(item, field, f"/uploads/{name}")
+        return f"upload for {key}/{item.get('id')}"
+    if uploads:
+        write_harness_upload(rng, rng.choice(uploads))
+    return "replace upload bytes"
+
+def simulate_vite_build():
+    """Stand-in for `npm run build`: a fresh dist/ with public/ copied in, an index.html and one bundle holding data.ts."""
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    shutil.copytree("public", DIST_DIR)
+    with open(TS_FILE, 'r', encoding='utf-8') as f:
+        bundle = f.read()
+    name = f"index-{hashlib.sha256(bundle.encode('utf-8')).hexdigest()[:8]}.js"
+    os.makedirs(os.path.join(DIST_DIR, "assets"), exist_ok=True)
+    write_text_atomic(os.path.join(DIST_DIR, "assets", name), bundle)
+    write_text_atomic(os.path.join(DIST_DIR, "index.html"), HARNESS_INDEX_HTML.format(bundle=name))
+
+def build_site(data, stages, workers):
+    """What BUILD SITE does after a save: pre-build stages, the (simulated) bundle, then post-build."""
+    run_export(data, stages, DIST_DIR, workers, log=lambda message: None)
+    simulate_vite_build()
+    postbuild(data, DIST_DIR, workers, log=lambda message: None)
+
+def snapshot_outputs(root):
+    """{relative path: bytes} for everything a build writes."""
+    files = {}
+    for output in HARNESS_OUTPUTS:
+        path = os.path.join(root, output)
+        if os.path.isfile(path):
+            paths = [path]
+        else:
+            paths = [os.path.join(folder, name) for folder, _, names in os.walk(path) for name in names]
+        for file_path in paths:
+            with open(file_path, 'rb') as f:
+                files[os.path.relpath(file_path, root).replace(os.sep, "/")] = f.read()
+    return files
+
+def compare_outputs(incremental, full):
+    differences = []
+    for path in sorted(set(incremental) | set(full)):
+        if path not in full:
+            differences.append(f"only in incremental: {path}")
+        elif path not in incremental:
+            differences.append(f"only in full rebuild: {path}")
+        elif incremental[path] != full[path]:
+            differences.append(f"differs: {path}")
+    return differences
+
+def verify_incremental(steps=10, edits_per_step=5, entries=30, seed=0, storage="json", workers=1, log=print):
+    """Randomized differential check of incremental save+export against clean rebuilds.
+
+    Returns {"steps", "incremental", "full", "failures"}, with the times in seconds.
+    The first failing step stops the run and its differences are listed.
+    """
+    rng = random.Random(seed)
+    base = tempfile.mkdtemp(prefix="cms-verify-")
+    site = os.path.join(base, "site")
+    os.makedirs(site)
+    report = {"steps": 0, "incremental": 0.0, "full": 0.0, "failures": []}
+    editor = None
+    try:
+        with working_directory(site):
+            seed_harness_site(rng, entries)
+            editor = HeadlessEditor(open_store(storage))
+            build_site(editor.data, PREBUILD_STAGES, workers)
+        for step in range(1, steps + 1):
+            with working_directory(site):
+                done = [random_edit(editor, rng) for _ in range(edits_per_step)]
+                started = time.perf_counter()
+                editor.save()
+                build_site(editor.data, tuple(name for name in PREBUILD_STAGES if name != "data"), workers)
+                incremental_time = time.perf_counter() - started
+
+            # Clean tree with the same sources and no caches, built from what the save persisted:
+            # a fresh store object reads it back, so a save that lost or mixed up edits shows up here
+            with working_directory(site):
+                persisted = open_store(storage)
+                document = persisted.load()
+                if isinstance(persisted, SQLiteStore):
+                    persisted.conn.close()
+            if json.dumps(document, default=model_json) != json.dumps(editor.data, default=model_json):
+                report["steps"] = step
+                report["failures"] = ["saved store differs from the editor's document"]
+                log(f"step {step}: {', '.join(done)} | saved store differs from the editor's document")
+                break
+            clean = os.path.join(base, f"clean-{step}")
+            os.makedirs(clean)
+            for source in (POSTS_DIR, UPLOADS_DIR):
+                shutil.copytree(os.path.join(site, source), os.path.join(clean, source))
+            if os.path.exists(os.path.join(site, "public", "sw.js")):
+                shutil.copy2(os.path.join(site, "public", "sw.js"), os.path.join(clean, "public", "sw.js"))
+            with working_directory(clean):
+                started = time.perf_counter()
+                build_site(document, PREBUILD_STAGES, workers)
+                full_time = time.perf_counter() - started
+
+            report["steps"] = step
+            report["incremental"] += incremental_time
+            report["full"] += full_time
+            differences = compare_outputs(snapshot_outputs(site), snapshot_outputs(clean))
+            shutil.rmtree(clean)
+            log(f"step {step}: {', '.join(done)} | incremental {incremental_time:.2f}s, full {full_time:.2f}s"
+                + (f" | {len(differences)} difference(s)" if differences else ""))
+            if differences:
+                report["failures"] = differences
+                break
+    finally:
+        if editor is not None and isinstance(editor.store, SQLiteStore):
+            editor.store.conn.close()
+        shutil.rmtree(base, ignore_errors=True)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Portfolio Website CMS")
+    parser.add_argument("--storage", choices=["json", "sqlite"], default=os.environ.get("CMS_STORAGE", "json"),
+                        help="Content backend (default: json, or $CMS_STORAGE)")
+    commands = parser.add_subparsers(dest="command")
+    export_parser = commands.add_parser("export", help="Regenerate data.json and data.ts from the store without opening the GUI")
+    export_parser.add_argument("--dist", help="Also run the post-build stages on this built dist/ directory")
+    export_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: $CMS_WORKERS or CPU count)")
+    bib_parser = commands.add_parser("import-bibtex", help="Add papers from .bib files (duplicates by DOI/title are skipped)")
+    bib_parser.add_argument("files", nargs="+")
+    ingest_parser = commands.add_parser("ingest-posts", help="Add every markdown file in a directory to the Garden")
+    ingest_parser.add_argument("directory")
+    uploads_parser = commands.add_parser("uploads", help="Report, clean up or rename files in public/uploads")
+    uploads_actions = uploads_parser.add_subparsers(dest="action", required=True)
+    uploads_actions.add_parser("report", help="List every upload with its referrers, plus orphans and broken links")
+    gc_parser = uploads_actions.add_parser("gc", help="Delete uploads nothing references")
+    gc_parser.add_argument("--yes", action="store_true", help="Actually delete (default is a dry run)")
+    uploads_actions.add_parser("placeholders", help="Fill in placeholders for project, featured and homepage images (needs Pillow)")
+    rename_parser = uploads_actions.add_parser("rename", help="Rename an upload and rewrite all references")
+    rename_parser.add_argument("old")
+    rename_parser.add_argument("new")
+    prerender_parser = commands.add_parser("prerender", help="Write static HTML shells per route into a built dist/ (run after npm run build)")
+    prerender_parser.add_argument("--dist", default=DIST_DIR)
+    size_parser = commands.add_parser("size-report", help="Break down the deploy payload, check budgets and compare with the last build")
+    size_parser.add_argument("--dist", default=DIST_DIR)
+    size_parser.add_argument("--save", action="store_true", help="Record these sizes as the new baseline")
+    memory_parser = commands.add_parser("model-memory", help="Compare memory held by data.json as plain dicts vs. the slotted content model")
+    memory_parser.add_argument("--scale", type=int, default=1, help="Repeat every collection this many times first")
+    verify_parser = commands.add_parser("verify-incremental", help="Check incremental save+export against clean rebuilds on a random synthetic site")
+    verify_parser.add_argument("--steps", type=int, default=10)
+    verify_parser.add_argument("--edits", type=int, default=5, help="Random edits per step")
+    verify_parser.add_argument("--entries", type=int, default=30, help="Entries per collection in the synthetic site")
+    verify_parser.add_argument("--seed", type=int, default=0)
+    verify_parser.add_argument("--workers", type=int, default=1)
+    postbuild_parser = commands.add_parser("postbuild", help="Prerender, fingerprint uploads and precompress dist/ (run after npm run build)")
+    postbuild_parser.add_argument("--dist", default=DIST_DIR)
+    postbuild_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: $CMS_WORKERS or CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.command == "model-memory":
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            stats = measure_model_memory(f.read(), args.scale)
+        saved = 1 - stats["model_bytes"] / stats["dict_bytes"] if stats["dict_bytes"] else 0
+        print(f"{stats['entries']} entries: dicts {format_bytes(stats['dict_bytes'])}, "
+              f"models {format_bytes(stats['model_bytes'])} ({saved:.0%} less)")
+        return
+    if args.command == "verify-incremental":
+        report = verify_incremental(args.steps, args.edits, args.entries, args.seed, args.storage, args.workers)
+        speedup = report["full"] / report["incremental"] if report["incremental"] else 0
+        print(f"{report['steps']} step(s): incremental {report['incremental']:.2f}s, full rebuilds {report['full']:.2f}s ({speedup:.1f}x)")
+        for difference in report["failures"]:
+            print(difference)
+        sys.exit(1 if report["failures"] else 0)
+
+    # Only commands that read or write content touch the store (SQLite creates content.db on open)
+    store = open_store(args.storage)
+    if args.command == "export":
+        stages = PREBUILD_STAGES + (DIST_STAGES if args.dist else ())
+        run_export(store.load(), stages, args.dist or DIST_DIR, args.workers)
+        print(f"Exported {DATA_FILE} and {TS_FILE} from {args.storage} store.")
+        return
+    if args.command == "import-bibtex":
+        with StoreLock():
+            data = store.load()
+            papers = data.setdefault("research_papers", [])
+            added, skipped = [], 0
+            for path in args.files:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    batch, batch_skipped = import_bibtex({**data, "research_papers": papers + added}, f)
+                added += batch
+                skipped += batch_skipped
+            papers[0:0] = added
+            if added:
+                store.save(data)
+            print(f"Imported {len(added)} paper(s), skipped {skipped} duplicate/invalid entries.")
+            return
+    if args.command == "ingest-posts":
+        with StoreLock():
+            data = store.load()
+            posts, bodies, skipped = plan_post_ingest(data, args.directory)
+            if posts:
+                stage_post_bodies(bodies)
+                known = set(data.setdefault("tags", []))
+                data["tags"] = sorted(data["tags"] + sorted({t for p in posts for t in p["tags"]} - known), key=lambda s: s.lower())
+                data.setdefault("blog_posts", [])[0:0] = posts
+                try:
+                    store.save(data)
+                except BaseException:
+                    discard_post_bodies(bodies)
+                    raise
+                commit_post_bodies(bodies)
+            print(f"Imported {len(posts)} post(s); skipped {len(skipped)} already in the Garden.")
+            return
+    if args.command == "uploads":
+        data = store.load()
+        if args.action in ("report", "gc"):
+            # Edits an open CMS window hasn't saved yet still count as references
+            skipped = ChangeJournal().recover(data)[1]
+            if skipped:
+                print(f"Ignored {skipped} unsaved change(s) that don't match the saved data.", file=sys.stderr)
+        if args.action == "report":
+            references, orphans, missing = upload_report(data)
+            for name in list_uploads():
+                print(f"{name}: {', '.join(references.get(name, [])) or 'UNUSED'}")
+            for name in missing:
+                print(f"MISSING {name}: {', '.join(references[name])}")
+            print(f"{len(orphans)} unused, {len(missing)} missing.")
+        elif args.action == "gc":
+            orphans = remove_orphan_uploads(data) if args.yes else upload_report(data)[1]
+            for name in orphans:
+                print(("Removed " if args.yes else "Would remove ") + name)
+        elif args.action == "placeholders":
+            if Image is None:
+                print("Pillow is not installed (pip install pillow); no placeholders computed.")
+                return
+            with StoreLock():
+                data = store.load()
+                changed = refresh_placeholders(data)
+                if changed:
+                    store.save(data)
+                print(f"Updated {changed} image placeholder(s).")
+        elif args.action == "rename":
+            with StoreLock():
+                data = store.load()
+                data_count, md_count = rename_upload(data, args.old, args.new)
+                store.save(data)
+                print(f"Renamed {args.old} -> {args.new}; updated {data_count} field(s) and {md_count} markdown file(s).")
+        return
+    if args.command == "prerender":
+        stats = prerender_site(store.load(), args.dist)
+        print("Prerendered routes: {rendered} rendered, {reused} cached, {written} written, {unchanged} unchanged, {removed} removed.".format(**stats))
+        return
+    if args.command == "size-report":
+        report = size_report(store.load(), args.dist)
+        print(format_size_report(report))
+        if args.save:
+            save_size_manifest(report["sizes"])
+        return
+    if args.command == "postbuild":
+        postbuild(store.load(), args.dist, args.workers)
+        return
+
     root = tk.Tk()
-    app = WebsiteCMS(root)
+    app = WebsiteCMS(root, store=store)
     root.mainloop()
+
+if __name__ == "__main__":
+    main()
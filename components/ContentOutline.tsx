@@ -0,0 +1,59 @@
+import React, { useEffect, useState } from 'react';
+import { ContentStats } from '../types';
+import { loadGenerated } from '../generated';
+
+// Keyed by "<section>/<id>", e.g. "garden/b1"
+export const useContentStats = (): Record<string, ContentStats> => {
+  const [stats, setStats] = useState<Record<string, ContentStats>>({});
+
+  useEffect(() => {
+    let active = true;
+    loadGenerated<ContentStats>('content-stats.json').then((index) => {
+      if (active) setStats(index);
+    });
+    return () => {
+      active = false;
+    };
+  }, []);
+
+  return stats;
+};
+
+export const readingTimeLabel = (stats?: ContentStats): string =>
+  stats && stats.readingMinutes ? `${stats.readingMinutes} min read` : '';
+
+interface ContentOutlineProps {
+  stats?: ContentStats;
+}
+
+// Table of contents from the precomputed heading outline; hidden for short entries
+const ContentOutline: React.FC<ContentOutlineProps> = ({ stats }) => {
+  if (!stats || stats.headings.length < 2) return null;
+
+  const topLevel = Math.min(...stats.headings.map((heading) => heading.level));
+
+  // HashRouter owns location.hash, so scroll instead of linking to #anchors
+  const scrollTo = (id: string) => {
+    document.getElementById(id)?.scrollIntoView({ behavior: 'smooth', block: 'start' });
+  };
+
+  return (
+    <nav className="mb-10 p-6 bg-stone-50 border border-stone-200">
+      <h4 className="font-mono text-xs uppercase tracking-wider text-stone-400 mb-3">Contents</h4>
+      <ul className="space-y-1">
+        {stats.headings.map((heading, index) => (
+          <li key={`${heading.id}-${index}`} style={{ paddingLeft: `${heading.level - topLevel}rem` }}>
+            <button
+              onClick={() => scrollTo(heading.id)}
+              className="text-left font-serif text-stone-700 hover:text-academic-orange transition-colors"
+            >
+              {heading.text}
+            </button>
+          </li>
+        ))}
+      </ul>
+    </nav>
+  );
+};
+
+export default ContentOutline;
@@ -0,0 +1,102 @@
+import React, { useEffect, useMemo, useState } from 'react';
+import { FacetIndex, and, keysIn, loadFacetIndex, popcount, query } from '../facets';
+
+type Selection = Record<string, string[]>;
+
+// Selection state for one list page; `matches` is null (show everything) until the index
+// loads and while nothing is selected
+export const useFacetFilter = (type: string) => {
+  const [index, setIndex] = useState<FacetIndex | null>(null);
+  const [selection, setSelection] = useState<Selection>({});
+
+  useEffect(() => {
+    let active = true;
+    loadFacetIndex().then((loaded) => {
+      if (active) setIndex(loaded);
+    });
+    return () => {
+      active = false;
+    };
+  }, []);
+
+  const hasSelection = Object.values(selection).some((values) => values.length > 0);
+  const matches = useMemo(
+    () => (index && hasSelection ? keysIn(index, query(index, { ...selection, type: [type] })) : null),
+    [index, hasSelection, selection, type]
+  );
+  const indexed = useMemo(() => new Set(index ? index.keys : []), [index]);
+
+  // The index is generated; an entry it doesn't know yet (added since the last export) stays visible
+  const includes = (key: string) => !matches || !indexed.has(key) || matches.has(key);
+
+  const toggle = (facet: string, value: string) =>
+    setSelection((current) => {
+      const values = current[facet] || [];
+      return {
+        ...current,
+        [facet]: values.includes(value) ? values.filter((v) => v !== value) : [...values, value],
+      };
+    });
+
+  const clear = () => setSelection({});
+
+  return { index, selection, matches, includes, toggle, clear, type };
+};
+
+interface FacetFilterProps {
+  filter: ReturnType<typeof useFacetFilter>;
+  facets: { facet: string; label: string }[];
+}
+
+const FacetFilter: React.FC<FacetFilterProps> = ({ filter, facets }) => {
+  const { index, selection, toggle, clear, type } = filter;
+  if (!index) return null;
+
+  const active = Object.values(selection).some((values) => values.length > 0);
+  const typeBits = query(index, { type: [type] });
+
+  return (
+    <div className="mb-12 space-y-4">
+      {facets.map(({ facet, label }) => {
+        // Counts follow the other facets' selection, so each chip shows what picking it would add
+        const base = query(index, { ...selection, [facet]: [], type: [type] });
+        const chips = Object.entries(index.facets[facet] || {})
+          .filter(([, bits]) => popcount(and(typeBits, bits)) > 0)
+          .map(([value, bits]) => ({ value, count: popcount(and(base, bits)) }))
+          .sort((a, b) => b.count - a.count || a.value.localeCompare(b.value));
+        if (chips.length === 0) return null;
+
+        return (
+          <div key={facet} className="flex flex-wrap items-center gap-2">
+            <span className="font-mono text-xs uppercase tracking-wider text-stone-400 mr-2">{label}</span>
+            {chips.map(({ value, count }) => {
+              const selected = (selection[facet] || []).includes(value);
+              return (
+                <button
+                  key={value}
+                  onClick={() => toggle(facet, value)}
+                  className={`text-[10px] font-mono uppercase px-2 py-1 transition-colors ${
+                    selected
+                      ? 'bg-academic-orange text-white'
+                      : count === 0
+                      ? 'bg-stone-100 text-stone-300'
+                      : 'bg-stone-100 text-stone-500 hover:text-academic-orange'
+                  }`}
+                >
+                  {value} <span className="opacity-70">({count})</span>
+                </button>
+              );
+            })}
+          </div>
+        );
+      })}
+      {active && (
+        <button onClick={clear} className="font-mono text-xs text-stone-400 hover:text-academic-orange">
+          Clear filters
+        </button>
+      )}
+    </div>
+  );
+};
+
+export default FacetFilter;
@@ -3,6 +3,46 @@ import ReactMarkdown from 'react-markdown';
 import remarkMath from 'remark-math';
 import rehypeKatex from 'rehype-katex';
 
+// Same rule as heading_id() in cms.py, which builds the outline in content-stats.json:
+// letters and digits of any script, "section-<n>" when there are none, -2/-3 for repeats
+export const headingId = (text: string, number: number, used: Set<string>): string => {
+  const base =
+    text.toLowerCase().replace(/[^\p{L}\p{N}]+/gu, '-').replace(/^-+|-+$/g, '') || `section-${number}`;
+  let slug = base;
+  for (let n = 2; used.has(slug); n++) slug = `${base}-${n}`;
+  used.add(slug);
+  return slug;
+};
+
+// Minimal hast shapes; only what the heading pass below touches
+interface HastNode {
+  type: string;
+  tagName?: string;
+  value?: string;
+  properties?: Record<string, unknown>;
+  children?: HastNode[];
+}
+
+const textOf = (node: HastNode): string =>
+  node.type === 'text' ? node.value ?? '' : (node.children ?? []).map(textOf).join('');
+
+const HEADING_TAGS = new Set(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']);
+
+// Rehype plugin that numbers headings over the parsed tree, once per parse. Doing it in
+// the heading components kept state across renders, so StrictMode's double render
+// suffixed every id with -2 and broke the outline links. It runs before rehype-katex, so
+// inline math counts as its TeX source, as it does in heading_id().
+const rehypeHeadingIds = () => (tree: HastNode) => {
+  const used = new Set<string>();
+  const visit = (node: HastNode) => {
+    if (node.type === 'element' && HEADING_TAGS.has(node.tagName ?? '')) {
+      node.properties = { ...node.properties, id: headingId(textOf(node), used.size + 1, used) };
+    }
+    node.children?.forEach(visit);
+  };
+  visit(tree);
+};
+
 interface MarkdownRendererProps {
   content: string;
 }
@@ -13,12 +53,15 @@ const MarkdownRenderer: React.FC<MarkdownRendererProps> = ({ content }) => {
       <ReactMarkdown
         children={content}
         remarkPlugins={[remarkMath]}
-        rehypePlugins={[rehypeKatex]}
+        rehypePlugins={[rehypeHeadingIds, rehypeKatex]}
         components={{
           // Customize specific elements if needed
           h1: ({node, ...props}) => <h1 className="font-serif text-3xl font-bold mt-8 mb-4 text-academic-black" {...props} />,
           h2: ({node, ...props}) => <h2 className="font-serif text-2xl font-bold mt-6 mb-3 text-academic-black border-b border-stone-300 pb-2" {...props} />,
           h3: ({node, ...props}) => <h3 className="font-serif text-xl font-bold mt-4 mb-2 text-academic-black" {...props} />,
+          h4: ({node, ...props}) => <h4 className="font-serif text-lg font-bold mt-4 mb-2 text-academic-black" {...props} />,
+          h5: ({node, ...props}) => <h5 className="font-serif text-base font-bold mt-4 mb-2 text-academic-black" {...props} />,
+          h6: ({node, ...props}) => <h6 className="font-serif text-base font-bold mt-4 mb-2 text-stone-600" {...props} />,
           p: ({node, ...props}) => <p className="font-sans text-stone-800 leading-relaxed mb-4 text-base" {...props} />,
           code: ({node, ...props}) => {
              // Extract inline property safely
@@ -0,0 +1,48 @@
+import React, { useEffect, useRef, useState } from 'react';
+import { ImagePlaceholder } from '../types';
+
+interface PlaceholderImageProps extends React.ImgHTMLAttributes<HTMLImageElement> {
+  placeholder?: ImagePlaceholder | null;
+}
+
+// The dominant colour and a tiny blurred thumbnail sit behind the image, so the slot paints
+// immediately. Once the image loads the background is dropped, otherwise it would show
+// through transparent PNG/GIF/WebP images.
+const PlaceholderImage: React.FC<PlaceholderImageProps> = ({ placeholder, style, alt, onLoad, ...props }) => {
+  const imgRef = useRef<HTMLImageElement>(null);
+  const [loaded, setLoaded] = useState(false);
+
+  useEffect(() => {
+    // A cached or prerendered image can finish before React attaches onLoad
+    const img = imgRef.current;
+    setLoaded(Boolean(img && img.complete && img.naturalWidth > 0));
+  }, [props.src]);
+
+  return (
+    <img
+      ref={imgRef}
+      decoding="async"
+      alt={alt}
+      {...props}
+      width={placeholder?.width}
+      height={placeholder?.height}
+      onLoad={(event) => {
+        setLoaded(true);
+        onLoad?.(event);
+      }}
+      style={
+        placeholder && !loaded
+          ? {
+              backgroundColor: placeholder.color,
+              backgroundImage: `url(${placeholder.lqip})`,
+              backgroundSize: 'cover',
+              backgroundPosition: 'center',
+              ...style,
+            }
+          : style
+      }
+    />
+  );
+};
+
+export default PlaceholderImage;
@@ -0,0 +1,72 @@
+import React, { useEffect, useState } from 'react';
+import { Link } from 'react-router-dom';
+import { BLOG_POSTS, PROJECTS, RESEARCH_PAPERS } from '../constants';
+import { loadGenerated } from '../generated';
+
+// "<section>/<id>" -> related "<section>/<id>" keys, precomputed by `python cms.py export`
+const loadRelatedIndex = () => loadGenerated<string[]>('related.json');
+
+const SECTION_LABELS: Record<string, string> = { research: 'Paper', projects: 'Project', garden: 'Note' };
+
+const splitKey = (key: string): [string, string] => {
+  const slash = key.indexOf('/');
+  return [key.slice(0, slash), key.slice(slash + 1)];
+};
+
+const findTitle = (key: string): string | undefined => {
+  const [section, id] = splitKey(key);
+  const items: { id: string; title: string }[] =
+    section === 'research' ? RESEARCH_PAPERS : section === 'projects' ? PROJECTS : section === 'garden' ? BLOG_POSTS : [];
+  return items.find((item) => item.id === id)?.title;
+};
+
+interface RelatedContentProps {
+  section: 'research' | 'projects' | 'garden';
+  id: string;
+}
+
+const RelatedContent: React.FC<RelatedContentProps> = ({ section, id }) => {
+  const [related, setRelated] = useState<string[]>([]);
+
+  useEffect(() => {
+    let active = true;
+    loadRelatedIndex().then((index) => {
+      if (active) setRelated(index[`${section}/${id}`] || []);
+    });
+    return () => {
+      active = false;
+    };
+  }, [section, id]);
+
+  const entries = related
+    .map((key) => ({ key, title: findTitle(key) }))
+    .filter((entry): entry is { key: string; title: string } => Boolean(entry.title));
+
+  if (entries.length === 0) return null;
+
+  return (
+    <aside className="mt-12 pt-8 border-t border-stone-200">
+      <h4 className="font-mono text-xs uppercase tracking-wider text-stone-400 mb-4">Related</h4>
+      <ul className="space-y-3">
+        {entries.map(({ key, title }) => {
+          const [targetSection, targetId] = splitKey(key);
+          return (
+            <li key={key}>
+              <Link
+                to={`/${targetSection}?id=${encodeURIComponent(targetId)}`}
+                className="group flex items-baseline gap-3"
+              >
+                <span className="text-[10px] font-mono uppercase bg-stone-100 px-2 py-1 text-stone-500">
+                  {SECTION_LABELS[targetSection]}
+                </span>
+                <span className="font-serif text-lg group-hover:text-academic-orange transition-colors">{title}</span>
+              </Link>
+            </li>
+          );
+        })}
+      </ul>
+    </aside>
+  );
+};
+
+export default RelatedContent;
@@ -2,6 +2,7 @@ import React, { useState } from 'react';
 import { NavLink, useLocation } from 'react-router-dom';
 import { Menu, X, ArrowUpRight } from 'lucide-react';
 import { MY_PROFILE, NAVIGATION_LINKS, SOCIAL_ICONS } from '../constants';
+import { prefetchRoute } from '../prefetch';
 
 const Sidebar: React.FC = () => {
   const [isOpen, setIsOpen] = useState(false);
@@ -67,6 +68,7 @@ const Sidebar: React.FC = () => {
                   <a 
                     key={link.path}
                     href={link.path}
+                    onMouseEnter={() => prefetchRoute(link.path)}
                     target="_blank"
                     rel="noreferrer"
                     className="font-serif font-bold tracking-widest text-sm hover:text-academic-orange transition-colors flex items-center group"
@@ -79,6 +81,7 @@ const Sidebar: React.FC = () => {
                   <NavLink
                     key={link.path}
                     to={link.path}
+                    onMouseEnter={() => prefetchRoute(link.path)}
                     className={({ isActive }) => `
                       font-serif font-bold tracking-widest text-sm transition-colors flex items-center
                       ${isActive ? 'text-academic-orange' : 'text-stone-300 hover:text-white'}
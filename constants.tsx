@@ -7,6 +7,7 @@ import {
   Hero,
   HomepageConfig,
   HomepageContentType,
+  ImagePlaceholder,
   ResearchPageConfig
 } from './types';
 import { Github, Twitter, Linkedin, GraduationCap, Mail } from 'lucide-react';
@@ -67,6 +68,7 @@ export interface HomepageContentCard {
   dateLabel?: string;
   sortValue: number;
   imageUrl?: string;
+  imagePlaceholder?: ImagePlaceholder | null;
   link: string;
   ctaLabel: string;
 }
@@ -106,6 +108,7 @@ const createHomepageContentCards = (): HomepageContentCard[] => {
       sortValue: -index,
       link: '/projects',
       imageUrl: project.imageUrl,
+      imagePlaceholder: (project as Project).imagePlaceholder,
       ctaLabel: 'View Project'
     });
   });
@@ -0,0 +1,87 @@
+// ==========================================
+// Bitmap facet index written by `python cms.py export` (public/generated/facets.json).
+// Each facet value is a bitset over `keys`; filters are bitwise ops on small Uint32Arrays.
+// ==========================================
+import { loadGenerated } from './generated';
+
+// Sorted positions (sparse) or base64 little-endian 32-bit words (dense)
+type EncodedBitmap = number[] | string;
+
+export interface FacetIndex {
+  keys: string[];
+  facets: Record<string, Record<string, Uint32Array>>;
+}
+
+const decodeBitmap = (encoded: EncodedBitmap, words: number): Uint32Array => {
+  const bits = new Uint32Array(words);
+  if (typeof encoded === 'string') {
+    const bytes = atob(encoded);
+    for (let i = 0; i < bytes.length; i++) {
+      bits[i >> 2] |= bytes.charCodeAt(i) << ((i & 3) * 8);
+    }
+  } else {
+    for (const position of encoded) {
+      bits[position >> 5] |= 1 << (position & 31);
+    }
+  }
+  return bits;
+};
+
+let facetIndex: Promise<FacetIndex | null> | null = null;
+
+export const loadFacetIndex = (): Promise<FacetIndex | null> => {
+  if (!facetIndex) {
+    facetIndex = loadGenerated<any>('facets.json').then((raw: any) => {
+      if (!raw || !raw.keys) return null;
+      const words = Math.ceil(raw.size / 32);
+      const facets: FacetIndex['facets'] = {};
+      for (const [facet, values] of Object.entries<Record<string, EncodedBitmap>>(raw.facets)) {
+        facets[facet] = {};
+        for (const [value, encoded] of Object.entries(values)) {
+          facets[facet][value] = decodeBitmap(encoded, words);
+        }
+      }
+      return { keys: raw.keys, facets };
+    });
+  }
+  return facetIndex;
+};
+
+const combine = (a: Uint32Array, b: Uint32Array, op: (x: number, y: number) => number): Uint32Array => {
+  const out = new Uint32Array(a.length);
+  for (let i = 0; i < a.length; i++) out[i] = op(a[i], b[i]);
+  return out;
+};
+
+export const and = (a: Uint32Array, b: Uint32Array) => combine(a, b, (x, y) => x & y);
+export const or = (a: Uint32Array, b: Uint32Array) => combine(a, b, (x, y) => x | y);
+
+export const popcount = (bits: Uint32Array): number => {
+  let total = 0;
+  for (let word of bits) {
+    word = word - ((word >>> 1) & 0x55555555);
+    word = (word & 0x33333333) + ((word >>> 2) & 0x33333333);
+    total += (((word + (word >>> 4)) & 0x0f0f0f0f) * 0x01010101) >>> 24;
+  }
+  return total;
+};
+
+export const hasBit = (bits: Uint32Array, position: number): boolean => (bits[position >> 5] & (1 << (position & 31))) !== 0;
+
+// OR within a facet, AND across facets: { type: ['post'], tag: ['Math', 'FEA'] }
+export const query = (index: FacetIndex, selection: Record<string, string[]>): Uint32Array => {
+  let result = new Uint32Array(Math.ceil(index.keys.length / 32)).fill(0xffffffff);
+  for (const [facet, values] of Object.entries(selection)) {
+    if (values.length === 0) continue;
+    let any = new Uint32Array(result.length);
+    for (const value of values) {
+      const bits = index.facets[facet]?.[value];
+      if (bits) any = or(any, bits);
+    }
+    result = and(result, any);
+  }
+  return result;
+};
+
+export const keysIn = (index: FacetIndex, bits: Uint32Array): Set<string> =>
+  new Set(index.keys.filter((_, position) => hasBit(bits, position)));
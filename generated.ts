@@ -0,0 +1,15 @@
+// ==========================================
+// Indexes precomputed by `python cms.py export` into public/generated/.
+// They are optional: a missing file just means an empty index.
+// ==========================================
+
+const cache: Record<string, Promise<any>> = {};
+
+export const loadGenerated = <T>(name: string): Promise<Record<string, T>> => {
+  if (!cache[name]) {
+    cache[name] = fetch(`/generated/${name}`)
+      .then((res) => (res.ok ? res.json() : {}))
+      .catch(() => ({}));
+  }
+  return cache[name];
+};
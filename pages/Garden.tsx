@@ -1,6 +1,11 @@
 import React, { useState, useEffect } from 'react';
+import { useSearchParams } from 'react-router-dom';
 import { BLOG_POSTS } from '../constants';
 import MarkdownRenderer from '../components/MarkdownRenderer';
+import RelatedContent from '../components/RelatedContent';
+import { fetchText, prefetchedText, prefetchItem, prefetchWhenIdle } from '../prefetch';
+import FacetFilter, { useFacetFilter } from '../components/FacetFilter';
+import ContentOutline, { readingTimeLabel, useContentStats } from '../components/ContentOutline';
 import { ChevronLeft, Calendar, FileText, Loader2 } from 'lucide-react';
 import { BlogPost } from '../types';
 
@@ -8,18 +13,31 @@ const Garden: React.FC = () => {
   const [selectedPost, setSelectedPost] = useState<BlogPost | null>(null);
   const [postContent, setPostContent] = useState<string>('');
   const [isLoading, setIsLoading] = useState(false);
+  const filter = useFacetFilter('post');
+  const [searchParams] = useSearchParams();
+  const contentStats = useContentStats();
+
+  // Deep links (e.g. from the prerendered /garden/<id>/ pages) open an entry directly
+  useEffect(() => {
+    const id = searchParams.get('id');
+    if (id) {
+      setSelectedPost(BLOG_POSTS.find((post) => post.id === id) || null);
+    }
+  }, [searchParams]);
 
   // Effect to load content when a post is selected
   useEffect(() => {
     if (selectedPost) {
       // Check if content is a path to a markdown file
       if (selectedPost.content.trim().startsWith('/') || selectedPost.content.trim().endsWith('.md')) {
+        // Hover/idle prefetching may already have it
+        const prefetched = prefetchedText(selectedPost.content);
+        if (prefetched !== undefined) {
+          setPostContent(prefetched);
+          return;
+        }
         setIsLoading(true);
-        fetch(selectedPost.content)
-          .then((res) => {
-            if (!res.ok) throw new Error("Failed to load post");
-            return res.text();
-          })
+        fetchText(selectedPost.content)
           .then((text) => {
             setPostContent(text);
             setIsLoading(false);
@@ -38,7 +56,11 @@ const Garden: React.FC = () => {
     }
   }, [selectedPost]);
 
+  // Warm entry bodies in list order while the browser is idle
+  useEffect(() => prefetchWhenIdle(BLOG_POSTS.map((post) => `garden/${post.id}`)), []);
+
   if (selectedPost) {
+    const stats = contentStats[`garden/${selectedPost.id}`];
     return (
       <div className="min-h-screen p-8 md:p-16 lg:p-24 max-w-4xl mx-auto bg-white shadow-sm my-8 md:my-16 border border-stone-100">
         <button 
@@ -55,9 +77,17 @@ const Garden: React.FC = () => {
           <div className="flex items-center text-stone-400 font-mono text-sm mb-8 pb-8 border-b border-stone-200">
             <Calendar size={14} className="mr-2" />
             {selectedPost.date}
+            {stats && stats.readingMinutes > 0 && (
+              <>
+                <span className="mx-4">|</span>
+                {readingTimeLabel(stats)}
+              </>
+            )}
             <span className="mx-4">|</span>
             {selectedPost.tags.join(", ")}
           </div>
+
+          <ContentOutline stats={stats} />
           
           {isLoading ? (
             <div className="flex justify-center py-20">
@@ -86,6 +116,8 @@ const Garden: React.FC = () => {
                 </a>
              </div>
           )}
+
+          <RelatedContent section="garden" id={selectedPost.id} />
         </article>
       </div>
     );
@@ -101,15 +133,21 @@ const Garden: React.FC = () => {
         </p>
       </header>
 
+      <FacetFilter filter={filter} facets={[{ facet: 'tag', label: 'Tags' }, { facet: 'year', label: 'Year' }]} />
+
       <div className="grid grid-cols-1 md:grid-cols-2 gap-12">
-        {BLOG_POSTS.map((post) => (
+        {BLOG_POSTS.filter((post) => filter.includes(`garden/${post.id}`)).map((post) => (
           <div 
             key={post.id} 
             onClick={() => setSelectedPost(post)}
+            onMouseEnter={() => prefetchItem(`garden/${post.id}`)}
             className="group cursor-pointer"
           >
             <div className="h-1 w-full bg-stone-200 group-hover:bg-academic-orange transition-colors mb-6"></div>
-            <span className="font-mono text-stone-400 text-xs mb-2 block">{post.date}</span>
+            <span className="font-mono text-stone-400 text-xs mb-2 block">
+              {post.date}
+              {contentStats[`garden/${post.id}`]?.readingMinutes ? ` · ${readingTimeLabel(contentStats[`garden/${post.id}`])}` : ''}
+            </span>
             <h2 className="font-serif text-3xl font-bold mb-4 group-hover:text-academic-orange transition-colors">
               {post.title}
             </h2>
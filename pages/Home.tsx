@@ -8,6 +8,7 @@ import {
   HERO_INFO,
   HomepageContentCard
 } from '../constants';
+import PlaceholderImage from '../components/PlaceholderImage';
 
 const buildFontFamily = (english?: string, chinese?: string) => {
   const fonts: string[] = [];
@@ -49,7 +50,8 @@ const Home: React.FC = () => {
     sortValue: 0,
     link: entry.link || '',
     ctaLabel: entry.ctaLabel || '',
-    imageUrl: entry.imageUrl || undefined
+    imageUrl: entry.imageUrl || undefined,
+    imagePlaceholder: entry.imagePlaceholder
   }));
 
   const recentEntries = manualEntries.length > 0 ? manualEntries : autoEntries;
@@ -62,6 +64,9 @@ const Home: React.FC = () => {
 
   const featuredImage =
     featuredEntry.imageOverride?.trim() || featuredCard?.imageUrl || '';
+  const featuredPlaceholder = featuredEntry.imageOverride?.trim()
+    ? featuredEntry.imageOverridePlaceholder
+    : featuredCard?.imagePlaceholder;
 
   const renderRecentEntry = (entry: HomepageContentCard) => (
     <div key={`${entry.type}-${entry.id}`} className="group">
@@ -131,7 +136,8 @@ const Home: React.FC = () => {
               <div className="bg-white border border-stone-200 p-0 shadow-sm hover:shadow-md transition-shadow flex flex-col lg:flex-row min-h-[22rem] h-auto">
                 {featuredImage ? (
                   <div className="w-full lg:w-1/2 min-h-[16rem] lg:min-h-full bg-stone-200 relative overflow-hidden">
-                    <img
+                    <PlaceholderImage
+                      placeholder={featuredPlaceholder}
                       src={featuredImage}
                       alt={featuredCard.title}
                       className="w-full h-full object-cover grayscale hover:grayscale-0 transition-all duration-500"
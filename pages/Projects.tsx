@@ -1,25 +1,44 @@
 
 import React, { useState, useEffect } from 'react';
+import { useSearchParams } from 'react-router-dom';
 import { PROJECTS } from '../constants';
 import { Github, ArrowUpRight, ChevronLeft, Loader2 } from 'lucide-react';
 import { Project } from '../types';
 import MarkdownRenderer from '../components/MarkdownRenderer';
+import RelatedContent from '../components/RelatedContent';
+import PlaceholderImage from '../components/PlaceholderImage';
+import { fetchText, prefetchedText, prefetchItem, prefetchWhenIdle } from '../prefetch';
+import FacetFilter, { useFacetFilter } from '../components/FacetFilter';
+import ContentOutline, { useContentStats } from '../components/ContentOutline';
 
 const Projects: React.FC = () => {
   const [selectedProject, setSelectedProject] = useState<Project | null>(null);
   const [projectContent, setProjectContent] = useState<string>('');
   const [isLoading, setIsLoading] = useState(false);
+  const filter = useFacetFilter('project');
+  const [searchParams] = useSearchParams();
+  const contentStats = useContentStats();
+
+  // Deep links (e.g. from the prerendered /projects/<id>/ pages) open an entry directly
+  useEffect(() => {
+    const id = searchParams.get('id');
+    if (id) {
+      setSelectedProject(PROJECTS.find((project) => project.id === id) || null);
+    }
+  }, [searchParams]);
 
   // Load content
   useEffect(() => {
     if (selectedProject && selectedProject.content) {
       if (selectedProject.content.trim().startsWith('/') || selectedProject.content.trim().endsWith('.md')) {
+        // Hover/idle prefetching may already have it
+        const prefetched = prefetchedText(selectedProject.content);
+        if (prefetched !== undefined) {
+          setProjectContent(prefetched);
+          return;
+        }
         setIsLoading(true);
-        fetch(selectedProject.content)
-            .then(res => {
-                if (!res.ok) throw new Error("Failed");
-                return res.text();
-            })
+        fetchText(selectedProject.content)
             .then(text => {
                 setProjectContent(text);
                 setIsLoading(false);
@@ -35,6 +54,9 @@ const Projects: React.FC = () => {
     }
   }, [selectedProject]);
 
+  // Warm entry bodies in list order while the browser is idle
+  useEffect(() => prefetchWhenIdle(PROJECTS.map((project) => `projects/${project.id}`)), []);
+
   // DETAIL VIEW
   if (selectedProject) {
       return (
@@ -54,10 +76,12 @@ const Projects: React.FC = () => {
             {/* Show Image in Detail if exists */}
             {selectedProject.imageUrl && selectedProject.imageUrl.trim() !== '' && (
                 <div className="w-full h-64 md:h-80 bg-stone-200 mb-8 overflow-hidden rounded-sm">
-                    <img src={selectedProject.imageUrl} alt={selectedProject.title} className="w-full h-full object-cover" />
+                    <PlaceholderImage placeholder={selectedProject.imagePlaceholder} src={selectedProject.imageUrl} alt={selectedProject.title} className="w-full h-full object-cover" />
                 </div>
             )}
 
+            <ContentOutline stats={contentStats[`projects/${selectedProject.id}`]} />
+
             {isLoading ? (
                 <div className="flex justify-center py-20">
                 <Loader2 className="animate-spin text-academic-orange" size={32} />
@@ -78,6 +102,8 @@ const Projects: React.FC = () => {
                     </a>
                 )}
             </div>
+
+            <RelatedContent section="projects" id={selectedProject.id} />
             </article>
         </div>
       );
@@ -91,14 +117,17 @@ const Projects: React.FC = () => {
         <div className="w-20 h-1 bg-academic-orange"></div>
       </header>
 
+      <FacetFilter filter={filter} facets={[{ facet: 'techStack', label: 'Stack' }]} />
+
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-8">
-        {PROJECTS.map((project) => (
-          <div key={project.id} className="bg-white group hover:shadow-xl transition-all duration-300 border border-stone-100 flex flex-col h-full cursor-pointer" onClick={() => project.content ? setSelectedProject(project) : null}>
+        {PROJECTS.filter((project) => filter.includes(`projects/${project.id}`)).map((project) => (
+          <div key={project.id} onMouseEnter={() => prefetchItem(`projects/${project.id}`)} className="bg-white group hover:shadow-xl transition-all duration-300 border border-stone-100 flex flex-col h-full cursor-pointer" onClick={() => project.content ? setSelectedProject(project) : null}>
             
             {/* Conditional Image Rendering */}
             {project.imageUrl && project.imageUrl.trim() !== '' ? (
                 <div className="h-48 overflow-hidden relative bg-stone-200">
-                    <img 
+                    <PlaceholderImage
+                    placeholder={project.imagePlaceholder}
                     src={project.imageUrl} 
                     alt={project.title} 
                     className="w-full h-full object-cover grayscale group-hover:grayscale-0 transition-all duration-500 transform group-hover:scale-105" 
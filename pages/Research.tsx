@@ -1,26 +1,44 @@
 
 import React, { useState, useEffect } from 'react';
+import { useSearchParams } from 'react-router-dom';
 import { RESEARCH_PAPERS, RESEARCH_PAGE_CONFIG } from '../constants';
 import { FileText, Code, ExternalLink, Check, ChevronLeft, Loader2 } from 'lucide-react';
 import { Paper } from '../types';
 import MarkdownRenderer from '../components/MarkdownRenderer';
+import RelatedContent from '../components/RelatedContent';
+import { fetchText, prefetchedText, prefetchItem, prefetchWhenIdle } from '../prefetch';
+import FacetFilter, { useFacetFilter } from '../components/FacetFilter';
+import ContentOutline, { useContentStats } from '../components/ContentOutline';
 
 const Research: React.FC = () => {
   const [copiedId, setCopiedId] = useState<string | null>(null);
   const [selectedPaper, setSelectedPaper] = useState<Paper | null>(null);
   const [paperContent, setPaperContent] = useState<string>('');
   const [isLoading, setIsLoading] = useState(false);
+  const filter = useFacetFilter('paper');
+  const [searchParams] = useSearchParams();
+  const contentStats = useContentStats();
+
+  // Deep links (e.g. from the prerendered /research/<id>/ pages) open an entry directly
+  useEffect(() => {
+    const id = searchParams.get('id');
+    if (id) {
+      setSelectedPaper(RESEARCH_PAPERS.find((paper) => paper.id === id) || null);
+    }
+  }, [searchParams]);
 
   // Load content when paper selected
   useEffect(() => {
     if (selectedPaper && selectedPaper.content) {
       if (selectedPaper.content.trim().startsWith('/') || selectedPaper.content.trim().endsWith('.md')) {
+        // Hover/idle prefetching may already have it
+        const prefetched = prefetchedText(selectedPaper.content);
+        if (prefetched !== undefined) {
+          setPaperContent(prefetched);
+          return;
+        }
         setIsLoading(true);
-        fetch(selectedPaper.content)
-          .then(res => {
-            if (!res.ok) throw new Error("Failed to load");
-            return res.text();
-          })
+        fetchText(selectedPaper.content)
           .then(text => {
             setPaperContent(text);
             setIsLoading(false);
@@ -36,6 +54,9 @@ const Research: React.FC = () => {
     }
   }, [selectedPaper]);
 
+  // Warm entry bodies in list order while the browser is idle
+  useEffect(() => prefetchWhenIdle(RESEARCH_PAPERS.map((paper) => `research/${paper.id}`)), []);
+
   const handleCopyBibtex = (paper: Paper) => {
     const bibtex = paper.bibtex || `@article{${paper.id},
   title={${paper.title}},
@@ -70,6 +91,8 @@ const Research: React.FC = () => {
               <span className="text-sm not-italic text-stone-400 font-mono">{selectedPaper.venue} | {selectedPaper.year}</span>
           </div>
           
+          <ContentOutline stats={contentStats[`research/${selectedPaper.id}`]} />
+
           {isLoading ? (
             <div className="flex justify-center py-20">
                <Loader2 className="animate-spin text-academic-orange" size={32} />
@@ -91,6 +114,7 @@ const Research: React.FC = () => {
                 </a>
               )}
           </div>
+          <RelatedContent section="research" id={selectedPaper.id} />
         </article>
       </div>
     );
@@ -107,9 +131,11 @@ const Research: React.FC = () => {
         </p>
       </header>
 
+      <FacetFilter filter={filter} facets={[{ facet: 'tag', label: 'Tags' }, { facet: 'year', label: 'Year' }, { facet: 'venue', label: 'Venue' }]} />
+
       <div className="space-y-12">
-        {RESEARCH_PAPERS.map((paper) => (
-          <div key={paper.id} className="group relative pl-8 border-l-2 border-stone-200 hover:border-academic-orange transition-colors duration-300">
+        {RESEARCH_PAPERS.filter((paper) => filter.includes(`research/${paper.id}`)).map((paper) => (
+          <div key={paper.id} onMouseEnter={() => prefetchItem(`research/${paper.id}`)} className="group relative pl-8 border-l-2 border-stone-200 hover:border-academic-orange transition-colors duration-300">
             {/* Timeline dot */}
             <div className="absolute -left-[9px] top-0 w-4 h-4 rounded-full bg-stone-200 group-hover:bg-academic-orange transition-colors duration-300 border-4 border-academic-cream"></div>
             
@@ -0,0 +1,85 @@
+// ==========================================
+// Hover/idle prefetching from public/generated/prefetch.json (`python cms.py export`).
+// Routes and entries map to the files they need, with sizes; everything shares one
+// per-visit byte budget, and nothing is prefetched on Save-Data or 2G connections.
+// ==========================================
+import { loadGenerated } from './generated';
+
+interface PrefetchAsset {
+  url: string;
+  size: number;
+}
+
+const PREFETCH_BUDGET_BYTES = 1_500_000;
+
+let spent = 0;
+const requested = new Set<string>();
+const texts = new Map<string, Promise<string>>();
+const loadedTexts = new Map<string, string>();
+
+const loadManifest = () => loadGenerated<Record<string, PrefetchAsset[]>>('prefetch.json');
+
+const constrained = (): boolean => {
+  const connection = (navigator as any).connection;
+  return Boolean(connection && (connection.saveData || /2g/.test(connection.effectiveType || '')));
+};
+
+// Markdown bodies go through here so a prefetched file is reused instead of fetched again
+export const fetchText = (url: string): Promise<string> => {
+  let text = texts.get(url);
+  if (!text) {
+    text = fetch(url)
+      .then((res) => {
+        if (!res.ok) throw new Error(`Failed to load ${url}`);
+        return res.text();
+      })
+      .then((body) => {
+        loadedTexts.set(url, body);
+        return body;
+      })
+      .catch((err) => {
+        texts.delete(url);
+        throw err;
+      });
+    texts.set(url, text);
+  }
+  return text;
+};
+
+// Already-downloaded text, so a detail view can skip the loading state entirely
+export const prefetchedText = (url: string): string | undefined => loadedTexts.get(url);
+
+const prefetchAsset = ({ url, size }: PrefetchAsset) => {
+  if (requested.has(url) || spent + size > PREFETCH_BUDGET_BYTES) return;
+  requested.add(url);
+  spent += size;
+  if (url.endsWith('.md')) {
+    fetchText(url).catch(() => {});
+    return;
+  }
+  const link = document.createElement('link');
+  link.rel = 'prefetch';
+  link.href = url;
+  document.head.appendChild(link);
+};
+
+const prefetch = (group: 'routes' | 'items', key: string) => {
+  if (constrained()) return;
+  loadManifest().then((manifest) => (manifest[group]?.[key] || []).forEach(prefetchAsset));
+};
+
+export const prefetchRoute = (path: string) => prefetch('routes', path);
+
+// Keys are "<section>/<id>", e.g. "garden/brachistochrone"
+export const prefetchItem = (key: string) => prefetch('items', key);
+
+// Warm the given entries in order while the browser is idle, until the budget runs out
+export const prefetchWhenIdle = (keys: string[]): (() => void) => {
+  const run = () => keys.forEach(prefetchItem);
+  if (typeof window.requestIdleCallback === 'function') {
+    const handle = window.requestIdleCallback(run, { timeout: 5000 });
+    return () => window.cancelIdleCallback(handle);
+  }
+  const handle = window.setTimeout(run, 2000);
+  return () => window.clearTimeout(handle);
+};
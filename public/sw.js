@@ -0,0 +1,95 @@
+// Offline cache for the app shell, generated data, markdown bodies and small uploads.
+// `python3 cms.py postbuild` writes /precache-manifest.json ({url, hash, size} per file)
+// and stamps its version below, so each deploy changes this file and the browser reinstalls it.
+const PRECACHE_VERSION = 'dev';
+// One cache per deploy: a tab still running the previous bundle keeps reading the previous
+// worker's cache, so it never gets /generated/*.json or markdown from the new deploy.
+const CACHE_PREFIX = 'precache-';
+const CACHE_NAME = `${CACHE_PREFIX}${PRECACHE_VERSION}`;
+const MANIFEST_URL = '/precache-manifest.json';
+// url -> hash of what's currently in the cache, stored alongside it
+const HASHES_KEY = '/__precache-hashes';
+
+let hashes = null;
+
+const readHashes = async (cache) => {
+  const res = await cache.match(HASHES_KEY);
+  return res ? res.json() : {};
+};
+
+const previousCaches = async () =>
+  (await caches.keys()).filter((name) => name !== CACHE_NAME && (name.startsWith(CACHE_PREFIX) || name === 'site-precache'));
+
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    (async () => {
+      const res = await fetch(`${MANIFEST_URL}?v=${PRECACHE_VERSION}`, { cache: 'no-store' });
+      const manifest = await res.json();
+      const cache = await caches.open(CACHE_NAME);
+      const older = await Promise.all(
+        (await previousCaches()).map(async (name) => {
+          const old = await caches.open(name);
+          return { cache: old, hashes: await readHashes(old) };
+        })
+      );
+      const next = {};
+
+      // Only download entries whose hash changed; unchanged ones are copied from an older deploy's cache
+      await Promise.all(
+        manifest.entries.map(async ({ url, hash }) => {
+          for (const old of older) {
+            const hit = old.hashes[url] === hash && (await old.cache.match(url));
+            if (hit) {
+              await cache.put(url, hit);
+              next[url] = hash;
+              return;
+            }
+          }
+          const fresh = await fetch(url, { cache: 'reload' });
+          if (fresh.ok) {
+            await cache.put(url, fresh);
+            next[url] = hash;
+          }
+        })
+      );
+      await cache.put(HASHES_KEY, new Response(JSON.stringify(next), { headers: { 'Content-Type': 'application/json' } }));
+      hashes = next;
+      // No skipWaiting(): this worker takes over only once no tab runs the old bundle
+    })()
+  );
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil(
+    (async () => {
+      // Every page now runs this deploy, so older deploys' caches can go
+      await Promise.all((await previousCaches()).map((name) => caches.delete(name)));
+      hashes = await readHashes(await caches.open(CACHE_NAME));
+      await self.clients.claim();
+    })()
+  );
+});
+
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  const url = new URL(request.url);
+  if (request.method !== 'GET' || url.origin !== self.location.origin || request.headers.has('range')) return;
+
+  if (request.mode === 'navigate') {
+    // Pages stay network-first (prerendered routes); the cached shell is the offline fallback
+    event.respondWith(fetch(request).catch(async () => (await caches.match('/index.html')) || Response.error()));
+    return;
+  }
+
+  event.respondWith(
+    (async () => {
+      const cache = await caches.open(CACHE_NAME);
+      hashes = hashes || (await readHashes(cache));
+      if (url.pathname in hashes) {
+        const hit = await cache.match(url.pathname);
+        if (hit) return hit;
+      }
+      return fetch(request);
+    })()
+  );
+});
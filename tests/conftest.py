@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# cms.py is a single script at the repo root, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """An empty site directory as the working directory; cms.py resolves all its paths from there."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
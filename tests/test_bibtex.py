@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+import cms
+
+
+def entries(text):
+    return list(cms.iter_bibtex_entries(io.StringIO(text)))
+
+
+def test_entries_span_lines_and_skip_text_between():
+    text = "junk before\n@article{a,\n  title = {One {Nested} Title},\n}\nmore junk @book(b, title=\"Two\")\n"
+    assert [(kind, raw.split(",")[0]) for kind, raw in entries(text)] == [("article", "@article{a"), ("book", "@book(b")]
+
+
+def test_fields_with_macros_concatenation_and_numbers():
+    fields = cms.parse_bibtex_fields('title = {A {B} c}, journal = jan # " issue", year = 2021,', {"jan": "January"})
+    assert fields == {"title": "A {B} c", "journal": "January issue", "year": "2021"}
+
+
+def test_parse_entry_rejects_non_entries():
+    assert cms.parse_bibtex_entry("@misc{key, title={T}}") == ("key", {"title": "T"})
+    with pytest.raises(ValueError):
+        cms.parse_bibtex_entry("not bibtex")
+
+
+def test_latex_to_text_accents_and_dashes():
+    assert cms.latex_to_text(r"Caf\'{e} -- na\"ive \textbf{bold}") == "Café – naïve bold"
+
+
+def test_authors_are_flipped_and_others_dropped():
+    assert cms.format_bibtex_authors("Doe, Jane and John Smith and others") == ["Jane Doe", "John Smith"]
+
+
+def test_normalize_doi_strips_resolver_prefixes():
+    assert cms.normalize_doi("https://doi.org/10.1000/ABC") == "10.1000/abc"
+    assert cms.normalize_doi("doi: 10.1000/abc") == "10.1000/abc"
+
+
+def test_title_key_folds_accents_and_keeps_other_scripts():
+    assert cms.title_key("Café Networks") == cms.title_key("Cafe networks!") == cms.title_key(r"Caf\'{e} Networks")
+    assert cms.title_key("深度学习") != cms.title_key("机器学习")
+    assert cms.title_key("!!!") == ""
+
+
+def test_import_skips_duplicates_within_the_file_and_against_the_store():
+    existing = {"id": "1", "title": "Known Paper", "bibtex": "@article{k, doi={10.1/known}}"}
+    bib = """
+@string{conf = "Proc. Conf"}
+@article{a, title={Café Networks}, author={Doe, Jane}, journal=conf, year={2020}}
+@article{b, title={Cafe networks}, year={2020}}
+@article{c, title={Something else}, doi={https://doi.org/10.1/KNOWN}}
+@article{d, title={known paper}}
+@comment{ignored}
+@article{e, title={深度学习}}
+@article{f, title={机器学习}}
+@article{g, year={2020}}
+"""
+    added, skipped = cms.import_bibtex({"research_papers": [existing]}, io.StringIO(bib))
+    assert [paper["title"] for paper in added] == ["Café Networks", "深度学习", "机器学习"]
+    assert added[0]["venue"] == "Proc. Conf"
+    assert added[0]["authors"] == ["Jane Doe"]
+    assert skipped == 4
+    assert len({paper["id"] for paper in added}) == 3
+
+
+def test_unparseable_stored_bibtex_falls_back_to_the_title():
+    paper = {"title": "Broken", "bibtex": "@article{oops"}
+    assert cms.paper_dedupe_keys(paper) == {("title", "broken")}
+
+
+def test_new_item_id_widens_with_the_store():
+    taken = {str(n) for n in range(2000)}
+    assert len(cms.new_item_id(taken)) >= 5
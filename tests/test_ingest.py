@@ -0,0 +1,64 @@
+import os
+
+import cms
+
+
+def test_front_matter_scalars_inline_lists_and_block_lists():
+    text = """---
+title: "Hello: World"
+date: 2024-01-02
+# a comment
+tags: [a, 'b c']
+aliases:
+  - one
+  - "two"
+---
+Body
+"""
+    meta, body = cms.parse_front_matter(text)
+    assert meta == {"title": "Hello: World", "date": "2024-01-02", "tags": ["a", "b c"], "aliases": ["one", "two"]}
+    assert body == "Body\n"
+
+
+def test_no_front_matter_leaves_the_text_alone():
+    assert cms.parse_front_matter("# Title\n---\nnot meta\n") == ({}, "# Title\n---\nnot meta\n")
+
+
+def test_front_matter_at_end_of_file():
+    assert cms.parse_front_matter("---\ntitle: Only\n---") == ({"title": "Only"}, "")
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_ingest_skips_known_titles_and_dedupes_front_matter_ids(site):
+    os.makedirs("incoming")
+    write("incoming/a.md", "---\nid: 7\ntitle: First\ntags: x, y\n---\nFirst paragraph.\n")
+    write("incoming/b.md", "---\nid: 7\ntitle: Second\n---\nSecond.\n")
+    write("incoming/c.md", "---\nid: 9\ntitle: Existing Post\n---\nOld.\n")
+    write("incoming/notes.txt", "ignored")
+    data = {"blog_posts": [{"id": "1", "title": "Existing post"}]}
+
+    posts, bodies, skipped = cms.plan_post_ingest(data, "incoming")
+
+    assert [post["title"] for post in posts] == ["First", "Second"]
+    assert posts[0]["id"] == "7" and posts[1]["id"] not in ("1", "7")
+    assert posts[0]["tags"] == ["x", "y"]
+    assert posts[0]["excerpt"] == "First paragraph."
+    assert skipped == ["c.md"]
+    assert sorted(bodies) == ["first.md", "second.md"]
+    assert not os.path.exists(cms.POSTS_DIR)  # planning writes nothing
+
+
+def test_post_bodies_appear_only_on_commit(site):
+    bodies = {"a.md": "A", "b.md": "B"}
+    cms.stage_post_bodies(bodies)
+    assert sorted(os.listdir(cms.POSTS_DIR)) == ["a.md.part", "b.md.part"]
+    cms.commit_post_bodies(bodies)
+    assert sorted(os.listdir(cms.POSTS_DIR)) == ["a.md", "b.md"]
+
+    cms.stage_post_bodies({"c.md": "C"})
+    cms.discard_post_bodies({"c.md": "C"})
+    assert sorted(os.listdir(cms.POSTS_DIR)) == ["a.md", "b.md"]
@@ -0,0 +1,119 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import cms
+
+DOCUMENT = {
+    "hero": {"headline": "Hi", "subheadline": "There"},
+    "tags": ["a", "b"],
+    "research_papers": [{"id": "p1", "title": "Paper", "tags": ["a"]}],
+    "projects": [{"id": "j1", "title": "Project", "techStack": []}],
+    "blog_posts": [{"id": "b1", "title": "Post", "tags": []}],
+}
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def open_editor(site, request):
+    """Opens an independent editor session (store, data, base versions) on the same site."""
+    with open(cms.DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump(DOCUMENT, f)
+    stores = []
+
+    def open_editor():
+        store = cms.open_store(request.param)
+        stores.append(store)
+        return store, store.load(), store.versions()
+
+    yield open_editor
+    for store in stores:
+        if isinstance(store, cms.SQLiteStore):
+            store.conn.close()
+
+
+def saved(store):
+    return json.loads(json.dumps(store.load(), default=cms.model_json))
+
+
+def never_asked(keys):
+    raise AssertionError(f"unexpected conflict on {keys}")
+
+
+def test_disjoint_edits_merge(open_editor):
+    store_a, data_a, base_a = open_editor()
+    store_b, data_b, base_b = open_editor()
+    data_b["projects"][0]["title"] = "Theirs"
+    assert cms.merge_and_save(store_b, data_b, base_b, {"projects": {0}}, never_asked)[1] == []
+
+    data_a["research_papers"][0]["title"] = "Mine"
+    _, adopted = cms.merge_and_save(store_a, data_a, base_a, {"research_papers": {0}}, never_asked)
+    assert adopted == ["projects"]
+    assert data_a["projects"][0]["title"] == "Theirs"
+    result = saved(store_a)
+    assert result["projects"][0]["title"] == "Theirs"
+    assert result["research_papers"][0]["title"] == "Mine"
+
+
+def test_identical_edits_are_not_conflicts(open_editor):
+    store_a, data_a, base_a = open_editor()
+    store_b, data_b, base_b = open_editor()
+    for data in (data_a, data_b):
+        data["hero"]["headline"] = "Same"
+    cms.merge_and_save(store_b, data_b, base_b, {"hero": None}, never_asked)
+    assert cms.merge_and_save(store_a, data_a, base_a, {"hero": None}, never_asked) is not None
+
+
+@pytest.mark.parametrize("choice", ["mine", "theirs"])
+def test_conflicts_follow_the_choice(open_editor, choice):
+    store_a, data_a, base_a = open_editor()
+    store_b, data_b, base_b = open_editor()
+    data_b["blog_posts"].append({"id": "b2", "title": "Theirs only", "tags": []})
+    data_b["blog_posts"][0]["title"] = "Theirs"
+    cms.merge_and_save(store_b, data_b, base_b, {"blog_posts": None}, never_asked)
+
+    data_a["blog_posts"][0]["title"] = "Mine"
+    asked = []
+    result = cms.merge_and_save(store_a, data_a, base_a, {"blog_posts": {0}}, lambda keys: asked.append(keys) or choice)
+    assert asked == [["blog_posts"]]
+    posts = saved(store_a)["blog_posts"]
+    if choice == "mine":
+        # Our whole version wins, not a row-level mix of both saves
+        assert [post["title"] for post in posts] == ["Mine"]
+        assert result[1] == []
+    else:
+        assert [post["title"] for post in posts] == ["Theirs", "Theirs only"]
+        assert data_a["blog_posts"][0]["title"] == "Theirs"
+
+
+def test_aborted_conflict_saves_nothing(open_editor):
+    store_a, data_a, base_a = open_editor()
+    store_b, data_b, base_b = open_editor()
+    data_b["hero"]["headline"] = "Theirs"
+    cms.merge_and_save(store_b, data_b, base_b, {"hero": None}, never_asked)
+    data_a["hero"]["headline"] = "Mine"
+    assert cms.merge_and_save(store_a, data_a, base_a, {"hero": None}, lambda keys: None) is None
+    assert saved(store_a)["hero"]["headline"] == "Theirs"
+
+
+def test_lock_times_out_while_held(site):
+    with cms.StoreLock():
+        with pytest.raises(TimeoutError):
+            with cms.StoreLock(timeout=0.1):
+                pass
+    assert not os.path.exists(cms.LOCK_FILE)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="dead-pid detection is POSIX only")
+def test_lock_left_by_a_dead_process_is_broken(site):
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    os.makedirs(cms.CACHE_DIR)
+    with open(cms.LOCK_FILE, "w", encoding="utf-8") as f:
+        json.dump({"pid": child.pid, "host": socket.gethostname(), "time": time.time()}, f)
+    with cms.StoreLock(timeout=0.1):
+        assert cms.StoreLock().holder()["pid"] == os.getpid()
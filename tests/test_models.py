@@ -0,0 +1,69 @@
+import copy
+import json
+import pickle
+
+import cms
+
+DOCUMENT = {
+    "profile": {"name": "Someone"},
+    "hero": {"subheadline": "Sub", "headline": "Head", "custom": 1},
+    "homepage": {"tabTitle": "Site", "featuredEntry": {"type": "paper"}},
+    "tags": ["x", "y", "x"],
+    "research_papers": [{"title": "T", "id": "p1", "tags": ["x"], "extraField": {"nested": [1, 2]}}],
+    "projects": [{"id": "j1", "techStack": ["py"], "imageUrl": ""}],
+    "blog_posts": [{"id": "b1", "title": "Post", "date": "2024-01-01", "tags": []}],
+}
+
+
+def round_trip(document):
+    return json.loads(json.dumps(cms.load_content(copy.deepcopy(document)), default=cms.model_json))
+
+
+def test_json_round_trip_keeps_keys_order_and_unknown_fields():
+    result = round_trip(DOCUMENT)
+    assert result == DOCUMENT
+    assert list(result["hero"]) == ["subheadline", "headline", "custom"]
+    assert list(result["research_papers"][0]) == ["title", "id", "tags", "extraField"]
+
+
+def test_models_are_used_where_types_ts_has_them():
+    data = cms.load_content(copy.deepcopy(DOCUMENT))
+    assert isinstance(data["research_papers"][0], cms.Paper)
+    assert isinstance(data["projects"][0], cms.Project)
+    assert isinstance(data["blog_posts"][0], cms.BlogPost)
+    assert isinstance(data["hero"], cms.Hero)
+    assert isinstance(data["profile"], dict)
+
+
+def test_mapping_behaviour_matches_dict():
+    paper = cms.Paper({"id": "p1"})
+    paper["title"] = "T"
+    paper["extra"] = 1
+    assert "title" in paper and "venue" not in paper
+    assert paper.get("venue", "none") == "none"
+    assert list(paper.items()) == [("id", "p1"), ("title", "T"), ("extra", 1)]
+    del paper["title"]
+    del paper["extra"]
+    assert paper.to_dict() == {"id": "p1"}
+    assert paper.copy() == paper and paper.copy() is not paper
+
+
+def test_defaults_fill_only_missing_keys():
+    homepage = cms.HomepageConfig({"tabTitle": "Mine", "featuredEntry": {"type": "paper"}}).fill_defaults()
+    assert homepage["tabTitle"] == "Mine"
+    assert homepage["featuredEntry"] == {"type": "paper", "id": "", "imageOverride": ""}
+    blank = cms.BlogPost.blank(id="b2")
+    assert blank["tags"] == [] and blank["tags"] is not cms.BlogPost.blank()["tags"]
+
+
+def test_models_pickle_for_worker_processes():
+    post = cms.BlogPost({"id": "b1", "tags": ["x"], "extra": True})
+    clone = pickle.loads(pickle.dumps(post))
+    assert type(clone) is cms.BlogPost and clone.to_dict() == post.to_dict()
+
+
+def test_model_at_wraps_only_collection_items_and_sections():
+    assert isinstance(cms.model_at(["projects", 0], {"id": "j"}), cms.Project)
+    assert isinstance(cms.model_at(["hero"], {}), cms.Hero)
+    assert type(cms.model_at(["projects", 0, "featured"], {})) is dict
+    assert cms.model_at(["projects", 0], "text") == "text"
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+import cms
+
+
+def test_rewrite_matches_whole_names_only():
+    text = "![a](/uploads/a.png) [b](/uploads/a.png.bak) </uploads/a.png> /uploads/a.png?v=1 /uploads/ab.png"
+    assert cms.rewrite_upload_links(text, "a.png", "c.png") == (
+        "![a](/uploads/c.png) [b](/uploads/a.png.bak) </uploads/c.png> /uploads/c.png?v=1 /uploads/ab.png")
+
+
+def test_rewrite_keeps_percent_encoding():
+    text = "[x](/uploads/my%20file.pdf) and /uploads/my file.pdf"
+    assert cms.rewrite_upload_links(text, "my file.pdf", "new name.pdf") == (
+        "[x](/uploads/new%20name.pdf) and /uploads/new name.pdf")
+
+
+def test_whole_value_links_without_leading_slash():
+    assert cms.rewrite_upload_links("uploads/a.png", "a.png", "b.png", whole_value=True) == "uploads/b.png"
+
+
+def test_mapping_rewriter_matches_single_renames():
+    mapping = {"a.png": "a.1234.png", "a.png.bak": "a.png.5678.bak", "my file.pdf": "my file.99.pdf"}
+    rewrite = cms.upload_links_rewriter(mapping)
+    text = "/uploads/a.png /uploads/a.png.bak (/uploads/my%20file.pdf) </uploads/a.png> /uploads/other.png"
+    expected = text
+    for old, new in mapping.items():
+        expected = cms.rewrite_upload_links(expected, old, new)
+    assert rewrite(text) == expected
+    assert cms.upload_links_rewriter({})("/uploads/a.png") == "/uploads/a.png"
+
+
+def test_upload_names_are_found_in_markdown_and_fields(site):
+    os.makedirs(cms.POSTS_DIR)
+    with open(os.path.join(cms.POSTS_DIR, "p.md"), "w", encoding="utf-8") as f:
+        f.write("![fig](/uploads/fig.png)\n")
+    data = {"blog_posts": [{"id": "1", "content": "posts/p.md", "pdfAttachment": "/uploads/paper.pdf"}]}
+    references = cms.scan_upload_references(data, [("unsaved", "/uploads/draft.png")])
+    assert sorted(references) == ["draft.png", "fig.png", "paper.pdf"]
+    assert references["draft.png"] == ["unsaved"]
+
+
+def test_rename_moves_the_file_and_rewrites_every_reference(site):
+    os.makedirs(cms.UPLOADS_DIR)
+    os.makedirs(cms.POSTS_DIR)
+    with open(os.path.join(cms.UPLOADS_DIR, "old.pdf"), "wb") as f:
+        f.write(b"%PDF")
+    md_path = os.path.join(cms.POSTS_DIR, "p.md")
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write("[pdf](/uploads/old.pdf)\n")
+    data = {"blog_posts": [{"id": "1", "content": "posts/p.md", "pdfAttachment": "/uploads/old.pdf"}]}
+
+    assert cms.rename_upload(data, "old.pdf", "new.pdf") == (1, 1)
+    assert data["blog_posts"][0]["pdfAttachment"] == "/uploads/new.pdf"
+    assert os.listdir(cms.UPLOADS_DIR) == ["new.pdf"]
+    with open(md_path, encoding="utf-8") as f:
+        assert f.read() == "[pdf](/uploads/new.pdf)\n"
+
+
+def test_rename_refuses_bad_targets(site):
+    os.makedirs(cms.UPLOADS_DIR)
+    for name in ("a.pdf", "b.pdf"):
+        open(os.path.join(cms.UPLOADS_DIR, name), "wb").close()
+    with pytest.raises(FileExistsError):
+        cms.check_upload_rename("a.pdf", "b.pdf")
+    with pytest.raises(ValueError):
+        cms.check_upload_rename("a.pdf", "sub/c.pdf")
+    with pytest.raises(FileNotFoundError):
+        cms.check_upload_rename("missing.pdf", "c.pdf")
@@ -14,11 +14,20 @@ export interface Paper {
   content?: string; // Path to markdown file
 }
 
+// Computed by the CMS at upload time (needs Pillow): dominant colour + ~12px PNG data URI
+export interface ImagePlaceholder {
+  color: string;
+  lqip: string;
+  width: number;
+  height: number;
+}
+
 export interface Project {
   id: string;
   title: string;
   description: string;
   imageUrl?: string;
+  imagePlaceholder?: ImagePlaceholder | null; // Set by the CMS when imageUrl is an upload
   techStack: string[];
   link?: string;
   github?: string;
@@ -71,12 +80,14 @@ export interface HomepageManualEntry {
   link: string;
   ctaLabel: string;
   imageUrl?: string;
+  imagePlaceholder?: ImagePlaceholder | null;
 }
 
 export interface HomepageFeaturedEntry {
   type: HomepageContentType;
   id: string;
   imageOverride?: string;
+  imageOverridePlaceholder?: ImagePlaceholder | null;
 }
 
 export interface HomepageConfig {
@@ -91,3 +102,19 @@ export interface HomepageConfig {
 export interface ResearchPageConfig {
   description: string;
 }
+
+// Generated by `python cms.py export` into public/generated/content-stats.json
+export interface ContentHeading {
+  level: number;
+  text: string;
+  id: string;
+}
+
+export interface ContentStats {
+  words: number;
+  readingMinutes: number;
+  headings: ContentHeading[];
+  mathBlocks: number;
+  inlineMath: number;
+  codeBlocks: number;
+}